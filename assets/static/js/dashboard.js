@@ -1,9 +1,47 @@
-// Animation des statistiques au chargement
+// Chargement des panneaux au chargement de la page
 document.addEventListener('DOMContentLoaded', function () {
-    updateStatistics();
-    createCharts();
+    // Un seul instantané côté serveur pour tous les panneaux
+    loadPanels(dashboardConfig.panelsUrl, {
+        daily: daily => createCurrentCategoryChart(daily.by_category),
+        trend: trend => createWeeklyTrendChart(trend.trend),
+        monthly: monthlySummary => {
+            updateStatistics(monthlySummary);
+            animateStatistics();
+            createMonthlyCategoryChart(monthlySummary);
+        },
+        recommendations: recommendations => renderRecommendations(recommendations)
+    });
+});
+
+/**
+ * Charge les panneaux depuis l'API JSON puis affiche chacun d'eux
+ */
+async function loadPanels(url, renderers) {
+    let panels;
+    try {
+        const response = await fetch(url, {
+            headers: { 'Accept': 'application/json' }
+        });
+        if (!response.ok) throw new Error(response.statusText);
+
+        panels = await response.json();
+    } catch (error) {
+        console.error(`Erreur lors du chargement des panneaux ${url} :`, error);
+        return;
+    }
 
-    // Animation des cartes statistiques
+    // Une erreur d'affichage d'un panneau n'empêche pas les autres
+    for (const [name, render] of Object.entries(renderers)) {
+        try {
+            render(panels[name]);
+        } catch (error) {
+            console.error(`Erreur lors de l'affichage du panneau ${name} :`, error);
+        }
+    }
+}
+
+// Animation des cartes statistiques
+function animateStatistics() {
     const stats = document.querySelectorAll('[class*="text-2xl font-bold"]');
     stats.forEach((stat, index) => {
         stat.style.opacity = '0';
@@ -14,9 +52,9 @@ document.addEventListener('DOMContentLoaded', function () {
             stat.style.transform = 'translateY(0)';
         }, index * 100);
     });
-});
+}
 
-function updateStatistics() {
+function updateStatistics(monthlySummary) {
     if (monthlySummary) {
         // Total mensuel
         document.getElementById('totalEmissions').textContent = monthlySummary.total ? monthlySummary.total.toFixed(2) : '0.00';
@@ -41,18 +79,7 @@ function updateStatistics() {
     }
 }
 
-function createCharts() {
-    // 1. Graphique par catégorie (données actuelles)
-    createCurrentCategoryChart();
-
-    // 2. Graphique évolution hebdomadaire
-    createWeeklyTrendChart();
-
-    // 3. Graphique comparaison mensuelle par catégorie
-    createMonthlyCategoryChart();
-}
-
-function createCurrentCategoryChart() {
+function createCurrentCategoryChart(categoriesData) {
     if (!categoriesData) return;
 
     const categoryColors = {
@@ -106,7 +133,7 @@ function createCurrentCategoryChart() {
     });
 }
 
-function createWeeklyTrendChart() {
+function createWeeklyTrendChart(weeklyData) {
     if (!weeklyData || weeklyData.length === 0) return;
 
     const ctx = document.getElementById('weeklyChart').getContext('2d');
@@ -168,7 +195,7 @@ function createWeeklyTrendChart() {
     });
 }
 
-function createMonthlyCategoryChart() {
+function createMonthlyCategoryChart(monthlySummary) {
     if (!monthlySummary || !monthlySummary.by_category) return;
 
     const categoryColors = {
@@ -234,10 +261,52 @@ function createMonthlyCategoryChart() {
     });
 }
 
+function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = String(value);
+    return div.innerHTML;
+}
+
+function renderRecommendation(recommendation) {
+    const impactBadge = recommendation.impact === 'Élevé'
+        ? '<span class="px-2 py-1 text-xs bg-red-100 text-red-700 rounded font-medium">Impact élevé</span>'
+        : '<span class="px-2 py-1 text-xs bg-orange-100 text-orange-700 rounded font-medium">Impact moyen</span>';
+    const easeBadge = recommendation.ease === 'Facile'
+        ? '<span class="px-2 py-1 text-xs bg-green-100 text-green-700 rounded font-medium">Facile</span>'
+        : '<span class="px-2 py-1 text-xs bg-yellow-100 text-yellow-700 rounded font-medium">Moyen</span>';
+
+    return `
+        <div class="recommendation-card bg-white border border-gray-200 rounded-xl p-5 hover:border-emerald-200 hover:shadow-md hover:-translate-y-1 transition-all duration-300 transform"
+             data-impact="${escapeHtml(recommendation.impact)}"
+             data-ease="${escapeHtml(recommendation.ease)}">
+            <div class="flex items-start justify-between mb-3">
+                <h4 class="text-base font-semibold text-gray-900 flex-1 pr-4">
+                    ${escapeHtml(recommendation.title)}
+                </h4>
+                <div class="flex flex-col gap-1">
+                    ${impactBadge}
+                    ${easeBadge}
+                </div>
+            </div>
+            <p class="text-sm text-gray-600 leading-relaxed">
+                ${escapeHtml(recommendation.description)}
+            </p>
+        </div>`;
+}
+
+function renderRecommendations(recommendations) {
+    const grid = document.getElementById('recommendations-grid');
+    grid.innerHTML = recommendations.map(renderRecommendation).join('');
+    document.getElementById('recommendationsCount').textContent = recommendations.length;
+
+    // Appliquer le filtre sélectionné avant le chargement
+    const activeButton = document.querySelector('.filter-btn.active');
+    if (activeButton) activeButton.click();
+}
+
 // Gestion des filtres de recommandations
 document.addEventListener('DOMContentLoaded', function () {
     const filterButtons = document.querySelectorAll('.filter-btn');
-    const recommendationCards = document.querySelectorAll('.recommendation-card');
     const noRecommendationsMessage = document.getElementById('no-recommendations');
 
     filterButtons.forEach(button => {
@@ -253,7 +322,8 @@ document.addEventListener('DOMContentLoaded', function () {
             this.classList.add('active', 'bg-emerald-100', 'text-emerald-700');
             this.classList.remove('bg-gray-100', 'text-gray-600');
 
-            // Filter recommendations
+            // Filter recommendations (cartes ajoutées après le chargement du panneau)
+            const recommendationCards = document.querySelectorAll('.recommendation-card');
             let visibleCount = 0;
 
             recommendationCards.forEach(card => {
@@ -3,52 +3,178 @@ document.addEventListener('DOMContentLoaded', function () {
     const $ = (selector) => document.querySelector(selector);
     const $$ = (selector) => document.querySelectorAll(selector);
 
-    const hasActivities = activitiesData && activitiesData.length > 0;
+    const hasActivities = historySummary && historySummary.count > 0;
 
     // Initialisation si des activités existent
     if (hasActivities) {
         calculateHistoryStats();
         createHistoryChart();
         createCategoryChart();
+        initializeLoadMore();
     }
 
     /**
-     * Calcul et affichage des statistiques de l'historique
+     * Affichage des statistiques de l'historique (calculées côté serveur)
      */
     function calculateHistoryStats() {
-        // Calcul du total des émissions
-        const totalEmissions = activitiesData.reduce((sum, activity) => sum + parseFloat(activity.emissions), 0);
         const totalElement = $('#totalHistoryEmissions');
         if (totalElement) {
-            totalElement.textContent = totalEmissions.toFixed(2);
+            totalElement.textContent = historySummary.total.toFixed(2);
         }
 
-        // Calcul des dates de première et dernière activité
-        const sortedDates = activitiesData
-            .map(activity => new Date(activity.date))
-            .sort((a, b) => a - b);
+        const firstElement = $('#firstActivityDate');
+        const lastElement = $('#lastActivityDate');
 
-        if (sortedDates.length > 0) {
-            const firstDate = sortedDates[0];
-            const lastDate = sortedDates[sortedDates.length - 1];
+        if (firstElement && historySummary.first_date) {
+            firstElement.textContent = new Date(historySummary.first_date).toLocaleDateString('fr-FR', {
+                day: 'numeric',
+                month: 'short'
+            });
+        }
 
-            const firstElement = $('#firstActivityDate');
-            const lastElement = $('#lastActivityDate');
+        if (lastElement && historySummary.last_date) {
+            lastElement.textContent = new Date(historySummary.last_date).toLocaleDateString('fr-FR', {
+                day: 'numeric',
+                month: 'short'
+            });
+        }
+    }
 
-            if (firstElement) {
-                firstElement.textContent = firstDate.toLocaleDateString('fr-FR', {
-                    day: 'numeric',
-                    month: 'short'
-                });
-            }
+    /**
+     * Chargement des pages suivantes de l'historique
+     */
+    function initializeLoadMore() {
+        const button = $('#loadMoreButton');
+        const container = $('#loadMoreContainer');
+        if (!button || !container) return;
+
+        let nextCursor = historyConfig.nextCursor;
+
+        button.addEventListener('click', async function () {
+            if (!nextCursor) return;
 
-            if (lastElement) {
-                lastElement.textContent = lastDate.toLocaleDateString('fr-FR', {
-                    day: 'numeric',
-                    month: 'short'
+            const params = new URLSearchParams({ cursor: nextCursor });
+            Object.entries(historyConfig.filters).forEach(([key, value]) => {
+                if (value) params.append(key, value);
+            });
+
+            button.disabled = true;
+            try {
+                const response = await fetch(`${historyConfig.dataUrl}?${params.toString()}`, {
+                    headers: { 'Accept': 'application/json' }
                 });
+                if (!response.ok) throw new Error(response.statusText);
+
+                const page = await response.json();
+                appendActivities(page.activities);
+                nextCursor = page.next_cursor;
+            } catch (error) {
+                console.error('Erreur lors du chargement de l\'historique :', error);
+            } finally {
+                button.disabled = false;
+                container.classList.toggle('hidden', !nextCursor);
             }
-        }
+        });
+    }
+
+    /**
+     * Ajout d'une page d'activités au tableau et aux cartes
+     */
+    function appendActivities(activities) {
+        const tableBody = $('#activitiesTableBody');
+        const cardsContainer = $('#activitiesCards');
+
+        activities.forEach(activity => {
+            if (tableBody) tableBody.insertAdjacentHTML('beforeend', renderActivityRow(activity));
+            if (cardsContainer) cardsContainer.insertAdjacentHTML('beforeend', renderActivityCard(activity));
+        });
+    }
+
+    const categoryBadges = {
+        transport: { label: 'Transport', classes: 'bg-blue-100 text-blue-800' },
+        food: { label: 'Alimentation', classes: 'bg-orange-100 text-orange-800' },
+        energy: { label: 'Énergie', classes: 'bg-red-100 text-red-800' },
+        consumption: { label: 'Consommation', classes: 'bg-purple-100 text-purple-800' }
+    };
+
+    function escapeHtml(value) {
+        const div = document.createElement('div');
+        div.textContent = String(value);
+        return div.innerHTML;
+    }
+
+    function formatDate(isoDate) {
+        const [year, month, day] = isoDate.split('-');
+        return `${day}/${month}/${year}`;
+    }
+
+    function renderBadge(category, padding) {
+        const badge = categoryBadges[category] || categoryBadges.consumption;
+        return `<span class="inline-flex items-center ${padding} rounded-full text-xs font-medium ${badge.classes}">${badge.label}</span>`;
+    }
+
+    function renderActivityRow(activity) {
+        return `
+            <tr class="hover:bg-gray-50 transition-colors duration-200 activity-row"
+                data-category="${escapeHtml(activity.category)}"
+                data-date="${activity.date}"
+                data-emissions="${activity.emissions.toFixed(2)}"
+                data-name="${escapeHtml(activity.name.toLowerCase())}">
+                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900">
+                    <div class="flex items-center">
+                        <div class="w-2 h-2 bg-emerald-500 rounded-full mr-3"></div>
+                        ${formatDate(activity.date)}
+                    </div>
+                </td>
+                <td class="px-6 py-4 whitespace-nowrap">${renderBadge(activity.category, 'px-2.5 py-0.5')}</td>
+                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900">
+                    <div class="font-medium">${escapeHtml(activity.name)}</div>
+                </td>
+                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900">
+                    <span class="font-semibold">${activity.quantity}</span> ${escapeHtml(activity.unit)}
+                </td>
+                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900">
+                    <span class="font-bold text-red-600">${activity.emissions.toFixed(2)}</span> kgCO₂e
+                </td>
+                <td class="px-6 py-4 whitespace-nowrap text-sm font-medium">
+                    <form action="${activity.delete_url}" method="post" class="inline">
+                        <button type="submit" class="text-red-600 hover:text-red-900 hover:bg-red-50 px-3 py-1 rounded-lg transition-colors duration-200">
+                            <svg fill="none" stroke="currentColor" class="w-4 h-4" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="m19 7-.867 12.142A2 2 0 0 1 16.138 21H7.862a2 2 0 0 1-1.995-1.858L5 7m5 4v6m4-6v6m1-10V4a1 1 0 0 0-1-1h-4a1 1 0 0 0-1 1v3M4 7h16"/></svg>
+                        </button>
+                    </form>
+                </td>
+            </tr>`;
+    }
+
+    function renderActivityCard(activity) {
+        return `
+            <div class="bg-gray-50 rounded-xl p-4 activity-card"
+                 data-category="${escapeHtml(activity.category)}"
+                 data-date="${activity.date}"
+                 data-emissions="${activity.emissions.toFixed(2)}"
+                 data-name="${escapeHtml(activity.name.toLowerCase())}">
+                <div class="flex items-start justify-between mb-3">
+                    <div class="flex-1">
+                        <div class="flex items-center space-x-2 mb-2">
+                            ${renderBadge(activity.category, 'px-2 py-1')}
+                            <span class="text-xs text-gray-500">${formatDate(activity.date)}</span>
+                        </div>
+                        <h4 class="font-semibold text-gray-900 mb-1">${escapeHtml(activity.name)}</h4>
+                        <p class="text-sm text-gray-600">${activity.quantity} ${escapeHtml(activity.unit)}</p>
+                    </div>
+                    <div class="text-right">
+                        <div class="font-bold text-red-600 text-lg">${activity.emissions.toFixed(2)}</div>
+                        <div class="text-xs text-gray-500">kgCO₂e</div>
+                    </div>
+                </div>
+                <div class="flex justify-end">
+                    <form action="${activity.delete_url}" method="post" onsubmit="return confirm('Êtes-vous sûr de vouloir supprimer cette activité ?')">
+                        <button type="submit" class="text-red-600 hover:text-red-900 text-sm">
+                            Supprimer
+                        </button>
+                    </form>
+                </div>
+            </div>`;
     }
 
     /**
@@ -58,28 +184,15 @@ document.addEventListener('DOMContentLoaded', function () {
         const ctx = $('#historyTrendChart');
         if (!ctx) return;
 
-        // Regroupement des données par jour
-        const dailyEmissions = {};
-        activitiesData.forEach(activity => {
-            const date = new Date(activity.date);
-            const dateKey = date.toISOString().split('T')[0]; // Format YYYY-MM-DD
-
-            if (!dailyEmissions[dateKey]) {
-                dailyEmissions[dateKey] = 0;
-            }
-            dailyEmissions[dateKey] += parseFloat(activity.emissions);
-        });
-
-        // Préparation des données pour Chart.js
-        const sortedDates = Object.keys(dailyEmissions).sort();
-        const labels = sortedDates.map(dateStr => {
-            const date = new Date(dateStr);
+        // Série journalière calculée côté serveur
+        const labels = historySummary.by_day.map(day => {
+            const date = new Date(day.date);
             return date.toLocaleDateString('fr-FR', {
                 day: 'numeric',
                 month: 'short'
             });
         });
-        const data = sortedDates.map(dateStr => dailyEmissions[dateStr]);
+        const data = historySummary.by_day.map(day => day.emissions);
 
         new Chart(ctx.getContext('2d'), {
             type: 'line',
@@ -162,15 +275,8 @@ document.addEventListener('DOMContentLoaded', function () {
             'consumption': { label: 'Consommation', color: '#A855F7' }
         };
 
-        // Regroupement des émissions par catégorie
-        const categoryEmissions = {};
-        activitiesData.forEach(activity => {
-            const category = activity.category;
-            if (!categoryEmissions[category]) {
-                categoryEmissions[category] = 0;
-            }
-            categoryEmissions[category] += parseFloat(activity.emissions);
-        });
+        // Répartition par catégorie calculée côté serveur
+        const categoryEmissions = historySummary.by_category;
 
         // Préparation des données pour Chart.js
         const categories = Object.keys(categoryEmissions);
@@ -7,6 +7,12 @@ from .views import (
     LoginView,
     LogoutView,
     DashboardView,
+    DailyFootprintApiView,
+    TrendApiView,
+    MonthlySummaryApiView,
+    RangeApiView,
+    RecommendationsApiView,
+    PanelsApiView,
 )
 
 auth.add_url_rule(
@@ -24,4 +30,28 @@ auth.add_url_rule(
 auth.add_url_rule(
     "/dashboard/",
     view_func=DashboardView.as_view("dashboard"),
-)
\ No newline at end of file
+)
+auth.add_url_rule(
+    "/api/footprint/daily/",
+    view_func=DailyFootprintApiView.as_view("api_daily_footprint"),
+)
+auth.add_url_rule(
+    "/api/footprint/trend/",
+    view_func=TrendApiView.as_view("api_trend"),
+)
+auth.add_url_rule(
+    "/api/footprint/monthly/",
+    view_func=MonthlySummaryApiView.as_view("api_monthly_summary"),
+)
+auth.add_url_rule(
+    "/api/footprint/range/",
+    view_func=RangeApiView.as_view("api_range"),
+)
+auth.add_url_rule(
+    "/api/footprint/recommendations/",
+    view_func=RecommendationsApiView.as_view("api_recommendations"),
+)
+auth.add_url_rule(
+    "/api/footprint/panels/",
+    view_func=PanelsApiView.as_view("api_panels"),
+)
@@ -3,7 +3,8 @@ from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from configs.settings import db
-from carbon.models import EmissionFactor
+from controllers.ledger import ActivityLedger
+from controllers.stats import PlatformStatistics
 
 
 class User(db.Model, UserMixin):
@@ -31,24 +32,22 @@ class User(db.Model, UserMixin):
         return check_password_hash(self.password, password2)
         
     def get_total_emissions(self):
-        """Calcule les émissions totales de l'utilisateur à ce jour"""
-        total = 0
-        for activity in self.activities:
-            factor = EmissionFactor.query.get(activity.emission_factor_id)
-            total += activity.quantity * factor.co2_factor
-            
-        return total
+        """Retourne les émissions totales de l'utilisateur à ce jour (totaux cumulés)"""
+        co2_total, _ = ActivityLedger(self.id).totals()
+        return co2_total
+
+    def get_activity_count(self):
+        """Retourne le nombre d'activités enregistrées par l'utilisateur"""
+        _, activity_count = ActivityLedger(self.id).totals()
+        return activity_count
     
     @classmethod
     def get_all_users_total_emissions(cls, with_unit=True):
         """
         Retourne les émissions totales de tous les utilisateurs, formatées (ex: 1.2 ktCO2, 950 tCO2, 500 kgCO2).
-        Cette méthode calcule pour tous les utilisateurs, indépendamment de la connexion.
+        Le total provient des compteurs globaux de la plateforme (lecture en cache).
         """
-        total = 0
-        for user in cls.query.all():
-            total += user.get_total_emissions()
-        total = round(total, 2)
+        total = round(PlatformStatistics.get().total_emissions, 2)
         if with_unit:
             if total >= 1_000_000:
                 return f"{round(total/1_000_000, 2)} MtCO2"
@@ -63,7 +62,7 @@ class User(db.Model, UserMixin):
     @classmethod
     def get_total_users(cls, formatted=False):
         """Retourne le nombre total d'utilisateurs, formaté si demandé (ex: 1, 10, 1K+, 10K+)"""
-        count = cls.query.count()
+        count = PlatformStatistics.get().total_users
         if formatted:
             if count >= 10_000:
                 return f"{count // 1000}K+"
@@ -1,5 +1,4 @@
-import json
-from datetime import datetime
+from datetime import MAXYEAR, MINYEAR, date, datetime
 
 from flask import (
     render_template, 
@@ -7,7 +6,8 @@ from flask import (
     redirect, 
     url_for, 
     flash,
-    request
+    request,
+    jsonify
 )
 from flask.views import MethodView
 from flask_login import (
@@ -17,10 +17,13 @@ from flask_login import (
     current_user
 )
 
+from configs.conditional import conditional_on_user_data
 from configs.errors import get_form_errors
 from controllers.calculator import CarbonCalculator
+from controllers.ledger import ActivityLedger
 from controllers.recommendation import RecommendationEngine
-from carbon.models import EmissionFactor, Activity
+from controllers.snapshot import DashboardSnapshot
+from controllers.stats import PlatformStatistics
 
 from .forms import (
     RegistrationForm, 
@@ -74,6 +77,10 @@ class RegisterView(MethodView):
                 password=password
             )
             db.session.add(new_user)
+            db.session.flush()
+            # Totaux et version des données, lus dès la première page
+            ActivityLedger(new_user.id).init_totals()
+            PlatformStatistics.apply(users=1)
             db.session.commit()
             
             flash("Inscription réussie ! Vous pouvez maintenant vous connecter.", "success")
@@ -161,7 +168,11 @@ class DashboardView(MethodView):
     y compris les données des émissions de carbone.
     """
     template_name = "auth/dashboard.html"
-    decorators = [login_required]
+    # 304 sans calcul si les données de l'utilisateur n'ont pas changé
+    decorators = [conditional_on_user_data, login_required]
+
+    # Fenêtres proposées pour le graphique de tendance (en jours)
+    TREND_WINDOWS = (7, 30, 90)
 
     def get(self):
         user = current_user
@@ -171,95 +182,140 @@ class DashboardView(MethodView):
             flash("Vous devez être connecté pour accéder au tableau de bord.", "warning")
             return redirect(url_for("auth.login"))
         
-        # Créer les calculateurs 
-        calculator = CarbonCalculator(user_id)
-        recommendation_engine = RecommendationEngine(user_id)
+        # Fenêtre de la tendance demandée (7 jours par défaut)
+        trend_days = request.args.get("days", 7, type=int)
+        if trend_days not in self.TREND_WINDOWS:
+            trend_days = 7
 
-        # Obtenir les données avec la gestion des erreurs
-        today = datetime.now().date()
+        # Les panneaux (empreinte du jour, tendance, résumé mensuel,
+        # recommandations) sont chargés ensuite par dashboard.js depuis
+        # l'API JSON : la page n'attend aucun calcul
+        ctx = {
+            "title": "Tableau de bord",
+            "user": current_user,
+            "trend_days": trend_days,
+            "trend_windows": self.TREND_WINDOWS,
+        }
+        return render_template(self.template_name, **ctx)
 
-        try:
-            # Essayer de calculer l'empreinte quotidienne
-            daily_footprint = calculator.calculate_daily_footprint(today)
-
-        except Exception as e:
-            # En cas d'erreur, utiliser des valeurs par défaut
-            daily_footprint = {
-                'total': 0,
-                'by_category': {
-                    'transport': 0,
-                    'food': 0,
-                    'energy': 0,
-                    'consumption': 0
-                }
-            }
-        
-        try:
-            # Essayer de calculer la tendance hebdomadaire
-            weekly_trend = calculator.calculate_weekly_trend()
-            weekly_trend_json = json.dumps(weekly_trend)
 
-        except Exception as e:
-            # En cas d'erreur, utiliser des valeurs par défaut
-            weekly_trend = []
-            weekly_trend_json = "[]"
+class FootprintApiView(MethodView):
+    """
+    Base des données d'empreinte servies en JSON.
+    Chaque réponse porte l'ETag des données de l'utilisateur : le
+    navigateur ne recharge que ce qui a changé. dashboard.js lit tous
+    ses panneaux en une requête (PanelsApiView) ; les autres vues servent
+    un panneau à la fois, avec ses paramètres.
+    """
+    decorators = [conditional_on_user_data(flashes=False), login_required]
+
 
+class DailyFootprintApiView(FootprintApiView):
+    def get(self):
+        """Empreinte d'un jour (?date=AAAA-MM-JJ, aujourd'hui par défaut)"""
+        day = request.args.get("date", "").strip()
         try:
-            # Essayer de calculer le résumé mensuel
-            monthly_summary = calculator.calculate_monthly_summary()
-            monthly_summary_json = json.dumps(monthly_summary)
-        except Exception as e:
-            # En cas d'erreur, utiliser des valeurs par défaut
-            monthly_summary = []
-            monthly_summary_json = "[]" 
+            day = date.fromisoformat(day) if day else datetime.now().date()
+        except ValueError:
+            return jsonify({"error": "Date invalide."}), 400
+
+        footprint = CarbonCalculator(current_user.id).calculate_daily_footprint(day)
+        return jsonify({
+            "date": day.isoformat(),
+            "total": round(footprint["total"], 2),
+            "by_category": footprint["by_category"],
+        })
+
+
+class TrendApiView(FootprintApiView):
+    # Fenêtre maximale de la tendance (en jours)
+    MAX_DAYS = 366
+
+    def get(self):
+        """Tendance quotidienne sur les derniers jours (?days=, 7 par défaut)"""
+        days = request.args.get("days", 7, type=int)
+        if not 1 <= days <= self.MAX_DAYS:
+            return jsonify({"error": f"La fenêtre doit compter entre 1 et {self.MAX_DAYS} jours."}), 400
+
+        return jsonify({
+            "days": days,
+            "trend": CarbonCalculator(current_user.id).calculate_trend(days=days),
+        })
+
+
+class MonthlySummaryApiView(FootprintApiView):
+    def get(self):
+        """Résumé d'un mois (?month=&year=, mois en cours par défaut)"""
+        today = datetime.now().date()
+        month = request.args.get("month", today.month, type=int)
+        year = request.args.get("year", today.year, type=int)
+        if not 1 <= month <= 12 or not MINYEAR <= year <= MAXYEAR:
+            return jsonify({"error": "Mois invalide."}), 400
+
+        summary = CarbonCalculator(current_user.id).calculate_monthly_summary(month=month, year=year)
+        return jsonify({"month": month, "year": year, **summary})
+
+
+class RangeApiView(FootprintApiView):
+    # Étendue maximale de la plage (en jours, environ 10 ans)
+    MAX_DAYS = 3660
+
+    def get(self):
+        """
+        Émissions d'une plage par période (?start=&end=&granularity=)
         
+        Par défaut : du 1er janvier de l'année précédente à aujourd'hui, par mois.
+        """
+        today = datetime.now().date()
         try:
-            # Essayer d'obtenir les recommandations
-            recommendations = recommendation_engine.get_personalized_recommendations()
+            start = request.args.get("start", "").strip()
+            start = date.fromisoformat(start) if start else date(today.year - 1, 1, 1)
+            end = request.args.get("end", "").strip()
+            end = date.fromisoformat(end) if end else today
+        except ValueError:
+            return jsonify({"error": "Date invalide."}), 400
 
-        except Exception as e:
-            # En cas d'erreur, utiliser des valeurs par défaut
-            recommendations = []
-    
-        # Convertir les données pour JavaScript
-        try:
-            categories_json = json.dumps(daily_footprint['by_category'])
-        
-        except Exception as e:
-            # En cas d'erreur, utiliser une chaîne vide
-            categories_json = "{}"
-
-        # Récupérer les 3 dernières activités de l'utilisateur
-        activities = Activity.query.filter_by(user_id=user.id).order_by(Activity.date.desc()).limit(3).all()
-
-        # Préparer les données pour l'affichage
-        activities_data = []
-
-        for activity in activities:
-            emission_factor = EmissionFactor.query.get(activity.emission_factor_id)
-            activities_data.append({
-                'id': activity.id,
-                'date': activity.date,
-                'category': emission_factor.category,
-                'name': emission_factor.activity_name,
-                'quantity': activity.quantity,
-                'unit': emission_factor.unit,
-                'emissions': round(activity.quantity * emission_factor.co2_factor, 2)
-            })
+        granularity = request.args.get("granularity", "month")
+        if granularity not in CarbonCalculator.GRANULARITIES:
+            return jsonify({"error": "Granularité invalide."}), 400
+        if not 0 <= (end - start).days < self.MAX_DAYS:
+            return jsonify({"error": f"La plage doit compter entre 1 et {self.MAX_DAYS} jours."}), 400
 
-        ctx = {
-            "title": "Tableau de bord",
-            "user": current_user,
-            "total_emissions": current_user.get_total_emissions(),
-            "daily_total": round(daily_footprint.get("total", 0), 2),
-            "daily_by_category": daily_footprint.get("by_category", {}),
-            "daily_footprint": daily_footprint,
+        return jsonify(CarbonCalculator(current_user.id).calculate_range(start, end, granularity))
 
-            "weekly_trend": weekly_trend_json,
-            "categories_data": categories_json,
-            "monthly_summary": monthly_summary_json,
 
-            "recommendations": recommendations,
-            "activities": activities_data,
-        }
-        return render_template(self.template_name, **ctx)
\ No newline at end of file
+class RecommendationsApiView(FootprintApiView):
+    def get(self):
+        """Recommandations personnalisées sur les 30 derniers jours"""
+        engine = RecommendationEngine(current_user.id)
+        return jsonify({"recommendations": engine.get_personalized_recommendations()})
+
+
+class PanelsApiView(FootprintApiView):
+    def get(self):
+        """
+        Tous les panneaux du tableau de bord (?days= pour la tendance, 7 par défaut)
+
+        Empreinte du jour, tendance, résumé du mois en cours et
+        recommandations sont dérivés d'un seul instantané (une requête).
+        """
+        days = request.args.get("days", 7, type=int)
+        if not 1 <= days <= TrendApiView.MAX_DAYS:
+            return jsonify({"error": f"La fenêtre doit compter entre 1 et {TrendApiView.MAX_DAYS} jours."}), 400
+
+        snapshot = DashboardSnapshot.load(current_user.id, trend_days=days)
+        daily = snapshot.daily_footprint()
+        return jsonify({
+            "daily": {
+                "date": snapshot.today.isoformat(),
+                "total": round(daily["total"], 2),
+                "by_category": daily["by_category"],
+            },
+            "trend": {"days": days, "trend": snapshot.trend()},
+            "monthly": {
+                "month": snapshot.today.month,
+                "year": snapshot.today.year,
+                **snapshot.monthly_summary(),
+            },
+            "recommendations": snapshot.recommendations(),
+        })
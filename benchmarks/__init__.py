@@ -0,0 +1,3 @@
+"""
+Benchmarks et outils de mesure des performances d'EcoTrace.
+"""
@@ -0,0 +1,109 @@
+"""
+Benchmark du calcul groupé (NumPy) comparé à une boucle par utilisateur.
+
+Sur une population synthétique, calcule pour tous les utilisateurs le
+résumé du mois en cours et la série mensuelle des douze derniers mois :
+une fois avec BatchCarbonCalculator, une fois avec CarbonCalculator
+appelé pour chaque utilisateur. La boucle est mesurée sur un échantillon
+d'utilisateurs (--sample) puis extrapolée à toute la population ; les
+résultats de l'échantillon sont comparés à ceux du calcul groupé.
+
+Usage :
+    python -m benchmarks.batch --users 100000 --activities 20 --sample 2000
+"""
+import argparse
+from datetime import date, datetime
+import json
+from pathlib import Path
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.population import create_bench_app, populate  # noqa: E402
+
+
+def cases(today):
+    """
+    Cas mesurés
+
+    Returns:
+        list: Triplets (nom, arguments de BatchCarbonCalculator, appel de CarbonCalculator)
+    """
+    month_start = today.replace(day=1)
+    year_start = date(today.year - 1, today.month, 1)
+    return [
+        (
+            "monthly_summary",
+            (month_start, today, "month"),
+            lambda calculator: calculator.calculate_range(month_start, today, "month"),
+        ),
+        (
+            "twelve_months",
+            (year_start, today, "month"),
+            lambda calculator: calculator.calculate_range(year_start, today, "month"),
+        ),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--activities", type=int, default=50, help="Activités par utilisateur.")
+    parser.add_argument("--days", type=int, default=365, help="Profondeur de l'historique en jours.")
+    parser.add_argument("--sample", type=int, default=1000, help="Utilisateurs calculés par la boucle.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Fichier JSON du rapport.")
+    args = parser.parse_args()
+
+    database = Path(tempfile.mkdtemp(prefix="ecotrace-batch-")) / "batch.sqlite3"
+    app = create_bench_app(database)
+    today = datetime.now().date()
+    report = {"users": args.users, "activities": args.users * args.activities, "results": {}}
+
+    with app.app_context():
+        from auth.models import User
+        from controllers.batch_calculator import BatchCarbonCalculator
+        from controllers.calculator import CarbonCalculator
+
+        started = time.perf_counter()
+        populate(args.users, args.activities, seed=args.seed, days=args.days, today=today)
+        print(f"Population : {args.users * args.activities} activités en {time.perf_counter() - started:.1f} s.")
+
+        user_ids = [user_id for (user_id,) in User.query.with_entities(User.id).order_by(User.id)]
+        sample = sorted(random.Random(args.seed).sample(user_ids, min(args.sample, len(user_ids))))
+
+        for name, batch_args, single in cases(today):
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                batch = BatchCarbonCalculator(*batch_args).run()
+                timings.append((time.perf_counter() - started) * 1000)
+            batch_ms = sorted(timings)[len(timings) // 2]
+
+            started = time.perf_counter()
+            expected = {user_id: single(CarbonCalculator(user_id)) for user_id in sample}
+            loop_ms = (time.perf_counter() - started) * 1000 * len(user_ids) / len(sample)
+
+            mismatches = [user_id for user_id in sample if batch.user_range(user_id) != expected[user_id]]
+            report["results"][name] = {
+                "batch_ms": round(batch_ms, 1),
+                "loop_ms_estimated": round(loop_ms, 1),
+                "speedup": round(loop_ms / batch_ms, 1),
+                "checked_users": len(sample),
+                "mismatches": len(mismatches),
+            }
+            print(
+                f"{name:<16} groupé {batch_ms:9.1f} ms  boucle ~{loop_ms:10.1f} ms  "
+                f"(x{loop_ms / batch_ms:.1f}), {len(mismatches)} écart(s) sur {len(sample)} utilisateurs"
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Benchmark de contention lecture/écriture SQLite.
+
+Pour chaque profil de moteur (journal par défaut, WAL réglé, WAL avec
+moteur de lecture séparé), une population identique est générée puis
+des lecteurs (tableau de bord, historique) et des écrivains (ajouts
+d'activités) tournent en parallèle, chacun dans son processus comme
+les workers gunicorn. Le rapport compare la latence des lectures, le
+débit des écritures et le nombre d'erreurs « database is locked ».
+
+Usage :
+    python -m benchmarks.contention --readers 8 --writers 4 --duration 10
+"""
+import argparse
+from datetime import date, timedelta
+import json
+import multiprocessing
+from pathlib import Path
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.population import PASSWORD, create_bench_app, email_for, populate  # noqa: E402
+
+PROFILES = {
+    "default": {"SQLITE_TUNING": False, "SQLITE_READ_ENGINE": False},
+    "wal": {"SQLITE_TUNING": True, "SQLITE_READ_ENGINE": False},
+    "wal_read_engine": {"SQLITE_TUNING": True, "SQLITE_READ_ENGINE": True},
+}
+
+# Tableau de bord (page et panneaux, comme dashboard.js), pages JSON, historique
+READ_URLS = (
+    "/auth/dashboard/",
+    "/auth/api/footprint/panels/?days=7",
+    "/auth/api/footprint/trend/?days=90",
+    "/auth/api/footprint/monthly/",
+    "/auth/api/footprint/range/",
+    "/auth/api/footprint/recommendations/",
+    "/history/",
+)
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def worker(role, index, database, config, factors, args, barrier, results, locked):
+    """
+    Processus lecteur ou écrivain, avec son application et son pool
+
+    Chaque processus publie ses durées (en secondes) et son nombre
+    d'écritures refusées dans la file results.
+    """
+    from sqlalchemy import event
+
+    from configs.database import get_engines
+
+    app = create_bench_app(database, **config)
+
+    def handle_error(context):
+        if "database is locked" in str(context.original_exception):
+            with locked.get_lock():
+                locked.value += 1
+
+    with app.app_context():
+        for engine in get_engines():
+            event.listen(engine, "handle_error", handle_error)
+
+    client = app.test_client()
+    response = client.post("/auth/login/", data={"email": email_for(index), "password": PASSWORD})
+    if response.status_code != 302:
+        raise RuntimeError(f"Connexion impossible pour {email_for(index)}.")
+
+    rng = random.Random(args.seed + index)
+    timings = []
+    failures = 0
+
+    barrier.wait()
+    deadline = time.perf_counter() + args.duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        if role == "reader":
+            client.get(READ_URLS[len(timings) % len(READ_URLS)])
+        else:
+            factor_id, category = rng.choice(factors)
+            response = client.post("/add_activity/", data={
+                "category": category,
+                "activity_id": factor_id,
+                "quantity": round(rng.uniform(0.5, 50), 2),
+                "date": (date.today() - timedelta(days=rng.randrange(30))).isoformat(),
+            })
+            # Une création réussie redirige ; le formulaire réaffiché signale un échec
+            if response.status_code != 302:
+                failures += 1
+        timings.append(time.perf_counter() - start)
+
+    results.put((role, timings, failures))
+
+
+def run_profile(name, config, args):
+    """
+    Mesure un profil sur une base neuve
+
+    Returns:
+        dict: Latences des lectures, débit des écritures, erreurs
+    """
+    from carbon.registry import get_factor_registry
+    from configs.database import get_engines
+
+    database = Path(tempfile.mkdtemp(prefix=f"ecotrace-contention-{name}-")) / "contention.sqlite3"
+    app = create_bench_app(database, **config)
+
+    with app.app_context():
+        populate(args.readers + args.writers, args.activities, seed=args.seed)
+        factors = [(entry.id, entry.category) for entry in get_factor_registry().by_id.values()]
+        for engine in get_engines():
+            engine.dispose()
+
+    roles = ["reader"] * args.readers + ["writer"] * args.writers
+    barrier = multiprocessing.Barrier(len(roles))
+    results = multiprocessing.Queue()
+    locked = multiprocessing.Value("i", 0)
+
+    processes = [
+        multiprocessing.Process(
+            target=worker,
+            args=(role, index, database, config, factors, args, barrier, results, locked)
+        )
+        for index, role in enumerate(roles, start=1)
+    ]
+    for process in processes:
+        process.start()
+
+    reads, writes, failed_writes = [], [], 0
+    for _ in processes:
+        role, timings, failures = results.get()
+        (reads if role == "reader" else writes).extend(timing * 1000 for timing in timings)
+        failed_writes += failures
+    for process in processes:
+        process.join()
+
+    reads.sort()
+    writes.sort()
+    return {
+        "reads": len(reads),
+        "reads_per_s": round(len(reads) / args.duration, 1),
+        "read_p50_ms": round(percentile(reads, 0.50), 2) if reads else None,
+        "read_p95_ms": round(percentile(reads, 0.95), 2) if reads else None,
+        "read_p99_ms": round(percentile(reads, 0.99), 2) if reads else None,
+        "writes": len(writes),
+        "writes_per_s": round(len(writes) / args.duration, 1),
+        "write_p50_ms": round(statistics.median(writes), 2) if writes else None,
+        "failed_writes": failed_writes,
+        "database_locked": locked.value,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8, help="Processus lecteurs.")
+    parser.add_argument("--writers", type=int, default=4, help="Processus écrivains.")
+    parser.add_argument("--duration", type=float, default=10, help="Durée par profil en secondes.")
+    parser.add_argument("--activities", type=int, default=1000, help="Activités initiales par utilisateur.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--profiles", nargs="*", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--output", default=None, help="Fichier JSON du rapport.")
+    args = parser.parse_args()
+
+    report = {}
+    for name in args.profiles:
+        report[name] = result = run_profile(name, PROFILES[name], args)
+        print(
+            f"{name:<16} lectures {result['reads_per_s']:7.1f}/s "
+            f"p50 {result['read_p50_ms']} ms p95 {result['read_p95_ms']} ms p99 {result['read_p99_ms']} ms | "
+            f"écritures {result['writes_per_s']:6.1f}/s ({result['failed_writes']} échec(s)) | "
+            f"{result['database_locked']} « database is locked »"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
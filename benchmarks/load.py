@@ -0,0 +1,332 @@
+"""
+Test de charge HTTP en local.
+
+Démarre l'application sur un serveur local (processus séparé), connecte
+plusieurs utilisateurs synthétiques en parallèle puis rejoue un mélange
+de consultations du tableau de bord, de navigation dans l'historique,
+d'ajouts et de suppressions d'activités. Le rapport donne le débit, les
+latences p50/p95/p99 par action et le nombre d'erreurs SQLite
+« database is locked » rencontrées par le serveur.
+
+Usage :
+    python -m benchmarks.load --users 16 --duration 30
+    python -m benchmarks.load --users 16 --processes 4 --mix dashboard=50,add=50
+"""
+import argparse
+from collections import Counter
+from datetime import date, timedelta
+from http.cookiejar import CookieJar
+import json
+import multiprocessing
+from pathlib import Path
+import random
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+import urllib.request
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.population import PASSWORD, create_bench_app, email_for, populate  # noqa: E402
+
+DEFAULT_MIX = "dashboard=40,history=30,add=20,delete=10"
+
+# Panneaux chargés par dashboard.js après la page (une requête)
+DASHBOARD_PANELS = (
+    "/auth/api/footprint/panels/?days=7",
+)
+
+CSRF_TOKEN = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+
+def serve(database, ready, locked, processes):
+    """
+    Processus serveur : application de benchmark sur un port libre
+
+    Args:
+        database: Fichier SQLite de la population
+        ready: File où publier le port d'écoute
+        locked: Compteur partagé des erreurs « database is locked »
+        processes: Nombre de processus (1 : un seul processus multi-thread)
+    """
+    from sqlalchemy import event
+    from werkzeug.serving import make_server
+
+    from configs.settings import db
+
+    app = create_bench_app(database)
+
+    def handle_error(context):
+        if "database is locked" in str(context.original_exception):
+            with locked.get_lock():
+                locked.value += 1
+
+    with app.app_context():
+        event.listen(db.engine, "handle_error", handle_error)
+
+    server = make_server(
+        "127.0.0.1",
+        0,
+        app,
+        threaded=processes == 1,
+        processes=processes
+    )
+    ready.put(server.server_port)
+    server.serve_forever()
+
+
+class _KeepAllResponses(urllib.request.HTTPErrorProcessor):
+    """Retourne les redirections et les erreurs telles quelles"""
+
+    def http_response(self, request, response):
+        return response
+
+    https_response = http_response
+
+
+class VirtualUser:
+    """Utilisateur synthétique avec sa propre session (cookies)"""
+
+    def __init__(self, base_url, email, factors, rng):
+        self.base_url = base_url
+        self.email = email
+        self.factors = factors
+        self.rng = rng
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(CookieJar()),
+            _KeepAllResponses()
+        )
+
+    def request(self, path, data=None):
+        """
+        Envoie une requête et lit la réponse
+
+        Returns:
+            tuple: (statut, corps)
+        """
+        body = urlencode(data).encode() if data is not None else None
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=body,
+            headers={"Referer": self.base_url + "/history/"}
+        )
+        with self.opener.open(request, timeout=60) as response:
+            return response.status, response.read()
+
+    def login(self):
+        _, page = self.request("/auth/login/")
+        data = {"email": self.email, "password": PASSWORD}
+        match = CSRF_TOKEN.search(page.decode("utf-8", "replace"))
+        if match:
+            data["csrf_token"] = match.group(1)
+        status, _ = self.request("/auth/login/", data)
+        if status != 302:
+            raise RuntimeError(f"Connexion impossible pour {self.email} (statut {status}).")
+
+    def dashboard(self):
+        # Comme un navigateur : la page, puis ses panneaux
+        results = [("dashboard", *self._timed("/auth/dashboard/"))]
+        for panel in DASHBOARD_PANELS:
+            results.append(("dashboard_panel", *self._timed(panel)))
+        return results
+
+    def history(self):
+        return [("history", *self._timed("/history/"))]
+
+    def add(self):
+        factor_id, category = self.rng.choice(self.factors)
+        data = {
+            "category": category,
+            "activity_id": factor_id,
+            "quantity": round(self.rng.uniform(0.5, 50), 2),
+            "date": (date.today() - timedelta(days=self.rng.randrange(30))).isoformat(),
+        }
+        status, elapsed, _ = self._timed("/add_activity/", data)
+        # Une création réussie redirige ; le formulaire réaffiché signale un échec
+        return [("add", status if status == 302 else 500, elapsed, None)]
+
+    def delete(self):
+        results = [("history_data", *self._timed("/history/data/?limit=20"))]
+        _, status, _, body = results[0]
+        if status != 200:
+            return results
+
+        activities = json.loads(body)["activities"]
+        if activities:
+            activity = self.rng.choice(activities)
+            status, elapsed, _ = self._timed(activity["delete_url"], {})
+            results.append(("delete", status, elapsed, None))
+        return results
+
+    def _timed(self, path, data=None):
+        start = time.perf_counter()
+        try:
+            status, body = self.request(path, data)
+        except OSError:
+            status, body = 599, None
+        return status, time.perf_counter() - start, body
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def parse_mix(mix):
+    """dashboard=40,add=20 -> {'dashboard': 40.0, 'add': 20.0}"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("dashboard", "history", "add", "delete"):
+            raise SystemExit(f"Action inconnue : {name}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def run(args):
+    database = args.database or str(Path(tempfile.mkdtemp(prefix="ecotrace-load-")) / "load.sqlite3")
+
+    app = create_bench_app(database)
+    with app.app_context():
+        from carbon.registry import get_factor_registry
+        from configs.settings import db
+
+        populate(args.users, args.activities, seed=args.seed)
+        factors = [(entry.id, entry.category) for entry in get_factor_registry().by_id.values()]
+        db.engine.dispose()
+
+    ready = multiprocessing.Queue()
+    locked = multiprocessing.Value("i", 0)
+    server = multiprocessing.Process(
+        target=serve,
+        args=(database, ready, locked, args.processes),
+        daemon=True
+    )
+    server.start()
+    base_url = f"http://127.0.0.1:{ready.get(timeout=60)}"
+
+    weights = parse_mix(args.mix)
+    actions, action_weights = list(weights), list(weights.values())
+    samples = []
+    samples_lock = threading.Lock()
+    failures = []
+    deadline = []
+
+    def start_load():
+        # Exécuté une seule fois, quand tous les utilisateurs sont connectés
+        deadline.append(time.perf_counter() + args.duration)
+
+    barrier = threading.Barrier(args.users, action=start_load)
+
+    def virtual_user(index):
+        rng = random.Random(args.seed + index)
+        user = VirtualUser(base_url, email_for(index), factors, rng)
+        try:
+            user.login()
+        except Exception as e:
+            failures.append(str(e))
+        barrier.wait()
+
+        local_samples = []
+        while time.perf_counter() < deadline[0]:
+            action = rng.choices(actions, action_weights)[0]
+            local_samples.extend(getattr(user, action)())
+        with samples_lock:
+            samples.extend(local_samples)
+
+    threads = [
+        threading.Thread(target=virtual_user, args=(index,))
+        for index in range(1, args.users + 1)
+    ]
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - (deadline[0] - args.duration)
+
+    server.terminate()
+    server.join()
+
+    return build_report(args, samples, elapsed, locked.value, failures)
+
+
+def build_report(args, samples, elapsed, locked_errors, failures):
+    by_action = {}
+    for action, status, duration, _ in samples:
+        by_action.setdefault(action, []).append((status, duration))
+
+    actions = {}
+    for action, values in sorted(by_action.items()):
+        durations = sorted(duration * 1000 for _, duration in values)
+        statuses = Counter(status for status, _ in values)
+        actions[action] = {
+            "requests": len(values),
+            "errors": sum(count for status, count in statuses.items() if status >= 500),
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+            "p50_ms": round(percentile(durations, 0.50), 2),
+            "p95_ms": round(percentile(durations, 0.95), 2),
+            "p99_ms": round(percentile(durations, 0.99), 2),
+            "mean_ms": round(statistics.mean(durations), 2),
+        }
+
+    total = len(samples)
+    return {
+        "config": {
+            "users": args.users,
+            "processes": args.processes,
+            "duration_s": args.duration,
+            "mix": args.mix,
+            "activities_per_user": args.activities,
+            "seed": args.seed,
+        },
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0,
+        "errors": sum(action["errors"] for action in actions.values()),
+        "database_locked": locked_errors,
+        "login_failures": failures,
+        "actions": actions,
+    }
+
+
+def print_report(report):
+    print(
+        f"{report['requests']} requêtes en {report['elapsed_s']} s, "
+        f"{report['throughput_rps']} req/s, {report['errors']} erreur(s), "
+        f"{report['database_locked']} « database is locked »"
+    )
+    print(f"{'action':<14}{'requêtes':>10}{'erreurs':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for action, stats in report["actions"].items():
+        print(
+            f"{action:<14}{stats['requests']:>10}{stats['errors']:>9}"
+            f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+        )
+    for failure in report["login_failures"]:
+        print(failure)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=8, help="Utilisateurs simultanés.")
+    parser.add_argument("--duration", type=float, default=20, help="Durée de la charge en secondes.")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Poids des actions.")
+    parser.add_argument("--processes", type=int, default=1, help="Processus serveur (1 : multi-thread).")
+    parser.add_argument("--activities", type=int, default=500, help="Activités initiales par utilisateur.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database", default=None, help="Fichier SQLite (temporaire par défaut).")
+    parser.add_argument("--output", default=None, help="Fichier JSON du rapport.")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
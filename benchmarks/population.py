@@ -0,0 +1,185 @@
+"""
+Générateur de population synthétique.
+
+Crée N utilisateurs et M activités par utilisateur dans une base SQLite,
+à partir des facteurs d'émission ADEME par défaut. Le tirage est
+entièrement déterminé par la graine : deux lancements avec les mêmes
+paramètres produisent la même base.
+
+Usage :
+    python -m benchmarks.population --users 100 --activities 1000 --database /tmp/ecotrace-bench.sqlite3
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import random
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from configs.settings import create_app, db  # noqa: E402
+
+PASSWORD = "benchmark"
+
+# Répartition des activités saisies par catégorie
+CATEGORY_WEIGHTS = {
+    "transport": 0.40,
+    "food": 0.35,
+    "energy": 0.15,
+    "consumption": 0.10,
+}
+
+# Quantité typique d'une saisie selon l'unité : (minimum, mode, maximum)
+QUANTITY_RANGES = {
+    "km": (1, 12, 800),
+    "kg": (0.1, 0.4, 3),
+    "L": (0.2, 1, 60),
+    "kWh": (1, 8, 40),
+    "unité": (1, 1, 3),
+}
+
+BATCH_SIZE = 5000
+
+
+def email_for(index):
+    """Adresse de l'utilisateur synthétique numéro index"""
+    return f"user{index}@bench.ecotrace.fr"
+
+
+def create_bench_app(database, **config):
+    """Application configurée sur la base de benchmark"""
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{Path(database).resolve()}",
+        "WTF_CSRF_ENABLED": False,
+        **config,
+    })
+
+
+def iter_activities(rng, user_ids, activities, factors, days, today):
+    """
+    Tire les activités de chaque utilisateur
+
+    Yields:
+        dict: Ligne de la table activities
+    """
+    by_category = {}
+    for factor in factors:
+        by_category.setdefault(factor.category, []).append(factor)
+
+    categories = [category for category in CATEGORY_WEIGHTS if category in by_category]
+    weights = [CATEGORY_WEIGHTS[category] for category in categories]
+    created_at = datetime.now(timezone.utc)
+
+    for user_id in user_ids:
+        for category in rng.choices(categories, weights, k=activities):
+            factor = rng.choice(by_category[category])
+            low, mode, high = QUANTITY_RANGES.get(factor.unit, (1, 1, 10))
+            quantity = round(rng.triangular(low, high, mode), 2)
+            yield {
+                "user_id": user_id,
+                "emission_factor_id": factor.id,
+                "quantity": quantity,
+                "date": today - timedelta(days=rng.randrange(days)),
+                "created_at": created_at,
+                "co2_emissions": quantity * factor.co2_factor,
+                "category": factor.category,
+            }
+
+
+def populate(users, activities, seed=42, days=365, today=None):
+    """
+    Remplit la base de l'application courante
+
+    Args:
+        users: Nombre d'utilisateurs
+        activities: Nombre d'activités par utilisateur
+        seed: Graine du générateur aléatoire
+        days: Profondeur de l'historique en jours
+        today: Date la plus récente (aujourd'hui par défaut)
+
+    Returns:
+        dict: Paramètres et volumes générés
+    """
+    from auth.models import User
+    from carbon.models import Activity
+    from carbon.registry import get_factor_registry
+    from configs.bootstrap import init_db
+    from controllers.ledger import ActivityLedger
+    from controllers.stats import PlatformStatistics
+
+    rng = random.Random(seed)
+    today = today or datetime.now().date()
+
+    db.drop_all()
+    init_db()
+
+    password = generate_password_hash(PASSWORD)
+    created_at = datetime.now(timezone.utc)
+    db.session.execute(
+        User.__table__.insert(),
+        [
+            {
+                "name": f"Utilisateur {index}",
+                "email": email_for(index),
+                "password": password,
+                "is_admin": False,
+                "created_at": created_at,
+            }
+            for index in range(1, users + 1)
+        ]
+    )
+    db.session.commit()
+
+    user_ids = [user_id for (user_id,) in db.session.query(User.id).order_by(User.id)]
+    factors = sorted(get_factor_registry().by_id.values(), key=lambda factor: factor.id)
+
+    batch = []
+    for row in iter_activities(rng, user_ids, activities, factors, days, today):
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            db.session.execute(Activity.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Activity.__table__.insert(), batch)
+    db.session.commit()
+
+    # Agrégats et compteurs dérivés des activités (les totaux d'abord :
+    # avec PREFIX_INDEX, la reconstruction des agrégats marque l'index
+    # à jour sur les lignes de user_stats)
+    ActivityLedger.rebuild_user_totals()
+    ActivityLedger.rebuild()
+    PlatformStatistics.rebuild()
+
+    return {
+        "users": users,
+        "activities_per_user": activities,
+        "activities": users * activities,
+        "seed": seed,
+        "days": days,
+        "today": today.isoformat(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--activities", type=int, default=1000, help="Activités par utilisateur.")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database", required=True, help="Fichier SQLite à (re)créer.")
+    args = parser.parse_args()
+
+    app = create_bench_app(args.database)
+    with app.app_context():
+        summary = populate(args.users, args.activities, seed=args.seed, days=args.days)
+
+    print(
+        f"{summary['users']} utilisateurs, {summary['activities']} activités "
+        f"générés dans {args.database}."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark de l'index des sommes cumulées (PREFIX_INDEX).
+
+Sur une population identique, compare la lecture par agrégation des
+agrégats journaliers (index désactivé) et la lecture dans l'index :
+résumé mensuel, tendances, total d'une plage d'un an, totaux depuis
+l'inscription. Mesure aussi le surcoût d'une écriture antidatée
+(mise à jour de la fin de l'année dans l'index, sans validation).
+
+Usage :
+    python -m benchmarks.prefix_index --users 20 --activities 5000 --days 1095
+"""
+import argparse
+from datetime import datetime, timedelta
+import json
+from pathlib import Path
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.population import create_bench_app, email_for, populate  # noqa: E402
+from benchmarks.suite import measure  # noqa: E402
+
+
+def scan_range_totals(user_id, start_date, end_date):
+    """Total d'une plage par agrégation des agrégats journaliers (référence)"""
+    from sqlalchemy import func
+
+    from carbon.models import DailyEmission
+    from configs.database import read_session
+
+    query = read_session().query(
+        DailyEmission.category,
+        func.sum(DailyEmission.co2_total),
+        func.sum(DailyEmission.activity_count)
+    ).filter(DailyEmission.user_id == user_id)
+    if start_date is not None:
+        query = query.filter(DailyEmission.date >= start_date, DailyEmission.date <= end_date)
+    return query.group_by(DailyEmission.category).all()
+
+
+def cases(user_id, today, rng):
+    """
+    Cas mesurés, chacun en version agrégation et en version index
+
+    Returns:
+        list: Triplets (nom, fonction d'agrégation, fonction de l'index)
+    """
+    from configs.settings import db
+    from controllers.calculator import CarbonCalculator
+    from controllers.ledger import ActivityLedger
+    from controllers.prefix_index import PrefixSumIndex
+
+    year_ago = today - timedelta(days=364)
+
+    def calculator(method, **kwargs):
+        return lambda: getattr(CarbonCalculator(user_id), method)(**kwargs)
+
+    def backdated_write():
+        # Une activité antidatée, annulée : mesure le travail SQL sans fsync
+        day = today - timedelta(days=rng.randrange(365))
+        ActivityLedger(user_id).apply_many({(day, 'transport'): (12.5, 1)})
+        db.session.rollback()
+
+    return [
+        ("monthly_summary", calculator("calculate_monthly_summary"), calculator("calculate_monthly_summary")),
+        ("trend_7_days", calculator("calculate_trend", days=7), calculator("calculate_trend", days=7)),
+        ("trend_90_days", calculator("calculate_trend", days=90), calculator("calculate_trend", days=90)),
+        (
+            "range_365_days",
+            lambda: scan_range_totals(user_id, year_ago, today),
+            lambda: PrefixSumIndex(user_id).range_totals(year_ago, today),
+        ),
+        (
+            "lifetime_totals",
+            lambda: scan_range_totals(user_id, None, None),
+            lambda: PrefixSumIndex(user_id).lifetime_totals(),
+        ),
+        ("backdated_write", backdated_write, backdated_write),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--activities", type=int, default=5000, help="Activités par utilisateur.")
+    parser.add_argument("--days", type=int, default=1095, help="Profondeur de l'historique en jours.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--output", default=None, help="Fichier JSON du rapport.")
+    args = parser.parse_args()
+
+    database = Path(tempfile.mkdtemp(prefix="ecotrace-prefix-")) / "prefix.sqlite3"
+    scan_app = create_bench_app(database, PREFIX_INDEX=False)
+    index_app = create_bench_app(database, PREFIX_INDEX=True)
+
+    with index_app.app_context():
+        from auth.models import User
+        from carbon.models import EmissionPrefixSums
+        from configs.settings import db
+
+        populate(args.users, args.activities, seed=args.seed, days=args.days)
+        user_id = User.query.filter_by(email=email_for(1)).first().id
+        index_bytes = db.session.query(db.func.sum(db.func.length(EmissionPrefixSums.sums))).scalar()
+
+    print(f"Index : {index_bytes / 1024:.0f} Kio pour {args.users} utilisateur(s).")
+
+    today = datetime.now().date()
+    report = {"index_bytes": index_bytes, "results": {}}
+    for name, scan, index in cases(user_id, today, random.Random(args.seed)):
+        with scan_app.app_context():
+            scan_result = measure(scan, args.repeat, args.warmup)
+        with index_app.app_context():
+            index_result = measure(index, args.repeat, args.warmup)
+        report["results"][name] = {"scan": scan_result, "index": index_result}
+        print(
+            f"{name:<18} agrégation {scan_result['median_ms']:8.3f} ms  "
+            f"index {index_result['median_ms']:8.3f} ms  "
+            f"(x{scan_result['median_ms'] / index_result['median_ms']:.2f})"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Mesure du coût fixe par requête sur un point d'accès trivial.
+
+Compare l'initialisation actuelle (une seule fois par processus) au
+comportement historique, où chaque requête exécutait db.create_all()
+puis comptait les facteurs d'émission.
+
+Usage :
+    python benchmarks/request_overhead.py --requests 2000
+"""
+import argparse
+from pathlib import Path
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from configs.settings import create_app, db  # noqa: E402
+from carbon.models import EmissionFactor  # noqa: E402
+
+app = create_app()
+
+URL = "/static/favicon/favicon-96x96.png"
+
+legacy = False
+
+
+@app.before_request
+def legacy_create_all():
+    """Reproduit l'ancien hook exécuté à chaque requête"""
+    if legacy:
+        db.create_all()
+        EmissionFactor.query.count()
+
+
+def measure(client, requests):
+    """Temps de réponse (en millisecondes) de chaque requête"""
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(URL)
+        response.close()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def describe(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{label:<28} moyenne {statistics.mean(timings):.3f} ms  "
+        f"médiane {statistics.median(timings):.3f} ms  p95 {p95:.3f} ms"
+    )
+    return statistics.mean(timings)
+
+
+def main():
+    global legacy
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    args = parser.parse_args()
+
+    client = app.test_client()
+
+    # La première requête initialise la base
+    measure(client, args.warmup)
+
+    after = describe("initialisation unique", measure(client, args.requests))
+
+    legacy = True
+    measure(client, args.warmup)
+    before = describe("create_all à chaque requête", measure(client, args.requests))
+
+    print(f"Coût fixe supprimé : {before - after:.3f} ms par requête")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Mesure du temps de démarrage de l'application.
+
+Chaque lancement se fait dans un nouveau processus Python (démarrage à
+froid) et mesure quatre phases : import de configs.settings,
+create_app(), première requête (initialisation de la base comprise) et
+requête suivante. Le détail des imports (python -X importtime) indique
+les modules qui coûtent le plus cher.
+
+Usage :
+    python benchmarks/startup.py --runs 5 --top 15 --budget-ms 500
+"""
+import argparse
+import json
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+URL = "/static/favicon/favicon-96x96.png"
+
+PROBE = f"""
+import json, time
+start = time.perf_counter()
+from configs.settings import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+client = app.test_client()
+client.get({URL!r}).close()
+first = time.perf_counter()
+client.get({URL!r}).close()
+second = time.perf_counter()
+print(json.dumps({{
+    "import": (imported - start) * 1000,
+    "create_app": (created - imported) * 1000,
+    "first_request": (first - created) * 1000,
+    "next_request": (second - first) * 1000,
+}}))
+"""
+
+PHASES = ("import", "create_app", "first_request", "next_request")
+
+APP_PACKAGES = {"configs", "auth", "carbon", "controllers"}
+
+
+def cold_start():
+    """
+    Lance l'application dans un nouveau processus
+
+    Returns:
+        tuple: (durées des phases en ms, durées cumulées des imports par module en ms)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+
+    imports = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        # Dépendances directes et modules de l'application
+        if depth <= 1 or name.split(".")[0] in APP_PACKAGES:
+            imports[name] = imports.get(name, 0) + int(cumulative) / 1000
+
+    return phases, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=None,
+        help="Durée maximale import + create_app (code de sortie 1 si dépassée).",
+    )
+    args = parser.parse_args()
+
+    runs = [cold_start() for _ in range(max(args.runs, 1))]
+
+    print(f"Démarrage à froid, médiane sur {len(runs)} lancement(s) :")
+    medians = {}
+    for phase in PHASES:
+        medians[phase] = statistics.median(phases[phase] for phases, _ in runs)
+        print(f"  {phase:<15} {medians[phase]:8.1f} ms")
+
+    names = set().union(*(imports for _, imports in runs))
+    imports = {
+        name: statistics.median(run_imports.get(name, 0) for _, run_imports in runs)
+        for name in names
+    }
+    print("\nImports les plus coûteux (durée cumulée) :")
+    for name, duration in sorted(imports.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<40} {duration:8.1f} ms")
+
+    startup = medians["import"] + medians["create_app"]
+    if args.budget_ms is not None:
+        status = "respecté" if startup <= args.budget_ms else "DÉPASSÉ"
+        print(f"\nBudget de démarrage {args.budget_ms:.0f} ms : {startup:.1f} ms, {status}")
+        if startup > args.budget_ms:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
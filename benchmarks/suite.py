@@ -0,0 +1,216 @@
+"""
+Suite de benchmarks reproductibles.
+
+Génère une population synthétique (graine fixe), puis mesure les
+calculs du tableau de bord, les statistiques globales et le rendu
+complet des pages tableau de bord et historique via le client de test.
+Les résultats sont écrits en JSON pour être comparés d'un commit à
+l'autre.
+
+Usage :
+    python -m benchmarks.suite --users 50 --activities 2000 --repeat 30
+    python -m benchmarks.suite --compare benchmarks/results/abc1234.json
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+import json
+from pathlib import Path
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.population import PASSWORD, create_bench_app, email_for, populate  # noqa: E402
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = BASE_DIR / "benchmarks" / "results"
+
+
+def git_commit():
+    """Commit courant, ou None hors d'un dépôt git"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(func, repeat, warmup):
+    """
+    Exécute func plusieurs fois et résume les durées
+
+    Returns:
+        dict: Statistiques en millisecondes
+    """
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.mean(timings), 3),
+        "p95_ms": round(timings[max(int(len(timings) * 0.95) - 1, 0)], 3),
+        "max_ms": round(timings[-1], 3),
+    }
+
+
+def benchmarks(app, user_id):
+    """
+    Cas mesurés
+
+    Returns:
+        list: Couples (nom, fonction sans argument)
+    """
+    from auth.models import User
+    from controllers.calculator import CarbonCalculator
+    from controllers.recommendation import RecommendationEngine
+    from controllers.stats import PlatformStatistics
+
+    today = datetime.now().date()
+    year_ago = today - timedelta(days=365)
+    calculator = CarbonCalculator(user_id)
+    engine = RecommendationEngine(user_id)
+
+    client = app.test_client()
+    response = client.post(
+        "/auth/login/",
+        data={"email": email_for(1), "password": PASSWORD}
+    )
+    if response.status_code != 302:
+        raise RuntimeError("Connexion de l'utilisateur de benchmark impossible.")
+
+    def get(*urls):
+        # Plusieurs URL : une page suivie des requêtes de son script
+        def request():
+            for url in urls:
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url} : statut {response.status_code}")
+        return request
+
+    def all_users_total_emissions():
+        # Lecture sans le cache de processus
+        PlatformStatistics.invalidate()
+        User.get_all_users_total_emissions()
+
+    return [
+        ("calculate_daily_footprint", lambda: calculator.calculate_daily_footprint(today)),
+        ("calculate_weekly_trend", calculator.calculate_weekly_trend),
+        ("calculate_monthly_summary", calculator.calculate_monthly_summary),
+        ("calculate_range_year_by_month", lambda: calculator.calculate_range(year_ago, today, "month")),
+        ("calculate_range_year_by_day", lambda: calculator.calculate_range(year_ago, today, "day")),
+        ("get_personalized_recommendations", engine.get_personalized_recommendations),
+        ("get_all_users_total_emissions", all_users_total_emissions),
+        ("dashboard_view", get("/auth/dashboard/", "/auth/api/footprint/panels/")),
+        ("dashboard_view_90_days", get("/auth/dashboard/?days=90", "/auth/api/footprint/panels/?days=90")),
+        ("api_panels", get("/auth/api/footprint/panels/")),
+        ("api_daily_footprint", get("/auth/api/footprint/daily/")),
+        ("api_trend_90_days", get("/auth/api/footprint/trend/?days=90")),
+        ("api_monthly_summary", get("/auth/api/footprint/monthly/")),
+        ("api_range_year_by_month", get("/auth/api/footprint/range/")),
+        ("api_recommendations", get("/auth/api/footprint/recommendations/")),
+        ("history_view", get("/history/")),
+    ]
+
+
+def run(args):
+    database = args.database or str(Path(tempfile.mkdtemp(prefix="ecotrace-bench-")) / "bench.sqlite3")
+    app = create_bench_app(database)
+
+    with app.app_context():
+        from auth.models import User
+
+        start = time.perf_counter()
+        population = populate(args.users, args.activities, seed=args.seed, days=args.days)
+        population["generation_s"] = round(time.perf_counter() - start, 2)
+
+        user_id = User.query.filter_by(email=email_for(1)).first().id
+
+    results = {}
+    for name, func in benchmarks(app, user_id):
+        if args.only and name not in args.only:
+            continue
+        with app.app_context():
+            results[name] = measure(func, args.repeat, args.warmup)
+        print(
+            f"{name:<36} médiane {results[name]['median_ms']:9.3f} ms  "
+            f"p95 {results[name]['p95_ms']:9.3f} ms"
+        )
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "database": database,
+            "population": population,
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline_path):
+    """Affiche l'évolution des médianes par rapport à un rapport précédent"""
+    baseline = json.loads(Path(baseline_path).read_text())
+    print(f"\nComparaison avec {baseline['meta'].get('commit') or baseline_path} :")
+    for name, result in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            print(f"  {name:<36} (nouveau)")
+            continue
+        ratio = result["median_ms"] / previous["median_ms"] if previous["median_ms"] else float("inf")
+        print(
+            f"  {name:<36} {previous['median_ms']:9.3f} -> {result['median_ms']:9.3f} ms  "
+            f"(x{ratio:.2f})"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--activities", type=int, default=2000, help="Activités par utilisateur.")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--database", default=None, help="Fichier SQLite (temporaire par défaut).")
+    parser.add_argument("--only", nargs="*", help="Limiter aux cas nommés.")
+    parser.add_argument("--output", default=None, help="Fichier JSON des résultats.")
+    parser.add_argument("--compare", default=None, help="Rapport JSON de référence.")
+    args = parser.parse_args()
+
+    report = run(args)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{report['meta']['commit'] or 'latest'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+    print(f"\nRésultats écrits dans {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
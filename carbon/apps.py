@@ -6,6 +6,9 @@ from .views import (
     IndexView,
     AddActivityView,
     HistoryView,
+    HistoryDataView,
+    ExportActivitiesView,
+    ImportActivitiesView,
     DeleteActivityView
 )
 
@@ -21,6 +24,18 @@ carbon.add_url_rule(
     "/history/",
     view_func=HistoryView.as_view("history")
 )
+carbon.add_url_rule(
+    "/history/data/",
+    view_func=HistoryDataView.as_view("history_data")
+)
+carbon.add_url_rule(
+    "/history/export/",
+    view_func=ExportActivitiesView.as_view("export_activities")
+)
+carbon.add_url_rule(
+    "/activities/import/",
+    view_func=ImportActivitiesView.as_view("import_activities")
+)
 carbon.add_url_rule(
     "/activity/delete/<int:activity_id>/",
     view_func=DeleteActivityView.as_view("delete_activity")
@@ -8,7 +8,7 @@ class EmissionFactor(db.Model):
     __tablename__ = 'emission_factors'
     
     id = db.Column(db.Integer, primary_key=True)
-    category = db.Column(db.String(50), nullable=False)
+    category = db.Column(db.String(50), nullable=False, index=True)
     subcategory = db.Column(db.String(50), nullable=False)
     activity_name = db.Column(db.String(100), nullable=False)
     unit = db.Column(db.String(20), nullable=False)
@@ -31,6 +31,12 @@ class EmissionFactor(db.Model):
 class Activity(db.Model):
     """Modèle pour les activités générant des émissions de CO2"""
     __tablename__ = 'activities'
+    __table_args__ = (
+        # Historique, tableau de bord et calculs par période d'un utilisateur
+        db.Index('ix_activities_user_id_date', 'user_id', 'date'),
+        # Activités par ordre de saisie
+        db.Index('ix_activities_user_id_created_at', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -38,23 +44,97 @@ class Activity(db.Model):
     quantity = db.Column(db.Float, nullable=False)
     date = db.Column(db.Date, nullable=False, default=datetime.now(timezone.utc).date())
     created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+    # Émissions et catégorie au moment de l'ajout, comptées dans les agrégats :
+    # une suppression retire exactement ce qui a été ajouté, même si le
+    # facteur a été modifié ou supprimé depuis (NULL pour une activité dont
+    # le facteur n'existait plus lors de la migration, absente des agrégats)
+    co2_emissions = db.Column(db.Float)
+    category = db.Column(db.String(50))
     
     def __repr__(self):
         return f"<Activity {self.id} - User {self.user_id}>"
         
     def get_emissions(self):
-        """Calcule les émissions pour cette activité"""
-        factor = EmissionFactor.query.get(self.emission_factor_id)
-        return self.quantity * factor.co2_factor
+        """Retourne les émissions de cette activité, telles qu'enregistrées à l'ajout"""
+        return self.co2_emissions or 0
     
     @classmethod
     def get_total_activities(cls):
         """Retourne le nombre total d'activités, formaté (ex: 1, 1K, 1.2K)"""
-        count = cls.query.count()
+        from controllers.stats import PlatformStatistics
+
+        count = PlatformStatistics.get().total_activities
         if count < 1000:
             return str(count)
         elif count < 1_000_000:
             return f"{count/1000:.1f}K".rstrip('0').rstrip('.')
         else:
             return f"{count/1_000_000:.1f}M".rstrip('0').rstrip('.')
-    
\ No newline at end of file
+
+
+class DailyEmission(db.Model):
+    """Agrégat journalier des émissions d'un utilisateur par catégorie"""
+    __tablename__ = 'daily_emissions'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    co2_total = db.Column(db.Float, nullable=False, default=0)
+    activity_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<DailyEmission User {self.user_id} {self.date} {self.category}: {self.co2_total}>"
+
+
+class UserStats(db.Model):
+    """Totaux cumulés d'un utilisateur depuis son inscription"""
+    __tablename__ = 'user_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    co2_total = db.Column(db.Float, nullable=False, default=0)
+    activity_count = db.Column(db.Integer, nullable=False, default=0)
+    # Incrémenté à chaque modification des données de l'utilisateur (ETag des pages)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Version des données couverte par l'index des sommes cumulées (à jour si égale à data_version)
+    prefix_version = db.Column(db.Integer)
+    
+    def __repr__(self):
+        return f"<UserStats User {self.user_id}: {self.co2_total} ({self.activity_count} activités)>"
+
+
+class EmissionPrefixSums(db.Model):
+    """Sommes cumulées des émissions d'un utilisateur, jour par jour sur une année"""
+    __tablename__ = 'emission_prefix_sums'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    # Tableau d'entiers 64 bits (voir controllers/prefix_index.py)
+    sums = db.Column(db.LargeBinary, nullable=False)
+    
+    def __repr__(self):
+        return f"<EmissionPrefixSums User {self.user_id} {self.year}>"
+
+
+class PlatformStats(db.Model):
+    """Compteurs globaux de la plateforme (une seule ligne, id = 1)"""
+    __tablename__ = 'platform_stats'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_count = db.Column(db.Integer, nullable=False, default=0)
+    activity_count = db.Column(db.Integer, nullable=False, default=0)
+    co2_total = db.Column(db.Float, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<PlatformStats {self.user_count} utilisateurs, {self.activity_count} activités>"
+
+
+class FactorCatalogVersion(db.Model):
+    """Version du catalogue des facteurs d'émission (une seule ligne, id = 1)"""
+    __tablename__ = 'factor_catalog_version'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # Incrémentée dans la transaction de chaque modification de emission_factors
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<FactorCatalogVersion {self.version}>"
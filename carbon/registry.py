@@ -0,0 +1,193 @@
+from collections import namedtuple
+from threading import Lock
+from types import MappingProxyType
+
+from flask import g, has_request_context
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session, object_session
+
+from configs.database import upsert_insert
+from configs.metrics import record_cache
+from configs.settings import db
+from .models import EmissionFactor, FactorCatalogVersion
+
+
+# Entrée immuable et compacte (tuple nommé, sans __dict__)
+FactorEntry = namedtuple(
+    "FactorEntry",
+    ["id", "category", "subcategory", "activity_name", "unit", "co2_factor", "source"],
+)
+
+
+class FactorRegistry:
+    """
+    Catalogue immuable des facteurs d'émission, indexé par identifiant
+    et par catégorie. Une instance n'est jamais modifiée : un changement
+    de la table produit un nouveau catalogue, portant la nouvelle version
+    enregistrée en base (factor_catalog_version).
+    """
+    __slots__ = ("version", "by_id", "by_category")
+
+    def __init__(self, entries, version):
+        self.version = version
+        self.by_id = MappingProxyType({entry.id: entry for entry in entries})
+
+        grouped = {}
+        for entry in entries:
+            grouped.setdefault(entry.category, []).append(entry)
+        self.by_category = MappingProxyType({
+            category: tuple(items) for category, items in grouped.items()
+        })
+
+    def get(self, factor_id):
+        """Retourne le facteur d'identifiant donné, ou None"""
+        return self.by_id.get(factor_id)
+
+    def get_by_category(self, category):
+        """Retourne les facteurs d'une catégorie (tuple éventuellement vide)"""
+        return self.by_category.get(category, ())
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __repr__(self):
+        return f"<FactorRegistry v{self.version}: {len(self)} facteurs>"
+
+
+# Catalogue chargé par le processus, rechargé quand la version en base change
+_registry = None
+_lock = Lock()
+
+VERSION_ROW_ID = 1
+# Drapeau de session : le catalogue a été modifié dans la transaction en cours
+_CHANGED = "factor_catalog_changed"
+
+
+def _bump_statement():
+    return (
+        update(FactorCatalogVersion.__table__)
+        .where(FactorCatalogVersion.id == VERSION_ROW_ID)
+        .values(version=FactorCatalogVersion.version + 1)
+    )
+
+
+def bump_factor_version(session=None):
+    """
+    Signale une modification de la table des facteurs : la version du
+    catalogue est incrémentée en base, dans la transaction en cours, et
+    tous les processus rechargent leur catalogue après la validation.
+    Appelé automatiquement lors des écritures ORM, à appeler
+    explicitement après une insertion en masse, avant la validation.
+    """
+    session = session or db.session
+    session.execute(_bump_statement())
+    session.info[_CHANGED] = True
+
+
+def init_factor_version():
+    """Crée la ligne de version du catalogue si elle n'existe pas, et valide"""
+    db.session.execute(
+        upsert_insert(FactorCatalogVersion)
+        .values(id=VERSION_ROW_ID, version=0)
+        .on_conflict_do_nothing(index_elements=['id'])
+    )
+    db.session.commit()
+
+
+def factor_catalog_version():
+    """
+    Version du catalogue enregistrée en base
+
+    Lue par clé primaire, au plus une fois par requête : un catalogue
+    modifié par un autre processus est pris en compte dès la requête
+    suivante, et l'ETag des pages change avec lui.
+
+    Returns:
+        int: Version (0 si la base n'est pas initialisée)
+    """
+    if has_request_context() and "factor_catalog_version" in g:
+        return g.factor_catalog_version
+
+    version = db.session.execute(
+        select(FactorCatalogVersion.version).where(FactorCatalogVersion.id == VERSION_ROW_ID)
+    ).scalar() or 0
+
+    if has_request_context():
+        g.factor_catalog_version = version
+    return version
+
+
+def forget_factor_version(exc=None):
+    """Fin de requête : la version du catalogue sera relue par la suivante"""
+    g.pop("factor_catalog_version", None)
+
+
+def invalidate_factor_registry():
+    """Oublie le catalogue chargé par le processus (changement de base, tests)"""
+    global _registry
+    _registry = None
+
+
+def get_factor_registry():
+    """
+    Retourne le catalogue des facteurs du processus, chargé une seule
+    fois puis rechargé uniquement si la version en base a changé.
+    """
+    global _registry
+
+    version = factor_catalog_version()
+    registry = _registry
+    if registry is not None and registry.version == version:
+        record_cache("factor_registry", True)
+        return registry
+
+    record_cache("factor_registry", False)
+
+    with _lock:
+        if _registry is None or _registry.version != version:
+            rows = db.session.execute(
+                select(EmissionFactor.__table__).order_by(EmissionFactor.id)
+            ).all()
+            entries = [
+                FactorEntry(
+                    row.id,
+                    row.category,
+                    row.subcategory,
+                    row.activity_name,
+                    row.unit,
+                    row.co2_factor,
+                    row.source,
+                )
+                for row in rows
+            ]
+            _registry = FactorRegistry(entries, version)
+        return _registry
+
+
+def _on_factor_change(mapper, connection, target):
+    connection.execute(_bump_statement())
+    object_session(target).info[_CHANGED] = True
+
+
+def _on_bulk_change(update_context):
+    if update_context.mapper.class_ is EmissionFactor:
+        bump_factor_version(update_context.session)
+
+
+def _on_commit(session):
+    # La version lue plus tôt dans la requête n'est plus la bonne
+    if session.info.pop(_CHANGED, False) and has_request_context():
+        forget_factor_version()
+
+
+def _on_rollback(session):
+    session.info.pop(_CHANGED, None)
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(EmissionFactor, _event_name, _on_factor_change)
+
+event.listen(Session, "after_bulk_update", _on_bulk_change)
+event.listen(Session, "after_bulk_delete", _on_bulk_change)
+event.listen(Session, "after_commit", _on_commit)
+event.listen(Session, "after_rollback", _on_rollback)
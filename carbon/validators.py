@@ -0,0 +1,108 @@
+from datetime import datetime
+import math
+
+
+class ActivityValidator:
+    """
+    Règles de validation d'une activité, partagées par le formulaire
+    d'ajout et l'import en masse. Les facteurs sont résolus dans le
+    catalogue en mémoire, sans requête SQL.
+    """
+    VALID_CATEGORIES = {"transport", "food", "energy", "consumption"}
+
+    def __init__(self, registry, require_category=True):
+        self.registry = registry
+        self.require_category = require_category
+        self._by_name = None
+
+    @staticmethod
+    def _get(data, *keys):
+        """Première valeur renseignée parmi les clés données, sous forme de texte"""
+        for key in keys:
+            value = data.get(key)
+            if value is not None and str(value).strip():
+                return str(value).strip()
+        return ""
+
+    def _get_by_name(self, name):
+        """Recherche un facteur par nom d'activité (insensible à la casse)"""
+        if self._by_name is None:
+            self._by_name = {
+                entry.activity_name.lower(): entry
+                for entry in self.registry.by_id.values()
+            }
+        return self._by_name.get(name.lower())
+
+    def validate(self, data):
+        """
+        Valide une activité
+
+        Args:
+            data: Données brutes (formulaire, ligne CSV ou objet NDJSON)
+
+        Returns:
+            tuple: (liste des erreurs, données validées)
+        """
+        errors = []
+        validated_data = {}
+
+        # Validation catégorie
+        category = self._get(data, "category")
+        if not category:
+            if self.require_category:
+                errors.append("Veuillez sélectionner une catégorie.")
+        elif category not in self.VALID_CATEGORIES:
+            errors.append(f"Catégorie '{category}' non valide.")
+        else:
+            validated_data["category"] = category
+
+        # Validation activité (identifiant, ou nom pour l'import)
+        activity_id = self._get(data, "activity_id", "factor_id")
+        activity_name = "" if self.require_category else self._get(data, "activity_name", "name")
+        if activity_id:
+            try:
+                emission_factor = self.registry.get(int(activity_id))
+                if not emission_factor:
+                    errors.append("L'activité sélectionnée n'existe pas.")
+                else:
+                    validated_data["emission_factor"] = emission_factor
+            except ValueError:
+                errors.append("Identifiant d'activité invalide.")
+        elif activity_name:
+            emission_factor = self._get_by_name(activity_name)
+            if not emission_factor:
+                errors.append(f"L'activité '{activity_name}' n'existe pas.")
+            else:
+                validated_data["emission_factor"] = emission_factor
+        else:
+            errors.append("Veuillez sélectionner une activité spécifique.")
+
+        # Validation quantité
+        quantity_str = self._get(data, "quantity")
+        if not quantity_str:
+            errors.append("Veuillez saisir une quantité.")
+        else:
+            try:
+                quantity = float(quantity_str)
+                emission_factor = validated_data.get("emission_factor")
+                # float() accepte "nan", "inf" et "1e400" (infini)
+                if not math.isfinite(quantity):
+                    errors.append("La quantité n'est pas un nombre valide.")
+                elif quantity <= 0:
+                    errors.append("La quantité doit être supérieure à zéro.")
+                elif emission_factor and not math.isfinite(quantity * emission_factor.co2_factor):
+                    errors.append("La quantité est trop grande.")
+                else:
+                    validated_data["quantity"] = quantity
+            except ValueError:
+                errors.append("La quantité n'est pas un nombre valide.")
+
+        # Validation date
+        date_str = self._get(data, "date")
+        try:
+            date = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else datetime.now().date()
+            validated_data["date"] = date
+        except ValueError:
+            errors.append("Format de date invalide.")
+
+        return errors, validated_data
@@ -1,9 +1,16 @@
+import csv
+import io
+import json
 from datetime import datetime
-from functools import lru_cache
 from flask import (
+    Response,
+    abort,
+    current_app,
+    jsonify,
     render_template,
     request,
     redirect,
+    stream_with_context,
     url_for,
     flash,
 )
@@ -12,12 +19,20 @@ from flask_login import (
     login_required,
     current_user,
 )
+
+from configs.conditional import conditional_on_user_data
+from controllers.history import ActivityHistory
+from controllers.importer import ActivityImporter
+from controllers.ledger import ActivityLedger
+from controllers.write_behind import ActivityWriteQueue
+
 from .models import (
     db,
-    EmissionFactor, 
     Activity
 )
 from .forms import AddActivityForm
+from .registry import get_factor_registry
+from .validators import ActivityValidator
 
 
 class IndexView(MethodView):
@@ -35,13 +50,13 @@ class AddActivityView(MethodView):
     form_class = AddActivityForm
     decorators = [login_required]
     
-    VALID_CATEGORIES = {"transport", "food", "energy", "consumption"}
+    VALID_CATEGORIES = ActivityValidator.VALID_CATEGORIES
 
-    @lru_cache(maxsize=128)
     def _get_emission_factors(self):
-        """Cache des facteurs d'émission pour éviter les requêtes répétées"""
+        """Facteurs d'émission par catégorie, lus depuis le catalogue du processus"""
+        registry = get_factor_registry()
         return {
-            category: EmissionFactor.query.filter_by(category=category).all()
+            category: registry.get_by_category(category)
             for category in self.VALID_CATEGORIES
         }
 
@@ -59,56 +74,7 @@ class AddActivityView(MethodView):
 
     def _validate_form_data(self, form_data):
         """Validation centralisée avec retour d'erreurs et de données"""
-        errors = []
-        validated_data = {}
-
-        # Validation catégorie
-        category = form_data.get("category", "").strip()
-        if not category:
-            errors.append("Veuillez sélectionner une catégorie.")
-        elif category not in self.VALID_CATEGORIES:
-            errors.append(f"Catégorie '{category}' non valide.")
-        else:
-            validated_data["category"] = category
-
-        # Validation activité
-        activity_id = form_data.get("activity_id", "").strip()
-        if not activity_id:
-            errors.append("Veuillez sélectionner une activité spécifique.")
-        else:
-            try:
-                activity_id = int(activity_id)
-                emission_factor = EmissionFactor.query.get(activity_id)
-                if not emission_factor:
-                    errors.append(f"L'activité sélectionnée n'existe pas.")
-                else:
-                    validated_data["emission_factor"] = emission_factor
-            except ValueError:
-                errors.append("Identifiant d'activité invalide.")
-
-        # Validation quantité
-        quantity_str = form_data.get("quantity", "").strip()
-        if not quantity_str:
-            errors.append("Veuillez saisir une quantité.")
-        else:
-            try:
-                quantity = float(quantity_str)
-                if quantity <= 0:
-                    errors.append("La quantité doit être supérieure à zéro.")
-                else:
-                    validated_data["quantity"] = quantity
-            except ValueError:
-                errors.append("La quantité n'est pas un nombre valide.")
-
-        # Validation date
-        date_str = form_data.get("date", "").strip()
-        try:
-            date = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else datetime.now().date()
-            validated_data["date"] = date
-        except ValueError:
-            errors.append("Format de date invalide.")
-
-        return errors, validated_data
+        return ActivityValidator(get_factor_registry()).validate(form_data)
 
     def _flash_errors(self, errors):
         """Flash des erreurs de manière groupée"""
@@ -118,6 +84,16 @@ class AddActivityView(MethodView):
     def _create_activity(self, validated_data):
         """Création sécurisée de l'activité"""
         try:
+            if current_app.config["WRITE_BEHIND"]:
+                # Insertion groupée par le thread écrivain, validée avant la réponse
+                ActivityWriteQueue.get().add(
+                    current_user.id,
+                    validated_data["emission_factor"],
+                    validated_data["quantity"],
+                    validated_data["date"]
+                )
+                return True
+
             activity = Activity(
                 user_id=current_user.id,
                 emission_factor_id=validated_data["emission_factor"].id,
@@ -125,6 +101,12 @@ class AddActivityView(MethodView):
                 date=validated_data["date"]
             )
             db.session.add(activity)
+
+            # Mise à jour des agrégats dans la même transaction
+            ActivityLedger(current_user.id).record(
+                activity,
+                validated_data["emission_factor"]
+            )
             db.session.commit()
             return True
         except Exception as e:
@@ -156,46 +138,191 @@ class AddActivityView(MethodView):
 
 class HistoryView(MethodView):
     template_name = "carbon/history.html"
-    decorators = [login_required]
+    # 304 sans calcul si les données de l'utilisateur n'ont pas changé
+    decorators = [conditional_on_user_data, login_required]
 
     def get(self):
-        """Affichage de l'historique des activités"""
+        """Affichage de la première page de l'historique des activités"""
         user = current_user
         
         if not user:
             flash("Vous devez être connecté pour voir votre historique.", "warning")
             return redirect(url_for("auth.login"))
         
-        # Récupération des activités de l'utilisateur
-        activities = (
-            Activity.query
-            .filter_by(user_id=current_user.id)
-            .order_by(Activity.date.desc())
-            .all()
-        )
+        history = ActivityHistory(user.id)
+        filters = ActivityHistory.parse_filters(request.args)
+
+        # Première page uniquement : les suivantes sont servies en JSON
+        activities, next_cursor = history.page(filters)
 
-        # Préparation des données pour la contruction de graphiques
-        activities_data = []
-
-        for activity in  activities:
-            emission_factor = EmissionFactor.query.get(activity.emission_factor_id)
-            activities_data.append({
-                'id': activity.id,
-                'date': activity.date,
-                'category': emission_factor.category,
-                'name': emission_factor.activity_name,
-                'quantity': activity.quantity,
-                'unit': emission_factor.unit,
-                'emissions': round(activity.quantity * emission_factor.co2_factor, 2)
-            })
         # Contexte pour le template
         ctx = {
             "title": "Historique des activités",
             "activities": activities,
-            "activities_json": activities_data,
+            "summary": history.summary(filters),
+            "chart_days": ActivityHistory.CHART_DAYS,
+            "filters": filters,
+            "has_filters": any(filters.values()),
+            "filter_args": {
+                key: value.isoformat() if hasattr(value, "isoformat") else value
+                for key, value in filters.items()
+                if value
+            },
+            "next_cursor": next_cursor,
         }
         return render_template(self.template_name, **ctx)
-    
+
+
+class HistoryDataView(MethodView):
+    decorators = [conditional_on_user_data(flashes=False), login_required]
+
+    def get(self):
+        """Page suivante de l'historique au format JSON"""
+        history = ActivityHistory(current_user.id)
+        filters = ActivityHistory.parse_filters(request.args)
+
+        cursor = request.args.get("cursor", "").strip()
+        try:
+            cursor = ActivityHistory.decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return jsonify({"error": "Curseur invalide."}), 400
+
+        activities, next_cursor = history.page(
+            filters,
+            cursor=cursor,
+            limit=request.args.get("limit", type=int)
+        )
+
+        for activity in activities:
+            activity["date"] = activity["date"].isoformat()
+            activity["delete_url"] = url_for("carbon.delete_activity", activity_id=activity["id"])
+
+        return jsonify({
+            "activities": activities,
+            "next_cursor": next_cursor,
+        })
+
+
+class ExportActivitiesView(MethodView):
+    decorators = [login_required]
+
+    FORMATS = {
+        "csv": "text/csv",
+        "ndjson": "application/x-ndjson",
+    }
+    FIELDS = [
+        "id",
+        "date",
+        "category",
+        "name",
+        "quantity",
+        "unit",
+        "co2_factor",
+        "emissions",
+        "created_at",
+    ]
+    # Nombre de lignes regroupées par morceau envoyé au client
+    CHUNK_SIZE = 1000
+
+    def get(self):
+        """Export en flux de l'historique des activités (CSV ou NDJSON)"""
+        export_format = request.args.get("format", "csv").lower()
+        if export_format not in self.FORMATS:
+            abort(400)
+
+        history = ActivityHistory(current_user.id)
+        filters = ActivityHistory.parse_filters(request.args)
+        rows = history.iter_rows(filters, chunk_size=self.CHUNK_SIZE)
+
+        if export_format == "csv":
+            body = self._iter_csv(rows)
+        else:
+            body = self._iter_ndjson(rows)
+
+        filename = f"ecotrace-activites-{datetime.now().date().isoformat()}.{export_format}"
+        return Response(
+            stream_with_context(body),
+            mimetype=self.FORMATS[export_format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    def _iter_csv(self, rows):
+        """Sérialise les lignes en CSV, par morceaux"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.FIELDS)
+        writer.writeheader()
+
+        for index, row in enumerate(rows, start=1):
+            writer.writerow(row)
+            if index % self.CHUNK_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue()
+
+    def _iter_ndjson(self, rows):
+        """Sérialise les lignes en NDJSON (un objet JSON par ligne), par morceaux"""
+        chunk = []
+
+        for row in rows:
+            chunk.append(json.dumps(row, ensure_ascii=False))
+            if len(chunk) >= self.CHUNK_SIZE:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+
+
+class ImportActivitiesView(MethodView):
+    decorators = [login_required]
+
+    def post(self):
+        """
+        Import en masse d'activités (CSV ou NDJSON)
+
+        Un fichier envoyé depuis le formulaire donne lieu à un message et
+        une redirection ; un corps de requête brut reçoit un rapport JSON.
+        """
+        upload = request.files.get("file")
+        importer = ActivityImporter(
+            current_user.id,
+            batch_size=current_app.config.get("IMPORT_BATCH_SIZE")
+        )
+
+        if upload is not None:
+            file_format = request.args.get("format") or ActivityImporter.detect_format(upload.filename, upload.mimetype)
+            stream = upload.stream
+        else:
+            file_format = request.args.get("format") or ActivityImporter.detect_format(mimetype=request.mimetype)
+            stream = request.stream
+
+        if file_format not in ActivityImporter.FORMATS:
+            abort(400)
+
+        try:
+            report = importer.run(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""), file_format)
+        except UnicodeDecodeError:
+            report = None
+
+        if upload is None:
+            if report is None:
+                return jsonify({"error": "Le fichier doit être encodé en UTF-8."}), 400
+            return jsonify(report)
+
+        if report is None:
+            flash("Le fichier doit être encodé en UTF-8.", "danger")
+            return redirect(url_for("carbon.add_activity"))
+
+        if report["imported"]:
+            flash(f"{report['imported']} activité(s) importée(s).", "success")
+        if report["rejected"]:
+            flash(f"{report['rejected']} ligne(s) rejetée(s).", "warning")
+            for error in report["errors"][:5]:
+                flash(f"Ligne {error['line']} : {' '.join(error['errors'])}", "danger")
+
+        return redirect(url_for("carbon.history"))
 
 
 class DeleteActivityView(MethodView):
@@ -219,6 +346,7 @@ class DeleteActivityView(MethodView):
             flash("Activité non trouvée ou vous n'avez pas la permission de la supprimer.", "danger")
             return redirect(url_for("carbon.history"))
         try:
+            ActivityLedger(user.id).remove(activity)
             db.session.delete(activity)
             db.session.commit()
             flash("Activité supprimée avec succès !", "success")
@@ -0,0 +1,245 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+from pathlib import Path
+import re
+import shutil
+
+from flask import abort, current_app, request, send_from_directory, url_for
+from jinja2 import FileSystemLoader
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST = "manifest.json"
+
+# Fichiers ignorés par la construction
+IGNORED = {".DS_Store"}
+
+# Types texte (ou peu compressés à l'origine) dont on écrit des copies compressées
+COMPRESSIBLE = {".css", ".js", ".json", ".xml", ".txt", ".svg", ".ico", ".ttf", ".otf"}
+
+# Une copie compressée n'est gardée que si elle fait gagner au moins 10 %
+MIN_GAIN = 0.9
+
+# Blocs dont les espaces sont significatifs
+PRESERVED_BLOCK = re.compile(r"(<(pre|textarea)\b.*?</\2>)", re.DOTALL | re.IGNORECASE)
+# Commentaires HTML, hors commentaires conditionnels et commentaires contenant du Jinja
+HTML_COMMENT = re.compile(r"<!--(?!\[if)(?:(?!\{[{%]).)*?-->", re.DOTALL)
+# Scripts et styles en ligne
+INLINE_BLOCK = re.compile(r"(<(script|style)\b([^>]*)>)(.*?)(</\2>)", re.DOTALL | re.IGNORECASE)
+JINJA_SYNTAX = re.compile(r"\{[{%#]")
+
+
+def minify_css(content):
+    from rcssmin import cssmin
+    return cssmin(content)
+
+
+def minify_js(content):
+    from jsmin import jsmin
+    return jsmin(content, quote_chars="'\"`")
+
+
+def _minify_inline(match):
+    opening, tag, attributes, body, closing = match.groups()
+    # Un bloc contenant du Jinja est laissé tel quel
+    if JINJA_SYNTAX.search(body):
+        return match.group(0)
+    if tag.lower() == "style":
+        return opening + minify_css(body) + closing
+    if "type=" not in attributes or "javascript" in attributes or "module" in attributes:
+        return opening + minify_js(body) + closing
+    return match.group(0)
+
+
+def minify_template(content):
+    """
+    Minifie un template Jinja sans toucher à sa syntaxe
+
+    Les scripts et styles en ligne sans Jinja sont minifiés. Ailleurs,
+    les commentaires HTML et l'indentation sont retirés, les lignes vides
+    supprimées ; les retours à la ligne sont conservés (espaces entre
+    éléments en ligne, scripts sans point-virgule), ainsi que le contenu
+    des blocs <pre> et <textarea>.
+    """
+    content = INLINE_BLOCK.sub(_minify_inline, content)
+    parts = PRESERVED_BLOCK.split(content)
+    output = []
+    # split renvoie : texte, bloc préservé, nom de balise, texte...
+    for index in range(0, len(parts), 3):
+        text = HTML_COMMENT.sub("", parts[index])
+        lines = (line.strip() for line in text.splitlines())
+        output.append("\n".join(line for line in lines if line))
+        if index + 1 < len(parts):
+            output.append(parts[index + 1])
+    return "\n".join(part for part in output if part)
+
+
+def fingerprint(relative_path, content):
+    """css/style.css -> css/style.<empreinte>.css"""
+    path = Path(relative_path)
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    return str(path.with_name(f"{path.stem}.{digest}{path.suffix}"))
+
+
+def build_assets(static_dir, template_dir, output_dir, compress=True):
+    """
+    Construit les fichiers statiques et les templates de production
+
+    Les CSS et JS sont minifiés (sauf *.min.js), chaque fichier est
+    renommé avec l'empreinte de son contenu et, pour les types texte,
+    accompagné de copies gzip et brotli (si le module brotli est
+    installé). Les templates sont minifiés. Un manifeste associe chaque
+    chemin source à son chemin construit.
+
+    Args:
+        static_dir: Dossier des fichiers statiques sources
+        template_dir: Dossier des templates sources
+        output_dir: Dossier de sortie (recréé)
+        compress: Écrire les copies compressées
+
+    Returns:
+        dict: Nombre de fichiers, tailles avant et après minification
+    """
+    static_dir, template_dir, output_dir = Path(static_dir), Path(template_dir), Path(output_dir)
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+
+    manifest = {"files": {}, "encodings": {}}
+    report = {"files": 0, "templates": 0, "source_bytes": 0, "built_bytes": 0, "gzip_bytes": 0, "brotli_bytes": 0}
+
+    for source in sorted(static_dir.rglob("*")):
+        if not source.is_file() or source.name in IGNORED:
+            continue
+
+        relative = source.relative_to(static_dir).as_posix()
+        content = source.read_bytes()
+        report["source_bytes"] += len(content)
+
+        if source.suffix == ".css":
+            content = minify_css(content.decode("utf-8")).encode("utf-8")
+        elif source.suffix == ".js" and not source.name.endswith(".min.js"):
+            content = minify_js(content.decode("utf-8")).encode("utf-8")
+
+        built = fingerprint(relative, content)
+        target = output_dir / "static" / built
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        manifest["files"][relative] = built
+        report["files"] += 1
+        report["built_bytes"] += len(content)
+
+        if not compress or source.suffix not in COMPRESSIBLE:
+            continue
+
+        encodings = []
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) < len(content) * MIN_GAIN:
+            target.with_name(target.name + ".gz").write_bytes(compressed)
+            encodings.append("gzip")
+            report["gzip_bytes"] += len(compressed)
+
+        if brotli is not None:
+            compressed = brotli.compress(content, quality=11)
+            if len(compressed) < len(content) * MIN_GAIN:
+                target.with_name(target.name + ".br").write_bytes(compressed)
+                encodings.append("br")
+                report["brotli_bytes"] += len(compressed)
+
+        if encodings:
+            manifest["encodings"][built] = encodings
+
+    for source in sorted(template_dir.rglob("*.html")):
+        target = output_dir / "templates" / source.relative_to(template_dir)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(minify_template(source.read_text(encoding="utf-8")), encoding="utf-8")
+        report["templates"] += 1
+
+    # Le manifeste est écrit en dernier : sa présence signale une construction complète
+    (output_dir / MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    return report
+
+
+def load_manifest(output_dir):
+    """
+    Lit le manifeste d'une construction
+
+    Returns:
+        dict | None: Manifeste, None si les fichiers n'ont pas été construits
+    """
+    try:
+        return json.loads((Path(output_dir) / MANIFEST).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def asset_url(filename):
+    """
+    URL d'un fichier statique, dans sa version construite si elle existe
+
+    Exemple dans un template : {{ asset_url('css/style.css') }}
+    """
+    manifest = current_app.extensions.get("ecotrace_assets")
+    if manifest is not None:
+        built = manifest["files"].get(filename)
+        if built is not None:
+            return url_for("assets", filename=built)
+    return url_for("static", filename=filename)
+
+
+def serve_asset(filename):
+    """
+    Sert un fichier construit, compressé si le client l'accepte
+
+    Le nom contient l'empreinte du contenu : la réponse peut être gardée
+    en cache indéfiniment (immutable).
+    """
+    manifest = current_app.extensions["ecotrace_assets"]
+    directory = Path(current_app.config["ASSETS_BUILD_DIR"]) / "static"
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    max_age = current_app.config["ASSETS_MAX_AGE"]
+
+    for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if encoding in manifest["encodings"].get(filename, ()) and request.accept_encodings[encoding]:
+            response = send_from_directory(directory, filename + suffix, mimetype=mimetype, max_age=max_age)
+            response.headers["Content-Encoding"] = encoding
+            break
+    else:
+        if filename not in manifest["known"]:
+            abort(404)
+        response = send_from_directory(directory, filename, mimetype=mimetype, max_age=max_age)
+
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_assets(app):
+    """
+    Branche les fichiers construits par `flask ecotrace build-assets`
+
+    Sans construction, les fichiers sont servis depuis assets/static et
+    asset_url() retombe sur url_for('static', ...).
+
+    Returns:
+        bool: Vrai si une construction est utilisée
+    """
+    app.add_template_global(asset_url)
+
+    manifest = load_manifest(app.config["ASSETS_BUILD_DIR"])
+    if manifest is None:
+        return False
+
+    manifest["known"] = set(manifest["files"].values())
+    app.extensions["ecotrace_assets"] = manifest
+    app.add_url_rule("/assets/<path:filename>", "assets", serve_asset)
+
+    # Templates minifiés en priorité, sources en secours
+    build_templates = str(Path(app.config["ASSETS_BUILD_DIR"]) / "templates")
+    app.jinja_loader = FileSystemLoader([build_templates, app.template_folder])
+    return True
@@ -0,0 +1,139 @@
+from threading import Lock
+
+from flask import current_app
+from sqlalchemy import inspect
+
+from .settings import db, init_migrate
+
+
+# Facteurs d'émission par défaut (source : ADEME)
+DEFAULT_FACTORS = [
+    # Transport
+    {'category': 'transport', 'subcategory': 'voiture', 'activity_name': 'Voiture essence', 'unit': 'km', 'co2_factor': 0.192, 'source': 'ADEME'},
+    {'category': 'transport', 'subcategory': 'voiture', 'activity_name': 'Voiture diesel', 'unit': 'km', 'co2_factor': 0.173, 'source': 'ADEME'},
+    {'category': 'transport', 'subcategory': 'voiture', 'activity_name': 'Voiture électrique', 'unit': 'km', 'co2_factor': 0.02, 'source': 'ADEME'},
+    {'category': 'transport', 'subcategory': 'transport en commun', 'activity_name': 'Bus', 'unit': 'km', 'co2_factor': 0.103, 'source': 'ADEME'},
+    {'category': 'transport', 'subcategory': 'transport en commun', 'activity_name': 'Train', 'unit': 'km', 'co2_factor': 0.0056, 'source': 'ADEME'},
+    {'category': 'transport', 'subcategory': 'avion', 'activity_name': 'Avion', 'unit': 'km', 'co2_factor': 0.285, 'source': 'ADEME'},
+    # Alimentation
+    {'category': 'food', 'subcategory': 'viande', 'activity_name': 'Boeuf', 'unit': 'kg', 'co2_factor': 27.0, 'source': 'ADEME'},
+    {'category': 'food', 'subcategory': 'viande', 'activity_name': 'Poulet', 'unit': 'kg', 'co2_factor': 5.15, 'source': 'ADEME'},
+    {'category': 'food', 'subcategory': 'viande', 'activity_name': 'Porc', 'unit': 'kg', 'co2_factor': 5.8, 'source': 'ADEME'},
+    {'category': 'food', 'subcategory': 'produits laitiers', 'activity_name': 'Fromage', 'unit': 'kg', 'co2_factor': 5.3, 'source': 'ADEME'},
+    {'category': 'food', 'subcategory': 'produits laitiers', 'activity_name': 'Lait', 'unit': 'L', 'co2_factor': 0.94, 'source': 'ADEME'},
+    {'category': 'food', 'subcategory': 'légumes', 'activity_name': 'Légumes locaux de saison', 'unit': 'kg', 'co2_factor': 0.5, 'source': 'ADEME'},
+    {'category': 'food', 'subcategory': 'légumes', 'activity_name': 'Légumes importés ou hors saison', 'unit': 'kg', 'co2_factor': 2.7, 'source': 'ADEME'},
+    # Énergie
+    {'category': 'energy', 'subcategory': 'électricité', 'activity_name': 'Électricité (mix français)', 'unit': 'kWh', 'co2_factor': 0.057, 'source': 'ADEME'},
+    {'category': 'energy', 'subcategory': 'chauffage', 'activity_name': 'Gaz naturel', 'unit': 'kWh', 'co2_factor': 0.205, 'source': 'ADEME'},
+    {'category': 'energy', 'subcategory': 'chauffage', 'activity_name': 'Fioul domestique', 'unit': 'L', 'co2_factor': 3.25, 'source': 'ADEME'},
+    # Consommation
+    {'category': 'consumption', 'subcategory': 'vêtements', 'activity_name': 'T-shirt', 'unit': 'unité', 'co2_factor': 7.0, 'source': 'ADEME'},
+    {'category': 'consumption', 'subcategory': 'vêtements', 'activity_name': 'Jean', 'unit': 'unité', 'co2_factor': 25.0, 'source': 'ADEME'},
+    {'category': 'consumption', 'subcategory': 'électronique', 'activity_name': 'Smartphone', 'unit': 'unité', 'co2_factor': 80.0, 'source': 'ADEME'},
+    {'category': 'consumption', 'subcategory': 'électronique', 'activity_name': 'Ordinateur portable', 'unit': 'unité', 'co2_factor': 156.0, 'source': 'ADEME'},
+]
+
+_lock = Lock()
+
+
+def seed_factors():
+    """
+    Insère les facteurs d'émission par défaut manquants.
+
+    Un facteur est identifié par sa catégorie et son nom d'activité :
+    relancer la commande n'insère rien de plus. Les facteurs manquants
+    sont ajoutés en une seule instruction (executemany).
+
+    Returns:
+        int: Nombre de facteurs ajoutés
+    """
+    from carbon.models import EmissionFactor
+    from carbon.registry import bump_factor_version
+
+    existing = set(
+        db.session.query(EmissionFactor.category, EmissionFactor.activity_name)
+    )
+    missing = [
+        factor for factor in DEFAULT_FACTORS
+        if (factor["category"], factor["activity_name"]) not in existing
+    ]
+
+    if missing:
+        db.session.execute(EmissionFactor.__table__.insert(), missing)
+        # L'insertion en masse ne déclenche pas les événements ORM
+        bump_factor_version()
+        db.session.commit()
+
+    return len(missing)
+
+
+# Schéma antérieur aux migrations : révision initiale et ses tables
+BASELINE_REVISION = "dd3d0ae2ce7b"
+BASELINE_TABLES = {"users", "emission_factors", "activities"}
+
+
+def init_db():
+    """
+    Met la base au schéma courant, ajoute les facteurs par défaut et les
+    lignes de version du catalogue et des statistiques globales.
+
+    Une base vide est créée d'après les modèles puis marquée à la dernière
+    révision des migrations. Une base existante n'est jamais complétée par
+    create_all (qui ajouterait les tables sans les colonnes nouvelles) :
+    elle est mise à jour par les migrations, après avoir été marquée à la
+    révision initiale si elle date d'avant les migrations.
+
+    Returns:
+        int: Nombre de facteurs ajoutés
+
+    Raises:
+        RuntimeError: Base sans historique de migrations dont les tables ne
+            sont pas celles du schéma initial
+    """
+    from flask_migrate import stamp, upgrade
+
+    init_migrate(current_app)
+    tables = set(inspect(db.engine).get_table_names())
+
+    if not tables:
+        db.create_all()
+        stamp()
+    elif "alembic_version" in tables:
+        upgrade()
+    elif tables == BASELINE_TABLES:
+        # Base créée avant les migrations
+        stamp(revision=BASELINE_REVISION)
+        upgrade()
+    else:
+        raise RuntimeError(
+            "La base n'a pas d'historique de migrations et ses tables ("
+            + ", ".join(sorted(tables))
+            + ") ne sont pas celles du schéma initial : mettez-la à jour avec "
+            "`flask db stamp <révision>` puis `flask db upgrade`."
+        )
+
+    from carbon.registry import init_factor_version
+    from controllers.stats import PlatformStatistics
+
+    init_factor_version()
+    added = seed_factors()
+
+    PlatformStatistics.init()
+    return added
+
+
+def ensure_db():
+    """
+    Initialise la base une seule fois par application, à la première requête.
+
+    Les requêtes suivantes ne paient que la lecture d'un drapeau.
+    """
+    extensions = current_app.extensions
+    if extensions.get("ecotrace_db_ready"):
+        return
+
+    with _lock:
+        if not extensions.get("ecotrace_db_ready"):
+            init_db()
+            extensions["ecotrace_db_ready"] = True
@@ -0,0 +1,283 @@
+import click
+from flask.cli import AppGroup
+
+ecotrace = AppGroup("ecotrace", help="Commandes d'administration d'EcoTrace.")
+
+
+@ecotrace.command("init-db")
+def init_db():
+    """
+    Crée les tables manquantes et ajoute les facteurs d'émission par défaut.
+    """
+    from .bootstrap import init_db
+
+    added = init_db()
+    click.echo(f"Base initialisée, {added} facteur(s) d'émission ajouté(s).")
+
+
+@ecotrace.command("seed-factors")
+def seed_factors():
+    """
+    Ajoute les facteurs d'émission par défaut manquants (sans doublon).
+    """
+    from .bootstrap import seed_factors
+
+    added = seed_factors()
+    click.echo(f"{added} facteur(s) d'émission ajouté(s).")
+
+
+@ecotrace.command("rebuild-rollups")
+@click.option(
+    "--check-only",
+    is_flag=True,
+    help="Compare les agrégats sans les réécrire.",
+)
+def rebuild_rollups(check_only):
+    """
+    Reconstruit les agrégats journaliers à partir des activités brutes.
+    """
+    from controllers.ledger import ActivityLedger
+
+    report = ActivityLedger.rebuild(dry_run=check_only)
+
+    for mismatch in report["mismatches"]:
+        user_id, date, category = mismatch["key"]
+        click.echo(
+            f"Écart utilisateur {user_id} {date} {category} : "
+            f"attendu {mismatch['expected']}, trouvé {mismatch['live']}"
+        )
+
+    click.echo(
+        f"{report['rollups']} agrégats attendus, "
+        f"{len(report['mismatches'])} écart(s) constaté(s)."
+    )
+    if check_only and report["mismatches"]:
+        raise SystemExit(1)
+    if not check_only:
+        click.echo("Agrégats reconstruits.")
+
+
+@ecotrace.command("rebuild-user-totals")
+@click.option(
+    "--check-only",
+    is_flag=True,
+    help="Compare les totaux sans les réécrire.",
+)
+def rebuild_user_totals(check_only):
+    """
+    Reconstruit les totaux cumulés de chaque utilisateur à partir des activités brutes.
+    """
+    from controllers.ledger import ActivityLedger
+
+    report = ActivityLedger.rebuild_user_totals(dry_run=check_only)
+
+    for mismatch in report["mismatches"]:
+        click.echo(
+            f"Écart utilisateur {mismatch['key']} : "
+            f"attendu {mismatch['expected']}, trouvé {mismatch['live']}"
+        )
+
+    click.echo(
+        f"{report['users']} utilisateur(s) avec des activités, "
+        f"{len(report['mismatches'])} écart(s) constaté(s)."
+    )
+    if check_only and report["mismatches"]:
+        raise SystemExit(1)
+    if not check_only:
+        click.echo("Totaux reconstruits.")
+
+
+@ecotrace.command("rebuild-prefix-index")
+@click.option(
+    "--check-only",
+    is_flag=True,
+    help="Compare l'index sans le réécrire.",
+)
+def rebuild_prefix_index(check_only):
+    """
+    Reconstruit l'index des sommes cumulées à partir des agrégats journaliers.
+    """
+    from controllers.prefix_index import PrefixSumIndex
+
+    report = PrefixSumIndex.rebuild(dry_run=check_only)
+
+    for mismatch in report["mismatches"]:
+        user_id, year = mismatch["key"]
+        click.echo(
+            f"Écart utilisateur {user_id} année {year} : "
+            f"attendu {mismatch['expected']}, trouvé {mismatch['live']}"
+        )
+
+    click.echo(
+        f"{report['users']} utilisateur(s), {report['years']} année(s) indexée(s), "
+        f"{len(report['mismatches'])} écart(s) constaté(s), "
+        f"{report['stale']} index à reconstruire."
+    )
+    if check_only and report["mismatches"]:
+        raise SystemExit(1)
+    if not check_only:
+        click.echo("Index reconstruit.")
+
+
+@ecotrace.command("rebuild-stats")
+def rebuild_stats():
+    """
+    Recalcule les compteurs globaux de la plateforme.
+    """
+    from controllers.stats import PlatformStatistics
+
+    row = PlatformStatistics.rebuild()
+    click.echo(
+        f"{row.user_count} utilisateurs, {row.activity_count} activités, "
+        f"{round(row.co2_total, 2)} kgCO2."
+    )
+
+
+@ecotrace.command("import-activities")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--email", required=True, help="Email de l'utilisateur destinataire.")
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["csv", "ndjson"]),
+    default=None,
+    help="Format du fichier (déduit de l'extension par défaut).",
+)
+@click.option("--batch-size", type=int, default=None, help="Nombre de lignes par transaction.")
+def import_activities(path, email, file_format, batch_size):
+    """
+    Importe des activités depuis un fichier CSV ou NDJSON.
+    """
+    from flask import current_app
+
+    from auth.models import User
+    from controllers.importer import ActivityImporter
+
+    user = User.query.filter_by(email=email).first()
+    if user is None:
+        raise click.ClickException(f"Aucun utilisateur avec l'email {email}.")
+
+    importer = ActivityImporter(
+        user.id,
+        batch_size=batch_size or current_app.config.get("IMPORT_BATCH_SIZE")
+    )
+    file_format = file_format or ActivityImporter.detect_format(path)
+
+    with open(path, encoding="utf-8-sig", newline="") as lines:
+        report = importer.run(lines, file_format)
+
+    for error in report["errors"]:
+        click.echo(f"Ligne {error['line']} : {' '.join(error['errors'])}")
+
+    click.echo(
+        f"{report['rows']} ligne(s) lue(s), {report['imported']} importée(s), "
+        f"{report['rejected']} rejetée(s)."
+    )
+
+
+@ecotrace.command("check-query-plans")
+@click.option("--email", default=None, help="Utilisateur utilisé pour les requêtes (le premier par défaut).")
+@click.option("--verbose", "-v", is_flag=True, help="Affiche le plan de chaque requête.")
+def check_query_plans(email, verbose):
+    """
+    Vérifie qu'aucune requête fréquente ne parcourt entièrement une table.
+    """
+    from auth.models import User
+    from controllers.query_plans import QueryPlanAudit
+
+    query = User.query.filter_by(email=email) if email else User.query.order_by(User.id)
+    user = query.first()
+    if email and user is None:
+        raise click.ClickException(f"Aucun utilisateur avec l'email {email}.")
+
+    report = QueryPlanAudit(user.id if user else 0).run()
+    failures = [item for item in report if item["full_scans"]]
+
+    for item in report:
+        if verbose or item["full_scans"]:
+            status = "ÉCHEC" if item["full_scans"] else "ok"
+            click.echo(f"[{status}] {item['path']} : {' '.join(item['statement'].split())[:120]}")
+            for detail in item["plan"]:
+                click.echo(f"    {detail}")
+
+    click.echo(
+        f"{len(report)} requête(s) analysée(s), "
+        f"{len(failures)} en parcours complet de table."
+    )
+    if failures:
+        raise SystemExit(1)
+
+
+@ecotrace.command("build-assets")
+@click.option("--no-compress", is_flag=True, help="Sans copies gzip ni brotli.")
+def build_assets(no_compress):
+    """
+    Construit les fichiers statiques et les templates de production.
+    """
+    from flask import current_app
+
+    from .assets import brotli, build_assets
+
+    report = build_assets(
+        current_app.static_folder,
+        current_app.template_folder,
+        current_app.config["ASSETS_BUILD_DIR"],
+        compress=not no_compress
+    )
+    click.echo(
+        f"{report['files']} fichier(s) statique(s) et {report['templates']} template(s) "
+        f"construits dans {current_app.config['ASSETS_BUILD_DIR']}."
+    )
+    click.echo(
+        f"Taille : {report['source_bytes']} -> {report['built_bytes']} octets, "
+        f"gzip {report['gzip_bytes']}, brotli {report['brotli_bytes']}."
+    )
+    if brotli is None and not no_compress:
+        click.echo("Module brotli absent : seules les copies gzip ont été écrites.")
+
+
+@ecotrace.command("monthly-report")
+@click.option("--month", type=click.IntRange(1, 12), default=None, help="Mois (le mois courant par défaut).")
+@click.option("--year", type=int, default=None, help="Année (l'année courante par défaut).")
+@click.option(
+    "--output",
+    type=click.File("w", encoding="utf-8"),
+    default="-",
+    help="Fichier CSV de sortie (sortie standard par défaut).",
+)
+def monthly_report(month, year, output):
+    """
+    Exporte en CSV les émissions du mois de chaque utilisateur actif (NumPy requis).
+    """
+    import calendar
+    import csv
+    from datetime import date, datetime
+
+    from auth.models import User
+    from controllers.batch_calculator import BatchCarbonCalculator
+
+    today = datetime.now().date()
+    month, year = month or today.month, year or today.year
+    start = date(year, month, 1)
+    end = date(year, month, calendar.monthrange(year, month)[1])
+
+    try:
+        calculator = BatchCarbonCalculator(start, end, granularity="month").run()
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+    totals = calculator.user_totals()
+    emails = dict(User.query.with_entities(User.id, User.email))
+
+    writer = csv.writer(output)
+    writer.writerow(["user_id", "email", "total", *BatchCarbonCalculator.CATEGORIES, "activities"])
+    for user_id, row in sorted(totals.items()):
+        writer.writerow([
+            user_id,
+            emails.get(user_id, ""),
+            row["total"],
+            *row["by_category"].values(),
+            row["activity_count"],
+        ])
+
+    click.echo(f"{len(totals)} utilisateur(s) actif(s) en {start:%m/%Y}.", err=True)
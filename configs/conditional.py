@@ -0,0 +1,102 @@
+from datetime import datetime
+from functools import wraps
+import hashlib
+from pathlib import Path
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+
+from carbon.registry import factor_catalog_version
+from controllers.ledger import ActivityLedger
+
+# Empreinte des templates et des fichiers construits, dans app.extensions
+DEPLOY_TAG = "ecotrace_deploy_tag"
+
+
+def _deploy_tag():
+    """
+    Empreinte des templates et du manifeste des fichiers construits
+
+    Une mise à jour des templates change l'ETag de toutes les pages :
+    les navigateurs ne gardent pas une page rendue avec l'ancienne version.
+    """
+    tag = current_app.extensions.get(DEPLOY_TAG)
+    if tag is None:
+        digest = hashlib.sha1()
+        paths = sorted(Path(current_app.template_folder).rglob("*.html"))
+        paths.append(Path(current_app.config["ASSETS_BUILD_DIR"]) / "manifest.json")
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+        tag = current_app.extensions[DEPLOY_TAG] = digest.hexdigest()[:12]
+    return tag
+
+
+def user_data_etag(user_id):
+    """
+    ETag des pages calculées à partir des données d'un utilisateur
+
+    L'ETag combine la version des données de l'utilisateur (incrémentée
+    par les ajouts, suppressions et imports), la version du catalogue des
+    facteurs, la date du jour (les panneaux « aujourd'hui », les fenêtres
+    glissantes changent à minuit) et l'empreinte des templates.
+
+    Returns:
+        str | None: ETag, None si l'utilisateur n'a pas de ligne de totaux (base non migrée)
+    """
+    version = ActivityLedger(user_id).data_version()
+    if version is None:
+        return None
+
+    key = ":".join([
+        str(user_id),
+        str(version),
+        str(factor_catalog_version()),
+        datetime.now().date().isoformat(),
+        _deploy_tag(),
+    ])
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def conditional_on_user_data(view=None, *, flashes=True):
+    """
+    Décorateur de vue : réponse 304 si les données n'ont pas changé
+
+    Si l'ETag envoyé par le navigateur (If-None-Match) correspond, la vue
+    n'est pas exécutée : ni calcul, ni rendu. Sinon la réponse porte
+    l'ETag et « Cache-Control: private, no-cache » pour que le navigateur
+    revalide à chaque affichage. À placer sous login_required.
+
+    Args:
+        flashes: La vue affiche les messages flash ; tant qu'il y en a en
+            attente, la page est rendue en entier (False pour le JSON)
+    """
+    if view is None:
+        return lambda view: conditional_on_user_data(view, flashes=flashes)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # Des messages flash en attente doivent être affichés par un rendu complet
+        if flashes and session.get("_flashes"):
+            return view(*args, **kwargs)
+
+        etag = user_data_etag(current_user.id)
+        if etag is None:
+            return view(*args, **kwargs)
+
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag, weak=True)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+
+    return wrapper
@@ -0,0 +1,161 @@
+from functools import partial
+
+from flask import current_app, g
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from .settings import db
+
+# Clé du moteur en lecture seule dans app.extensions
+READ_ENGINE = "ecotrace_read_engine"
+
+
+def is_sqlite_file(uri):
+    """Vrai pour une base SQLite sur disque (pas en mémoire)"""
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def configure_engines(app):
+    """
+    Complète la configuration des moteurs avant db.init_app
+
+    Avec SQLITE_TUNING, les réglages de SQLITE_POOL sont ajoutés aux
+    options des moteurs d'une base SQLite sur disque.
+    """
+    if app.config["SQLITE_TUNING"] and is_sqlite_file(app.config["SQLALCHEMY_DATABASE_URI"]):
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+            **app.config["SQLITE_POOL"],
+            **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+        }
+
+
+def sqlite_pragmas(config, read_only=False):
+    """
+    Pragmas exécutés à l'ouverture de chaque connexion
+
+    Args:
+        config: Configuration de l'application
+        read_only: Connexion du moteur de lecture
+
+    Returns:
+        list: Instructions PRAGMA, dans l'ordre d'exécution
+    """
+    pragmas = []
+
+    if config["SQLITE_TUNING"]:
+        # Le mode WAL est persistant dans le fichier : seul le moteur
+        # d'écriture le positionne
+        if not read_only and config["SQLITE_JOURNAL_MODE"]:
+            pragmas.append(f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}")
+        if config["SQLITE_SYNCHRONOUS"]:
+            pragmas.append(f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}")
+        pragmas.append(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT'])}")
+        pragmas.append(f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}")
+        pragmas.append(f"PRAGMA cache_size={int(config['SQLITE_CACHE_SIZE'])}")
+
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+
+    return pragmas
+
+
+def _apply_pragmas(dbapi_connection, connection_record, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in pragmas:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def init_engines(app):
+    """
+    Branche les pragmas SQLite sur les moteurs de l'application
+
+    Les pragmas sont appliqués par un événement « connect » : chaque
+    connexion du pool est réglée une seule fois, à son ouverture. Avec
+    SQLITE_READ_ENGINE, un second moteur en lecture seule est ouvert sur
+    le même fichier.
+    """
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name != "sqlite":
+            return
+
+        pragmas = sqlite_pragmas(app.config)
+        if pragmas:
+            event.listen(engine, "connect", partial(_apply_pragmas, pragmas=pragmas))
+
+        if app.config["SQLITE_READ_ENGINE"] and is_sqlite_file(str(engine.url)):
+            read_engine = create_engine(engine.url, **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+            event.listen(
+                read_engine,
+                "connect",
+                partial(_apply_pragmas, pragmas=sqlite_pragmas(app.config, read_only=True))
+            )
+            app.extensions[READ_ENGINE] = read_engine
+            app.teardown_appcontext(_close_read_session)
+
+
+def get_engines():
+    """
+    Moteurs de l'application courante
+
+    Returns:
+        list: Moteur principal, puis moteur de lecture s'il existe
+    """
+    engines = [db.engine]
+    if READ_ENGINE in current_app.extensions:
+        engines.append(current_app.extensions[READ_ENGINE])
+    return engines
+
+
+def upsert_insert(model, session=None):
+    """
+    INSERT acceptant ON CONFLICT (on_conflict_do_update / do_nothing)
+
+    La clause n'existe que dans les dialectes SQLite et PostgreSQL de
+    SQLAlchemy, avec la même API : l'instruction est construite pour le
+    dialecte du moteur de la session.
+
+    Args:
+        model: Modèle ou table cible
+        session: Session d'exécution (db.session par défaut)
+
+    Raises:
+        NotImplementedError: Autre base de données
+    """
+    dialect = (session or db.session).get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"Insertion avec ON CONFLICT non prise en charge pour {dialect}.")
+    return insert(model)
+
+
+def read_session():
+    """
+    Session des lectures (calculs, historique, recommandations)
+
+    Avec SQLITE_READ_ENGINE, une session propre à la requête sur le
+    moteur en lecture seule : en mode WAL, ces lectures n'attendent
+    jamais l'écrivain. Sinon, la session habituelle db.session.
+    """
+    read_engine = current_app.extensions.get(READ_ENGINE)
+    if read_engine is None:
+        return db.session
+
+    session = g.get("_ecotrace_read_session")
+    if session is None:
+        session = g._ecotrace_read_session = Session(read_engine, autoflush=False)
+    return session
+
+
+def _close_read_session(exc):
+    session = g.pop("_ecotrace_read_session", None)
+    if session is not None:
+        session.close()
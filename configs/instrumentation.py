@@ -0,0 +1,169 @@
+from collections import Counter
+import json
+import logging
+import time
+
+from flask import (
+    before_render_template,
+    current_app,
+    g,
+    has_app_context,
+    request,
+    request_started,
+    template_rendered
+)
+from flask.logging import default_handler
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("ecotrace.instrumentation")
+
+_listening = False
+
+
+class RequestTimings:
+    """Mesures accumulées pendant le traitement d'une requête"""
+
+    __slots__ = (
+        "start",
+        "queries",
+        "db_time",
+        "render_time",
+        "render_db_time",
+        "render_start",
+        "statements",
+    )
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_db_time = 0.0
+        self.render_start = None
+        self.statements = Counter()
+
+    def summary(self):
+        """
+        Répartition du temps de la requête
+
+        Returns:
+            dict: Nombre de requêtes SQL et durées en millisecondes
+        """
+        total = time.perf_counter() - self.start
+        # Le temps SQL passé pendant le rendu n'est compté qu'une fois
+        render = self.render_time - self.render_db_time
+        return {
+            "queries": self.queries,
+            "db": round(self.db_time * 1000, 2),
+            "render": round(render * 1000, 2),
+            "python": round((total - self.db_time - render) * 1000, 2),
+            "total": round(total * 1000, 2),
+        }
+
+
+def _current_timings():
+    if not has_app_context():
+        return None
+    return g.get("_ecotrace_timings")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_timings() is not None:
+        conn.info.setdefault("ecotrace_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = _current_timings()
+    starts = conn.info.get("ecotrace_query_start")
+    if timings is None or not starts:
+        return
+
+    duration = time.perf_counter() - starts.pop()
+    timings.queries += 1
+    timings.db_time += duration
+    timings.statements[statement] += 1
+    if timings.render_start is not None:
+        timings.render_db_time += duration
+
+
+def _request_started(sender, **extra):
+    g._ecotrace_timings = RequestTimings()
+
+
+def _before_render_template(sender, template, context, **extra):
+    timings = _current_timings()
+    if timings is not None and timings.render_start is None:
+        timings.render_start = time.perf_counter()
+
+
+def _template_rendered(sender, template, context, **extra):
+    timings = _current_timings()
+    if timings is not None and timings.render_start is not None:
+        timings.render_time += time.perf_counter() - timings.render_start
+        timings.render_start = None
+
+
+def _after_request(response):
+    timings = _current_timings()
+    if timings is None:
+        return response
+
+    summary = timings.summary()
+    response.headers.add(
+        "Server-Timing",
+        ", ".join([
+            f'db;dur={summary["db"]};desc="{summary["queries"]} SQL"',
+            f'render;dur={summary["render"]}',
+            f'app;dur={summary["python"]}',
+            f'total;dur={summary["total"]}',
+        ])
+    )
+
+    logger.info(json.dumps({
+        "method": request.method,
+        "path": request.path,
+        "endpoint": request.endpoint,
+        "status": response.status_code,
+        **summary,
+    }))
+
+    # Détection N+1 : même instruction répétée dans une requête
+    threshold = current_app.config["INSTRUMENTATION_N_PLUS_ONE"]
+    for statement, count in timings.statements.items():
+        if count > threshold:
+            logger.warning(json.dumps({
+                "n_plus_one": count,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "statement": " ".join(statement.split())[:300],
+            }))
+
+    return response
+
+
+def init_instrumentation(app):
+    """
+    Active l'instrumentation des requêtes sur l'application
+
+    Chaque réponse reçoit un en-tête Server-Timing (temps SQL, rendu,
+    Python et total) et une ligne de journal JSON. Une instruction SQL
+    exécutée plus de INSTRUMENTATION_N_PLUS_ONE fois dans une même
+    requête est signalée par un avertissement.
+    """
+    global _listening
+
+    if not logger.handlers:
+        logger.addHandler(default_handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    if not _listening:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _listening = True
+
+    request_started.connect(_request_started, app)
+    before_render_template.connect(_before_render_template, app)
+    template_rendered.connect(_template_rendered, app)
+    app.after_request(_after_request)
@@ -0,0 +1,269 @@
+from functools import wraps
+from threading import Lock, current_thread, local
+import time
+import weakref
+
+from flask import Response, g, has_request_context, request, request_started
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Seuils des histogrammes (en secondes)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METHOD_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Métriques exposées : nom -> (type, description, seuils)
+METRICS = {
+    "ecotrace_request_duration_seconds": (
+        "histogram", "Durée de traitement des requêtes HTTP par vue.", REQUEST_BUCKETS
+    ),
+    "ecotrace_db_queries_total": (
+        "counter", "Nombre de requêtes SQL exécutées par vue.", None
+    ),
+    "ecotrace_cache_requests_total": (
+        "counter", "Lectures des caches en mémoire (hit ou miss).", None
+    ),
+    "ecotrace_method_duration_seconds": (
+        "histogram", "Durée des méthodes de calcul et de recommandation.", METHOD_BUCKETS
+    ),
+}
+
+
+class MetricsRegistry:
+    """
+    Compteurs et histogrammes du processus, au format texte Prometheus.
+
+    Chaque thread écrit dans son propre fragment (dictionnaire local au
+    thread) : les mises à jour ne prennent aucun verrou. Le verrou ne sert
+    qu'à enregistrer un nouveau fragment et à les parcourir lors de
+    l'export, qui additionne les fragments. Le fragment d'un thread
+    terminé est versé dans un fragment de base puis oublié : le nombre de
+    fragments suit le nombre de threads vivants.
+    """
+
+    def __init__(self):
+        self._local = local()
+        self._shards = []
+        # Valeurs des threads terminés
+        self._base = {}
+        self._lock = Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            weakref.finalize(current_thread(), self._retire, shard)
+        return shard
+
+    def _retire(self, shard):
+        """Verse le fragment d'un thread terminé dans le fragment de base"""
+        with self._lock:
+            self._shards = [other for other in self._shards if other is not shard]
+            _merge(self._base, shard)
+
+    def inc(self, name, labels=(), value=1):
+        """Incrémente un compteur"""
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        """Ajoute une mesure à un histogramme"""
+        shard = self._shard()
+        key = (name, labels)
+        values = shard.get(key)
+        buckets = METRICS[name][2]
+        if values is None:
+            # Une case par seuil, puis +Inf, somme et nombre de mesures
+            values = shard[key] = [0] * (len(buckets) + 3)
+
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                values[index] += 1
+                break
+        else:
+            values[len(buckets)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def collect(self):
+        """
+        Additionne les fragments de tous les threads
+
+        Returns:
+            dict: Valeurs indexées par (nom, labels)
+        """
+        with self._lock:
+            shards = [self._base.copy()] + [shard.copy() for shard in self._shards]
+
+        totals = {}
+        for shard in shards:
+            _merge(totals, shard)
+        return totals
+
+    def reset(self):
+        """Remet toutes les métriques à zéro"""
+        with self._lock:
+            self._base.clear()
+            for shard in self._shards:
+                shard.clear()
+
+    def render(self):
+        """Export au format texte Prometheus (version 0.0.4)"""
+        totals = self.collect()
+        lines = []
+
+        for name, (kind, description, buckets) in METRICS.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            for (metric, labels), value in sorted(totals.items(), key=lambda item: item[0]):
+                if metric != name:
+                    continue
+                if kind == "counter":
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+
+                cumulative = 0
+                for bound, count in zip(buckets + ("+Inf",), value):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else _format_value(bound)
+                    lines.append(
+                        f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}"
+                    )
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-2])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {value[-1]}")
+
+        # Taux de succès des caches, dérivé des compteurs
+        lines.append("# HELP ecotrace_cache_hit_ratio Part des lectures servies par le cache.")
+        lines.append("# TYPE ecotrace_cache_hit_ratio gauge")
+        caches = {}
+        for (metric, labels), value in totals.items():
+            if metric == "ecotrace_cache_requests_total":
+                labels = dict(labels)
+                hits, count = caches.get(labels["cache"], (0, 0))
+                caches[labels["cache"]] = (
+                    hits + (value if labels["result"] == "hit" else 0),
+                    count + value
+                )
+        for cache, (hits, count) in sorted(caches.items()):
+            lines.append(
+                f"ecotrace_cache_hit_ratio{_format_labels((('cache', cache),))} "
+                f"{_format_value(hits / count if count else 0)}"
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+def _merge(totals, shard):
+    """Ajoute les valeurs d'un fragment (compteurs et histogrammes) à totals"""
+    for key, value in shard.items():
+        if isinstance(value, list):
+            current = totals.setdefault(key, [0] * len(value))
+            for index, count in enumerate(value):
+                current[index] += count
+        else:
+            totals[key] = totals.get(key, 0) + value
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry()
+
+# Vrai une fois init_metrics appelé (METRICS activé) : sinon rien n'est mesuré
+_enabled = False
+
+
+def record_cache(cache, hit):
+    """Compte une lecture de cache réussie ou manquée"""
+    if not _enabled:
+        return
+    registry.inc(
+        "ecotrace_cache_requests_total",
+        (("cache", cache), ("result", "hit" if hit else "miss"))
+    )
+
+
+def timed(name):
+    """
+    Décorateur mesurant la durée d'une méthode
+
+    Args:
+        name: Nom de la méthode dans les métriques (ex : CarbonCalculator.calculate_trend)
+    """
+    labels = (("method", name),)
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                registry.observe(
+                    "ecotrace_method_duration_seconds",
+                    labels,
+                    time.perf_counter() - start
+                )
+        return wrapper
+    return decorator
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        registry.inc(
+            "ecotrace_db_queries_total",
+            (("endpoint", request.endpoint or "none"),)
+        )
+
+
+def _request_started(sender, **extra):
+    g._ecotrace_metrics_start = time.perf_counter()
+
+
+def _teardown_request(exc):
+    start = g.pop("_ecotrace_metrics_start", None)
+    if start is None or request.endpoint == "metrics":
+        return
+    registry.observe(
+        "ecotrace_request_duration_seconds",
+        (("endpoint", request.endpoint or "none"), ("method", request.method)),
+        time.perf_counter() - start
+    )
+
+
+def metrics_view():
+    """Point d'accès lu par Prometheus"""
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_metrics(app):
+    """
+    Expose les métriques du processus sur /metrics et active les mesures
+
+    Avec plusieurs workers, chaque processus tient ses propres compteurs.
+    """
+    global _enabled
+
+    if not _enabled:
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _enabled = True
+
+    request_started.connect(_request_started, app)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -1,10 +1,13 @@
 from pathlib import Path
-import uuid
+import os
+import secrets
+import tempfile
+import time
 
+import click
 from flask import Flask, g
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, current_user
-from flask_minify import Minify
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -14,246 +17,272 @@ TEMPLATE_DIR = str(BASE_DIR / "assets/templates")
 # Dossier de statiques
 STATIC_DIR = str(BASE_DIR / "assets/static")
 
-# URI de la base de données
-DB_URI = f"sqlite:///{BASE_DIR}/db.sqlite3"
-
-# Création de l'application Flask
-app = Flask(
-    __name__, 
-    template_folder=TEMPLATE_DIR, 
-    static_folder=STATIC_DIR
-)
-
-# Clé secrète pour la session
-app.config["SECRET_KEY"] = str(uuid.uuid4())
-
-# Configuration de la base de données
-app.config["SQLALCHEMY_DATABASE_URI"] = DB_URI
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-db = SQLAlchemy(app)
-
-# Initialisation de Flask-Minify
-Minify(app=app, html=True, js=True, cssless=True)
-
-# Context processors
-from .processors import (
-    inject_total_users,
-    inject_total_activities,
-    inject_get_total_emissions,
-)
-
-app.context_processor(inject_total_users)
-app.context_processor(inject_total_activities)
-app.context_processor(inject_get_total_emissions)
-
-
-# Gestion des erreurs
-from .errors import (
-    page_not_found,
-    internal_server_error
-)
-app.register_error_handler(404, page_not_found)
-app.register_error_handler(500, internal_server_error)
-
-# Enregistrement des applications
-from auth.apps import auth
-from carbon.apps import carbon
-
-app.register_blueprint(auth, url_prefix="/auth")
-app.register_blueprint(carbon, url_prefix="/")
-
-from auth.models import User
-from carbon.models import EmissionFactor
-
-# Initialisation de la base de données
-@app.before_request
-def create_all():
-    db.create_all()
-
-    # Vérifier si les facteurs d'émission existent déjà
-    if EmissionFactor.query.count() == 0:
-        # Ajouter des facteurs d'émission par défaut
-        default_factors = [
-            # Transport
-            EmissionFactor(
-                category='transport', 
-                subcategory='voiture', 
-                activity_name='Voiture essence', 
-                unit='km', 
-                co2_factor=0.192, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='transport', 
-                subcategory='voiture', 
-                activity_name='Voiture diesel', 
-                unit='km', 
-                co2_factor=0.173, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='transport', 
-                subcategory='voiture', 
-                activity_name='Voiture électrique', 
-                unit='km', 
-                co2_factor=0.02, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='transport', 
-                subcategory='transport en commun', 
-                activity_name='Bus', 
-                unit='km', 
-                co2_factor=0.103, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='transport', 
-                subcategory='transport en commun', 
-                activity_name='Train', 
-                unit='km', 
-                co2_factor=0.0056, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='transport', 
-                subcategory='avion', 
-                activity_name='Avion', 
-                unit='km', 
-                co2_factor=0.285, 
-                source='ADEME'
-            ),
-            
-            # Alimentation
-            EmissionFactor(
-                category='food', 
-                subcategory='viande', 
-                activity_name='Boeuf', 
-                unit='kg', 
-                co2_factor=27.0, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='food', 
-                subcategory='viande', 
-                activity_name='Poulet', 
-                unit='kg', 
-                co2_factor=5.15, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='food', 
-                subcategory='viande', 
-                activity_name='Porc', 
-                unit='kg', 
-                co2_factor=5.8, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='food', 
-                subcategory='produits laitiers', 
-                activity_name='Fromage', 
-                unit='kg', 
-                co2_factor=5.3, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='food', 
-                subcategory='produits laitiers', 
-                activity_name='Lait', 
-                unit='L', 
-                co2_factor=0.94, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='food', 
-                subcategory='légumes', 
-                activity_name='Légumes locaux de saison', 
-                unit='kg', 
-                co2_factor=0.5, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='food', 
-                subcategory='légumes', 
-                activity_name='Légumes importés ou hors saison', 
-                unit='kg', 
-                co2_factor=2.7, 
-                source='ADEME'
-            ),
-            
-            # Énergie
-            EmissionFactor(
-                category='energy', 
-                subcategory='électricité', 
-                activity_name='Électricité (mix français)', 
-                unit='kWh', 
-                co2_factor=0.057, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='energy', 
-                subcategory='chauffage', 
-                activity_name='Gaz naturel', 
-                unit='kWh', 
-                co2_factor=0.205, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='energy', 
-                subcategory='chauffage', 
-                activity_name='Fioul domestique', 
-                unit='L', co2_factor=3.25, 
-                source='ADEME'
-            ),
-            
-            # Consommation
-            EmissionFactor(
-                category='consumption', 
-                subcategory='vêtements', 
-                activity_name='T-shirt', 
-                unit='unité', 
-                co2_factor=7.0, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='consumption', 
-                subcategory='vêtements', 
-                activity_name='Jean', 
-                unit='unité', 
-                co2_factor=25.0, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='consumption', 
-                subcategory='électronique', 
-                activity_name='Smartphone', 
-                unit='unité', 
-                co2_factor=80.0, 
-                source='ADEME'
-            ),
-            EmissionFactor(
-                category='consumption', 
-                subcategory='électronique', 
-                activity_name='Ordinateur portable', 
-                unit='unité', 
-                co2_factor=156.0, 
-                source='ADEME'
-            )
-        ]
-        
-        db.session.bulk_save_objects(default_factors)
-        db.session.commit()
+# Dossier d'instance (clé secrète générée, fichiers propres au déploiement)
+INSTANCE_DIR = str(BASE_DIR / "instance")
+
+# Dossier des migrations
+MIGRATIONS_DIR = str(BASE_DIR / "migrations")
+
+
+class Config:
+    """
+    Configuration par défaut.
+
+    Chaque valeur peut être surchargée par une variable d'environnement
+    préfixée par ECOTRACE_ (ex : ECOTRACE_SQLALCHEMY_DATABASE_URI,
+    ECOTRACE_SECRET_KEY, ECOTRACE_AUTO_INIT_DB=false).
+    """
+    # Clé secrète pour la session (générée et conservée dans le dossier
+    # d'instance si elle n'est pas fournie)
+    SECRET_KEY = None
+
+    # Configuration de la base de données
+    SQLALCHEMY_DATABASE_URI = f"sqlite:///{BASE_DIR}/db.sqlite3"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Profil SQLite appliqué à chaque connexion (ignoré pour les autres bases) :
+    # journal WAL, synchronisation allégée, attente des verrous, mémoire mappée
+    # et cache de pages (valeur négative : en Kio)
+    SQLITE_TUNING = True
+    SQLITE_JOURNAL_MODE = "WAL"
+    SQLITE_SYNCHRONOUS = "NORMAL"
+    SQLITE_BUSY_TIMEOUT = 5000
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE = -16000
+    SQLITE_POOL = {"pool_size": 10, "max_overflow": 20, "pool_timeout": 30}
+
+    # Moteur séparé en lecture seule (query_only) pour les calculs,
+    # l'historique et les recommandations
+    SQLITE_READ_ENGINE = False
+
+    # Durée de vie (en secondes) du cache des statistiques globales
+    PLATFORM_STATS_TTL = 60
+
+    # Taille des lots d'insertion pour l'import en masse
+    IMPORT_BATCH_SIZE = 1000
+
+    # Index des sommes cumulées par utilisateur, jour et catégorie : le
+    # résumé mensuel et la tendance se lisent en quelques accès au lieu
+    # d'agréger les agrégats journaliers. Après activation sur une base
+    # existante : `flask ecotrace rebuild-prefix-index`
+    PREFIX_INDEX = False
+
+    # Écriture différée des ajouts d'activités : un thread par processus
+    # les valide par groupes (au plus WRITE_BEHIND_BATCH_SIZE lignes ou
+    # toutes les WRITE_BEHIND_FLUSH_MS millisecondes) ; la requête attend
+    # la validation au plus WRITE_BEHIND_TIMEOUT secondes
+    WRITE_BEHIND = False
+    WRITE_BEHIND_BATCH_SIZE = 200
+    WRITE_BEHIND_FLUSH_MS = 5
+    WRITE_BEHIND_TIMEOUT = 10
+
+    # Création des tables et des facteurs par défaut à la première requête.
+    # En production, préférer `flask db upgrade` puis `flask ecotrace seed-factors`.
+    AUTO_INIT_DB = True
+
+    # Minification à la volée du HTML, du JS et du CSS des réponses, utilisée
+    # seulement si les fichiers n'ont pas été construits (build-assets)
+    MINIFY = True
+
+    # Fichiers statiques et templates construits par `flask ecotrace build-assets`
+    # (minifiés, nommés d'après leur empreinte, précompressés) et durée de
+    # cache de ces fichiers, en secondes
+    ASSETS_BUILD_DIR = str(BASE_DIR / "assets/build")
+    ASSETS_MAX_AGE = 365 * 24 * 3600
+
+    # Mesures par requête (en-tête Server-Timing et journal JSON)
+    INSTRUMENTATION = False
+
+    # Nombre d'exécutions d'une même instruction SQL au-delà duquel
+    # une requête est signalée (détection N+1)
+    INSTRUMENTATION_N_PLUS_ONE = 10
+
+    # Point d'accès /metrics au format Prometheus
+    METRICS = False
+
+
+# Extensions, liées à l'application par create_app
+db = SQLAlchemy()
+login_manager = LoginManager()
+
+
+def load_secret_key(instance_path):
+    """
+    Lit la clé secrète du dossier d'instance, ou la crée au premier lancement.
+
+    La clé est partagée par tous les workers et survit aux redémarrages :
+    les sessions restent valides. La clé est écrite entière dans un fichier
+    temporaire du même dossier, puis liée sous son nom définitif (os.link
+    échoue si le fichier existe déjà) : quand plusieurs processus démarrent
+    en même temps, un seul la crée et aucun ne lit un fichier à moitié écrit.
+    """
+    path = Path(instance_path) / "secret_key"
+    secret_key = _read_secret_key(path)
+    if secret_key:
+        return secret_key
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".secret_key-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.link(temp_path, path)
+        except FileExistsError:
+            # Créée entre-temps par un autre processus : c'est celle-ci qui compte
+            pass
+    finally:
+        os.unlink(temp_path)
+
+    return _read_secret_key(path)
+
+
+def _read_secret_key(path, attempts=50, delay=0.01):
+    """
+    Lit la clé secrète existante
+
+    Un fichier vide peut être en cours d'écriture par une version
+    antérieure (création puis écriture) : la lecture est retentée.
+
+    Returns:
+        str | None: Clé, None si le fichier n'existe pas
+
+    Raises:
+        RuntimeError: Fichier toujours vide après les tentatives
+    """
+    for _ in range(attempts):
+        try:
+            secret_key = path.read_text().strip()
+        except FileNotFoundError:
+            return None
+        if secret_key:
+            return secret_key
+        time.sleep(delay)
+
+    raise RuntimeError(f"Le fichier de clé secrète {path} est vide : supprimez-le pour en créer un nouveau.")
+
+
+def init_migrate(app):
+    """
+    Branche Flask-Migrate sur l'application, si ce n'est pas déjà fait.
+
+    Flask-Migrate importe Alembic, coûteux au démarrage : il n'est chargé
+    que pour les commandes `flask` et l'initialisation de la base
+    (AUTO_INIT_DB, en développement), jamais par les workers de production.
+    """
+    if "migrate" not in app.extensions:
+        from flask_migrate import Migrate
+        Migrate(app, db, directory=MIGRATIONS_DIR)
+
+
+def create_app(config=None):
+    """
+    Construit l'application Flask
+
+    Args:
+        config: Objet ou dictionnaire de configuration, appliqué après les
+            valeurs par défaut et les variables d'environnement
+
+    Returns:
+        Flask: Application prête à servir
+    """
+    app = Flask(
+        __name__,
+        template_folder=TEMPLATE_DIR,
+        static_folder=STATIC_DIR,
+        instance_path=INSTANCE_DIR
+    )
+
+    app.config.from_object(Config)
+    app.config.from_prefixed_env("ECOTRACE")
+    if isinstance(config, dict):
+        app.config.update(config)
+    elif config is not None:
+        app.config.from_object(config)
+
+    if not app.config["SECRET_KEY"]:
+        app.config["SECRET_KEY"] = load_secret_key(app.instance_path)
+
+    # Extensions
+    from .database import configure_engines, init_engines
+    configure_engines(app)
+    db.init_app(app)
+    init_engines(app)
+    login_manager.init_app(app)
+
+    # Migrations du schéma (flask db ...), seulement en ligne de commande
+    if click.get_current_context(silent=True) is not None:
+        init_migrate(app)
+
+    # Fichiers construits à l'avance ; sinon minification à la volée
+    from .assets import init_assets
+    if not init_assets(app) and app.config["MINIFY"]:
+        from flask_minify import Minify
+        Minify(app=app, html=True, js=True, cssless=True)
+
+    if app.config["INSTRUMENTATION"]:
+        from .instrumentation import init_instrumentation
+        init_instrumentation(app)
+
+    if app.config["METRICS"]:
+        from .metrics import init_metrics
+        init_metrics(app)
+
+    # Context processors
+    from .processors import (
+        inject_total_users,
+        inject_total_activities,
+        inject_get_total_emissions,
+    )
+
+    app.context_processor(inject_total_users)
+    app.context_processor(inject_total_activities)
+    app.context_processor(inject_get_total_emissions)
+
+    # Gestion des erreurs
+    from .errors import (
+        page_not_found,
+        internal_server_error
+    )
+    app.register_error_handler(404, page_not_found)
+    app.register_error_handler(500, internal_server_error)
+
+    # Commandes d'administration (flask ecotrace ...)
+    from .commands import ecotrace
+    app.cli.add_command(ecotrace)
+
+    # Enregistrement des applications
+    from auth.apps import auth
+    from carbon.apps import carbon
+
+    app.register_blueprint(auth, url_prefix="/auth")
+    app.register_blueprint(carbon, url_prefix="/")
+
+    # Initialisation de la base de données à la première requête
+    if app.config["AUTO_INIT_DB"]:
+        from .bootstrap import ensure_db
+        app.before_request(ensure_db)
+
+    app.before_request(get_current_user)
+
+    # Version du catalogue des facteurs relue à chaque requête
+    from carbon.registry import forget_factor_version
+    app.teardown_request(forget_factor_version)
+
+    return app
+
 
 # Configuration de Flask-Login
-login_manager = LoginManager(app)
 login_manager.login_view = "auth.login"
 login_manager.login_message = "La connexion est requise."
 
 @login_manager.user_loader
 def load_user(id):
+    from auth.models import User
     return User.query.get(id)
 
-@app.before_request
+
 def get_current_user():
-    g.user = current_user
\ No newline at end of file
+    g.user = current_user
@@ -1,17 +1,36 @@
 # controllers/calculator.py
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import calendar
 
-from carbon.models import Activity, EmissionFactor
+from flask import current_app
+from sqlalchemy import func
+
+from configs.metrics import timed
+from configs.database import read_session
+from carbon.models import DailyEmission
+from controllers.prefix_index import PrefixSumIndex
 
 
 class CarbonCalculator:
     """Classe pour calculer l'empreinte carbone des utilisateurs"""
     
+    CATEGORIES = ('transport', 'food', 'energy', 'consumption')
+
+    # Granularités de calculate_range (semaine ISO : du lundi au dimanche)
+    GRANULARITIES = ('day', 'week', 'month', 'year')
+
+    # Début de période calculé par SQLite, au format AAAA-MM-JJ
+    SQLITE_PERIODS = {
+        'week': lambda column: func.date(column, '-6 days', 'weekday 1'),
+        'month': lambda column: func.date(column, 'start of month'),
+        'year': lambda column: func.date(column, 'start of year'),
+    }
+    
     def __init__(self, user_id):
         """Initialisation avec l'ID utilisateur"""
         self.user_id = user_id
 
+    @timed("CarbonCalculator.calculate_daily_footprint")
     def calculate_daily_footprint(self, date):
         """
         Calcule l'empreinte carbone pour un jour spécifique
@@ -22,11 +41,19 @@ class CarbonCalculator:
         Returns:
             dict: Empreinte totale et répartition par catégorie
         """
-        # Récupérer toutes les activités de l'utilisateur pour ce jour
-        activities = Activity.query.filter_by(
-            user_id=self.user_id,
-            date=date
-        ).all()
+        # Lire les agrégats journaliers : une seule requête, une ligne
+        # par catégorie quel que soit le nombre d'activités du jour
+        rows = (
+            read_session().query(
+                DailyEmission.category,
+                DailyEmission.co2_total
+            )
+            .filter(
+                DailyEmission.user_id == self.user_id,
+                DailyEmission.date == date
+            )
+            .all()
+        )
         
         # Initialiser les compteurs
         total_emissions = 0
@@ -37,34 +64,13 @@ class CarbonCalculator:
             'consumption': 0
         }
         
-        # Calculer les émissions pour chaque activité
-        for activity in activities:
-            # Vérifier si emission_factor_id existe
-            if activity.emission_factor_id is None:
-                continue
-                
-            # Récupérer le facteur d'émission
-            emission_factor = EmissionFactor.query.get(activity.emission_factor_id)
-            
-            # Vérifier si le facteur d'émission existe
-            if emission_factor is None:
-                continue
-            
+        for category, emissions in rows:
             # Vérifier si la catégorie est valide
-            if emission_factor.category not in by_category:
-                continue
-            
-            # Calculer les émissions
-            try:
-                emissions = activity.quantity * emission_factor.co2_factor
-            except Exception as e:
+            if category not in by_category or emissions is None:
                 continue
             
-            # Ajouter au total
             total_emissions += emissions
-            
-            # Ajouter à la catégorie correspondante
-            by_category[emission_factor.category] += emissions
+            by_category[category] += emissions
         
         # Arrondir les valeurs pour l'affichage
         for category in by_category:
@@ -75,6 +81,7 @@ class CarbonCalculator:
             'by_category': by_category
         }
 
+    @timed("CarbonCalculator.calculate_weekly_trend")
     def calculate_weekly_trend(self):
         """
         Calcule la tendance des émissions sur les 7 derniers jours
@@ -82,26 +89,63 @@ class CarbonCalculator:
         Returns:
             list: Liste de dictionnaires avec la date et les émissions
         """
-        today = datetime.now().date()
-        start_date = today - timedelta(days=6)  # 7 jours au total
+        return self.calculate_trend(days=7)
+
+    @timed("CarbonCalculator.calculate_trend")
+    def calculate_trend(self, days=7, end_date=None):
+        """
+        Calcule la tendance des émissions sur une fenêtre glissante
         
-        # Liste pour stocker les résultats
-        daily_emissions = []
+        Toute la fenêtre est lue en une seule requête groupée par date ;
+        les jours sans activité sont complétés à zéro côté Python.
+        
+        Args:
+            days: Nombre de jours de la fenêtre (7, 30, 90...)
+            end_date: Dernier jour inclus (par défaut aujourd'hui)
+            
+        Returns:
+            list: Liste de dictionnaires avec la date et les émissions
+        """
+        end_date = end_date or datetime.now().date()
+        start_date = end_date - timedelta(days=max(days, 1) - 1)
+        
+        totals = None
+        if current_app.config["PREFIX_INDEX"]:
+            # Différences de sommes cumulées (None si l'index n'est pas à jour)
+            totals = PrefixSumIndex(self.user_id).daily_totals(start_date, end_date)
+        
+        if totals is None:
+            rows = (
+                read_session().query(
+                    DailyEmission.date,
+                    func.sum(DailyEmission.co2_total)
+                )
+                .filter(
+                    DailyEmission.user_id == self.user_id,
+                    DailyEmission.date >= start_date,
+                    DailyEmission.date <= end_date,
+                    DailyEmission.category.in_(self.CATEGORIES)
+                )
+                .group_by(DailyEmission.date)
+                .all()
+            )
+            totals = {day: emissions or 0 for day, emissions in rows}
         
-        # Calculer les émissions pour chaque jour
+        # Remplir chaque jour de la fenêtre, y compris ceux sans activité
+        daily_emissions = []
         current_date = start_date
 
-        while current_date <= today:
-            result = self.calculate_daily_footprint(current_date)
+        while current_date <= end_date:
             daily_emissions.append({
                 'date': current_date.strftime('%Y-%m-%d'),
                 'display_date': current_date.strftime('%d/%m'),
-                'emissions': round(result['total'], 2)
+                'emissions': round(totals.get(current_date, 0), 2)
             })
             current_date += timedelta(days=1)
         
         return daily_emissions
     
+    @timed("CarbonCalculator.calculate_monthly_summary")
     def calculate_monthly_summary(self, month=None, year=None):
         """
         Calcule le résumé des émissions pour un mois donné
@@ -123,12 +167,28 @@ class CarbonCalculator:
         first_day = datetime(year, month, 1).date()
         last_day = datetime(year, month, calendar.monthrange(year, month)[1]).date()
         
-        # Récupérer toutes les activités du mois
-        activities = Activity.query.filter(
-            Activity.user_id == self.user_id,
-            Activity.date >= first_day,
-            Activity.date <= last_day
-        ).all()
+        index_totals = None
+        if current_app.config["PREFIX_INDEX"]:
+            # Deux accès par catégorie (None si l'index n'est pas à jour)
+            index_totals = PrefixSumIndex(self.user_id).range_totals(first_day, last_day)
+        
+        if index_totals is not None:
+            rows = index_totals[0].items()
+        else:
+            # Agréger les agrégats journaliers du mois par catégorie
+            rows = (
+                read_session().query(
+                    DailyEmission.category,
+                    func.sum(DailyEmission.co2_total)
+                )
+                .filter(
+                    DailyEmission.user_id == self.user_id,
+                    DailyEmission.date >= first_day,
+                    DailyEmission.date <= last_day
+                )
+                .group_by(DailyEmission.category)
+                .all()
+            )
         
         # Initialiser les compteurs
         total_emissions = 0
@@ -139,16 +199,15 @@ class CarbonCalculator:
             'consumption': 0
         }
         
-        # Calculer les émissions pour chaque activité
-        for activity in activities:
-            emission_factor = EmissionFactor.query.get(activity.emission_factor_id)
-            emissions = activity.quantity * emission_factor.co2_factor
+        for category, emissions in rows:
+            if category not in by_category or emissions is None:
+                continue
             
             # Ajouter au total
             total_emissions += emissions
             
             # Ajouter à la catégorie correspondante
-            by_category[emission_factor.category] += emissions
+            by_category[category] += emissions
         
         # Calculer la moyenne journalière
         days_in_month = (last_day - first_day).days + 1
@@ -160,6 +219,148 @@ class CarbonCalculator:
             'by_category': {cat: round(val, 2) for cat, val in by_category.items()}
         }
     
+    @timed("CarbonCalculator.calculate_range")
+    def calculate_range(self, start_date, end_date, granularity='day'):
+        """
+        Calcule les émissions d'une période quelconque, par jour, semaine ISO, mois ou année
+        
+        Toutes les périodes sont lues en une seule requête groupée par
+        période et par catégorie (sous SQLite ; ailleurs, groupée par jour
+        puis regroupée côté Python). Les périodes sans activité sont
+        complétées à zéro ; la première et la dernière sont tronquées aux
+        bornes demandées.
+        
+        Args:
+            start_date: Premier jour inclus
+            end_date: Dernier jour inclus
+            granularity: 'day', 'week', 'month' ou 'year'
+            
+        Returns:
+            dict: Périodes (libellé, bornes, total), séries par catégorie
+                alignées sur les périodes, totaux de toute la plage
+            
+        Raises:
+            ValueError: Granularité inconnue ou plage inversée
+        """
+        if granularity not in self.GRANULARITIES:
+            raise ValueError(f"Granularité inconnue : {granularity}")
+        if start_date > end_date:
+            raise ValueError("La date de début doit précéder la date de fin.")
+        
+        column = DailyEmission.date
+        if granularity in self.SQLITE_PERIODS and read_session().get_bind().dialect.name == 'sqlite':
+            column = self.SQLITE_PERIODS[granularity](DailyEmission.date)
+        
+        rows = (
+            read_session().query(
+                column,
+                DailyEmission.category,
+                func.sum(DailyEmission.co2_total)
+            )
+            .filter(
+                DailyEmission.user_id == self.user_id,
+                DailyEmission.date >= start_date,
+                DailyEmission.date <= end_date,
+                DailyEmission.category.in_(self.CATEGORIES)
+            )
+            .group_by(column, DailyEmission.category)
+            .all()
+        )
+        
+        # (début de période, catégorie) -> émissions
+        totals = {}
+        for day, category, emissions in rows:
+            if isinstance(day, str):
+                day = date.fromisoformat(day)
+            key = (self._period_start(day, granularity), category)
+            totals[key] = totals.get(key, 0) + (emissions or 0)
+        
+        # Remplir chaque période de la plage, y compris celles sans activité
+        periods = []
+        series = {category: [] for category in self.CATEGORIES}
+        by_category = {category: 0 for category in self.CATEGORIES}
+        for period_start, label, first_day, last_day in self.iter_periods(start_date, end_date, granularity):
+            period_total = 0
+            
+            for category in self.CATEGORIES:
+                emissions = totals.get((period_start, category), 0)
+                series[category].append(round(emissions, 2))
+                by_category[category] += emissions
+                period_total += emissions
+            
+            periods.append({
+                'label': label,
+                'start': first_day.isoformat(),
+                'end': last_day.isoformat(),
+                'total': round(period_total, 2)
+            })
+        
+        return {
+            'granularity': granularity,
+            'start': start_date.isoformat(),
+            'end': end_date.isoformat(),
+            'periods': periods,
+            'series': series,
+            'total': round(sum(by_category.values()), 2),
+            'by_category': {cat: round(val, 2) for cat, val in by_category.items()}
+        }
+
+    @classmethod
+    def iter_periods(cls, start_date, end_date, granularity):
+        """
+        Périodes successives d'une plage, tronquées à ses bornes
+        
+        Yields:
+            tuple: (début de période, libellé, premier et dernier jours inclus)
+        """
+        period_start = cls._period_start(start_date, granularity)
+        while period_start <= end_date:
+            next_start = cls._next_period(period_start, granularity)
+            yield (
+                period_start,
+                cls._period_label(period_start, granularity),
+                max(period_start, start_date),
+                min(next_start - timedelta(days=1), end_date)
+            )
+            period_start = next_start
+
+    @staticmethod
+    def _period_start(day, granularity):
+        """Premier jour de la période contenant day"""
+        if granularity == 'week':
+            return day - timedelta(days=day.weekday())
+        if granularity == 'month':
+            return day.replace(day=1)
+        if granularity == 'year':
+            return day.replace(month=1, day=1)
+        return day
+
+    @staticmethod
+    def _next_period(period_start, granularity):
+        """Premier jour de la période suivante"""
+        if granularity == 'week':
+            return period_start + timedelta(days=7)
+        if granularity == 'month':
+            if period_start.month == 12:
+                return period_start.replace(year=period_start.year + 1, month=1)
+            return period_start.replace(month=period_start.month + 1)
+        if granularity == 'year':
+            return period_start.replace(year=period_start.year + 1)
+        return period_start + timedelta(days=1)
+
+    @staticmethod
+    def _period_label(period_start, granularity):
+        """Libellé d'une période : 2025-03-14, 2025-W11, 2025-03 ou 2025"""
+        if granularity == 'week':
+            iso_year, iso_week, _ = period_start.isocalendar()
+            return f"{iso_year}-W{iso_week:02d}"
+        if granularity == 'month':
+            return period_start.strftime('%Y-%m')
+        if granularity == 'year':
+            return period_start.strftime('%Y')
+        return period_start.isoformat()
+    
+    @timed("CarbonCalculator.compare_with_average")
     def compare_with_average(self):
         """
         Compare l'empreinte de l'utilisateur avec la moyenne nationale
@@ -0,0 +1,311 @@
+# controllers/history.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, tuple_
+
+from configs.database import read_session
+from carbon.models import Activity, DailyEmission
+from carbon.registry import get_factor_registry
+
+
+class ActivityHistory:
+    """
+    Lecture paginée de l'historique des activités d'un utilisateur.
+
+    La pagination se fait par curseur (date, id) : chaque page reprend
+    juste après la dernière ligne de la précédente, sans OFFSET, de sorte
+    que le coût d'une page ne dépend pas de la longueur de l'historique.
+    """
+
+    CATEGORIES = ('transport', 'food', 'energy', 'consumption')
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+    # Jours couverts par la série journalière du résumé (graphique)
+    CHART_DAYS = 90
+
+    def __init__(self, user_id):
+        """Initialisation avec l'ID utilisateur"""
+        self.user_id = user_id
+
+    @classmethod
+    def parse_filters(cls, args):
+        """
+        Extrait les filtres des paramètres de la requête
+
+        Args:
+            args: Paramètres de la requête (request.args)
+
+        Returns:
+            dict: Filtres valides (catégorie, dates, nom d'activité)
+        """
+        filters = {
+            'category': None,
+            'date_from': None,
+            'date_to': None,
+            'q': None,
+        }
+
+        category = args.get('category', '').strip()
+        if category in cls.CATEGORIES:
+            filters['category'] = category
+
+        for key in ('date_from', 'date_to'):
+            value = args.get(key, '').strip()
+            if value:
+                try:
+                    filters[key] = datetime.strptime(value, '%Y-%m-%d').date()
+                except ValueError:
+                    pass
+
+        q = args.get('q', '').strip()
+        if q:
+            filters['q'] = q[:100]
+
+        return filters
+
+    @staticmethod
+    def encode_cursor(activity_date, activity_id):
+        """Construit le curseur désignant une ligne de l'historique"""
+        return f"{activity_date.isoformat()}_{activity_id}"
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Décode un curseur (date, id)
+
+        Raises:
+            ValueError: Si le curseur est mal formé
+        """
+        date_str, _, id_str = cursor.partition('_')
+        return datetime.strptime(date_str, '%Y-%m-%d').date(), int(id_str)
+
+    def _factor_ids(self, filters):
+        """
+        Traduit les filtres catégorie et nom en identifiants de facteurs
+
+        Returns:
+            set | None: Identifiants autorisés, None si aucun filtre ne s'applique
+        """
+        if not filters.get('category') and not filters.get('q'):
+            return None
+
+        registry = get_factor_registry()
+        entries = (
+            registry.get_by_category(filters['category'])
+            if filters.get('category')
+            else registry.by_id.values()
+        )
+        if filters.get('q'):
+            needle = filters['q'].lower()
+            entries = [e for e in entries if needle in e.activity_name.lower()]
+
+        return {entry.id for entry in entries}
+
+    def _activity_query(self, filters, *columns):
+        """
+        Construit la requête des activités filtrées de l'utilisateur
+
+        Returns:
+            Query | None: Requête sur les colonnes demandées, None si aucun résultat possible
+        """
+        factor_ids = self._factor_ids(filters)
+        if factor_ids is not None and not factor_ids:
+            return None
+
+        query = read_session().query(*columns).filter(Activity.user_id == self.user_id)
+
+        if factor_ids is not None:
+            query = query.filter(Activity.emission_factor_id.in_(factor_ids))
+        if filters.get('date_from'):
+            query = query.filter(Activity.date >= filters['date_from'])
+        if filters.get('date_to'):
+            query = query.filter(Activity.date <= filters['date_to'])
+
+        return query
+
+    def page(self, filters, cursor=None, limit=None):
+        """
+        Retourne une page de l'historique, de la plus récente à la plus ancienne
+
+        Args:
+            filters: Filtres issus de parse_filters
+            cursor: Curseur de la dernière ligne déjà affichée
+            limit: Taille de la page
+
+        Returns:
+            tuple: (liste des activités, curseur de la page suivante ou None)
+        """
+        limit = min(max(limit or self.PAGE_SIZE, 1), self.MAX_PAGE_SIZE)
+
+        query = self._activity_query(
+            filters,
+            Activity.id,
+            Activity.date,
+            Activity.emission_factor_id,
+            Activity.quantity,
+            Activity.co2_emissions
+        )
+        if query is None:
+            return [], None
+
+        if cursor:
+            query = query.filter(tuple_(Activity.date, Activity.id) < cursor)
+
+        rows = (
+            query
+            .order_by(Activity.date.desc(), Activity.id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self.encode_cursor(rows[-1].date, rows[-1].id)
+
+        registry = get_factor_registry()
+        activities = []
+
+        for row in rows:
+            emission_factor = registry.get(row.emission_factor_id)
+            if emission_factor is None:
+                continue
+            activities.append({
+                'id': row.id,
+                'date': row.date,
+                'category': emission_factor.category,
+                'name': emission_factor.activity_name,
+                'quantity': row.quantity,
+                'unit': emission_factor.unit,
+                'emissions': round(row.co2_emissions or 0, 2)
+            })
+
+        return activities, next_cursor
+
+    def iter_rows(self, filters, chunk_size=1000):
+        """
+        Parcourt toutes les activités filtrées, de la plus ancienne à la plus récente
+
+        Les lignes sont lues par lots (yield_per) : la mémoire utilisée ne
+        dépend pas de la taille de l'historique.
+
+        Args:
+            filters: Filtres issus de parse_filters
+            chunk_size: Nombre de lignes lues par lot
+
+        Yields:
+            dict: Activité avec son facteur d'émission et ses émissions
+        """
+        query = self._activity_query(
+            filters,
+            Activity.id,
+            Activity.date,
+            Activity.emission_factor_id,
+            Activity.quantity,
+            Activity.co2_emissions,
+            Activity.created_at
+        )
+        if query is None:
+            return
+
+        registry = get_factor_registry()
+        rows = (
+            query
+            .order_by(Activity.date, Activity.id)
+            .execution_options(stream_results=True)
+            .yield_per(chunk_size)
+        )
+
+        for row in rows:
+            emission_factor = registry.get(row.emission_factor_id)
+            if emission_factor is None:
+                continue
+            yield {
+                'id': row.id,
+                'date': row.date.isoformat(),
+                'category': emission_factor.category,
+                'name': emission_factor.activity_name,
+                'quantity': row.quantity,
+                'unit': emission_factor.unit,
+                'co2_factor': emission_factor.co2_factor,
+                'emissions': round(row.co2_emissions or 0, 4),
+                'created_at': row.created_at.isoformat() if row.created_at else None,
+            }
+
+    def summary(self, filters):
+        """
+        Calcule les statistiques de l'historique filtré
+
+        Le nombre d'activités, le total, les dates extrêmes et la
+        répartition par catégorie portent sur tout l'historique filtré
+        (une ligne par catégorie). La série journalière du graphique est
+        limitée aux CHART_DAYS derniers jours de la période : sa taille ne
+        dépend pas de la longueur de l'historique. Sans filtre sur le nom,
+        la lecture se fait sur les agrégats journaliers ; sinon sur les
+        activités, en SQL.
+
+        Returns:
+            dict: Nombre d'activités, total, dates extrêmes, séries par jour et par catégorie
+        """
+        if filters.get('q'):
+            query = self._activity_query
+            day, category = Activity.date, Activity.category
+            emissions, activity_count = func.sum(Activity.co2_emissions), func.count(Activity.id)
+        else:
+            query = self._rollup_query
+            day, category = DailyEmission.date, DailyEmission.category
+            emissions, activity_count = func.sum(DailyEmission.co2_total), func.sum(DailyEmission.activity_count)
+
+        totals = query(filters, category, emissions, activity_count, func.min(day), func.max(day))
+        rows = totals.group_by(category).all() if totals is not None else []
+
+        count = 0
+        total = 0
+        by_category = {}
+        first_date = last_date = None
+
+        for row_category, row_emissions, row_count, row_first, row_last in rows:
+            count += row_count or 0
+            total += row_emissions or 0
+            by_category[row_category] = round(row_emissions or 0, 2)
+            first_date = min(first_date or row_first, row_first)
+            last_date = max(last_date or row_last, row_last)
+
+        by_day = []
+        if last_date is not None:
+            window = dict(
+                filters,
+                date_from=max(first_date, last_date - timedelta(days=self.CHART_DAYS - 1)),
+                date_to=last_date
+            )
+            by_day = [
+                {'date': row_day.isoformat(), 'emissions': round(row_emissions or 0, 2)}
+                for row_day, row_emissions in query(window, day, emissions).group_by(day).order_by(day)
+            ]
+
+        return {
+            'count': count,
+            'total': round(total, 2),
+            'first_date': first_date.isoformat() if first_date else None,
+            'last_date': last_date.isoformat() if last_date else None,
+            'by_day': by_day,
+            'by_category': by_category,
+        }
+
+    def _rollup_query(self, filters, *columns):
+        """
+        Construit la requête des agrégats journaliers filtrés de l'utilisateur
+
+        Returns:
+            Query: Requête sur les colonnes demandées
+        """
+        query = read_session().query(*columns).filter(DailyEmission.user_id == self.user_id)
+
+        if filters.get('category'):
+            query = query.filter(DailyEmission.category == filters['category'])
+        if filters.get('date_from'):
+            query = query.filter(DailyEmission.date >= filters['date_from'])
+        if filters.get('date_to'):
+            query = query.filter(DailyEmission.date <= filters['date_to'])
+
+        return query
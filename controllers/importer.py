@@ -0,0 +1,168 @@
+# controllers/importer.py
+import csv
+import json
+from datetime import datetime, timezone
+
+from configs.settings import db
+from carbon.models import Activity
+from carbon.registry import get_factor_registry
+from carbon.validators import ActivityValidator
+from controllers.ledger import ActivityLedger
+
+
+class ActivityImporter:
+    """
+    Import en masse d'activités au format CSV ou NDJSON.
+
+    Chaque ligne est validée avec les mêmes règles que le formulaire
+    d'ajout, contre le catalogue des facteurs en mémoire. Les lignes
+    valides sont insérées par lots (executemany), chaque lot formant une
+    transaction avec la mise à jour des agrégats. Une ligne invalide est
+    signalée sans interrompre l'import. Si l'écriture d'un lot échoue, ses
+    lignes sont reprises une à une et celles qui échouent encore sont
+    signalées comme rejetées.
+    """
+
+    FORMATS = ('csv', 'ndjson')
+    DEFAULT_BATCH_SIZE = 1000
+    # Nombre maximal d'erreurs détaillées conservées dans le rapport
+    MAX_REPORTED_ERRORS = 100
+
+    def __init__(self, user_id, batch_size=None):
+        """Initialisation avec l'ID utilisateur et la taille des lots"""
+        self.user_id = user_id
+        self.batch_size = max(batch_size or self.DEFAULT_BATCH_SIZE, 1)
+
+    @classmethod
+    def detect_format(cls, filename=None, mimetype=None):
+        """Devine le format d'après le nom de fichier ou le type MIME"""
+        name = (filename or '').lower()
+        if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in (mimetype or ''):
+            return 'ndjson'
+        return 'csv'
+
+    def iter_records(self, lines, file_format):
+        """
+        Décode les lignes du fichier
+
+        Yields:
+            tuple: (numéro de ligne, dictionnaire ou None si illisible)
+        """
+        if file_format == 'csv':
+            reader = csv.DictReader(lines)
+            for record in reader:
+                yield reader.line_num, record
+            return
+
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield line_number, record if isinstance(record, dict) else None
+
+    def run(self, lines, file_format='csv'):
+        """
+        Importe les activités
+
+        Args:
+            lines: Itérable de lignes de texte
+            file_format: 'csv' ou 'ndjson'
+
+        Returns:
+            dict: Nombre de lignes lues, importées, rejetées et détail des erreurs
+        """
+        if file_format not in self.FORMATS:
+            raise ValueError(f"Format '{file_format}' non pris en charge.")
+
+        validator = ActivityValidator(get_factor_registry(), require_category=False)
+        report = {
+            'rows': 0,
+            'imported': 0,
+            'rejected': 0,
+            'errors': [],
+        }
+        batch = []
+
+        for line_number, record in self.iter_records(lines, file_format):
+            report['rows'] += 1
+
+            if record is None:
+                errors = ["Ligne illisible."]
+            else:
+                errors, validated_data = validator.validate(record)
+
+            if errors:
+                self._reject(report, line_number, errors)
+                continue
+
+            batch.append((line_number, validated_data))
+            if len(batch) >= self.batch_size:
+                self._flush(batch, report)
+                batch = []
+
+        if batch:
+            self._flush(batch, report)
+
+        return report
+
+    def _reject(self, report, line_number, errors):
+        """Compte une ligne rejetée et conserve le détail de l'erreur"""
+        report['rejected'] += 1
+        if len(report['errors']) < self.MAX_REPORTED_ERRORS:
+            report['errors'].append({'line': line_number, 'errors': errors})
+
+    def _flush(self, batch, report):
+        """
+        Enregistre un lot de lignes validées
+
+        Args:
+            batch: Liste de couples (numéro de ligne, données validées)
+            report: Rapport d'import, mis à jour
+        """
+        try:
+            self._write([data for _, data in batch])
+        except Exception:
+            db.session.rollback()
+        else:
+            report['imported'] += len(batch)
+            return
+
+        # Le lot a échoué : reprise ligne par ligne pour isoler les lignes en cause
+        for line_number, data in batch:
+            try:
+                self._write([data])
+            except Exception:
+                db.session.rollback()
+                self._reject(report, line_number, ["Erreur lors de l'enregistrement de la ligne."])
+            else:
+                report['imported'] += 1
+
+    def _write(self, batch):
+        """Insère des activités et met à jour les agrégats, en une transaction"""
+        created_at = datetime.now(timezone.utc)
+        rows = []
+        deltas = {}
+
+        for data in batch:
+            emission_factor = data['emission_factor']
+            co2_emissions = data['quantity'] * emission_factor.co2_factor
+            rows.append({
+                'user_id': self.user_id,
+                'emission_factor_id': emission_factor.id,
+                'quantity': data['quantity'],
+                'date': data['date'],
+                'created_at': created_at,
+                'co2_emissions': co2_emissions,
+                'category': emission_factor.category,
+            })
+
+            key = (data['date'], emission_factor.category)
+            emissions, count = deltas.get(key, (0, 0))
+            deltas[key] = (emissions + co2_emissions, count + 1)
+
+        db.session.execute(Activity.__table__.insert(), rows)
+        ActivityLedger(self.user_id).apply_many(deltas)
+        db.session.commit()
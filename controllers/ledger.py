@@ -0,0 +1,346 @@
+# controllers/ledger.py
+from flask import current_app
+from sqlalchemy import case, func
+
+from configs.settings import db
+from configs.database import upsert_insert
+from carbon.models import Activity, DailyEmission, UserStats
+from controllers.prefix_index import PrefixSumIndex
+from controllers.stats import PlatformStatistics
+
+
+class ActivityLedger:
+    """
+    Maintient les agrégats dérivés des activités d'un utilisateur.
+
+    Deux niveaux d'agrégats sont tenus à jour : les totaux journaliers
+    par catégorie (daily_emissions) et les totaux cumulés de
+    l'utilisateur (user_stats), avec un numéro de version incrémenté à
+    chaque modification. Avec PREFIX_INDEX, l'index des sommes cumulées
+    (emission_prefix_sums) suit les mêmes deltas. Les méthodes d'écriture n'effectuent
+    aucun commit : elles écrivent dans la transaction courante,
+    l'appelant valide l'activité et ses agrégats en une seule fois.
+    """
+
+    def __init__(self, user_id):
+        """Initialisation avec l'ID utilisateur"""
+        self.user_id = user_id
+
+    def record(self, activity, emission_factor):
+        """
+        Prend en compte une activité nouvellement ajoutée
+
+        Les émissions et la catégorie sont enregistrées sur l'activité :
+        remove() retirera ces valeurs, quel que soit le facteur à ce moment.
+        """
+        activity.co2_emissions = activity.quantity * emission_factor.co2_factor
+        activity.category = emission_factor.category
+        self.apply(activity.date, activity.category, activity.co2_emissions, 1)
+
+    def remove(self, activity):
+        """Retire une activité supprimée des agrégats (valeurs enregistrées à l'ajout)"""
+        if activity.category is None:
+            # Facteur disparu avant la migration : l'activité n'est dans aucun agrégat
+            return
+        self.apply(activity.date, activity.category, -(activity.co2_emissions or 0), -1)
+
+    def apply(self, date, category, emissions, count):
+        """
+        Applique un delta à l'agrégat (utilisateur, date, catégorie)
+
+        Args:
+            date: Date de l'activité
+            category: Catégorie du facteur d'émission
+            emissions: Variation des émissions en kgCO2
+            count: Variation du nombre d'activités
+        """
+        self.apply_many({(date, category): (emissions, count)})
+
+        # Un agrégat vide n'a plus lieu d'être
+        if count < 0:
+            DailyEmission.query.filter(
+                DailyEmission.user_id == self.user_id,
+                DailyEmission.date == date,
+                DailyEmission.category == category,
+                DailyEmission.activity_count <= 0
+            ).delete(synchronize_session=False)
+
+    def apply_many(self, deltas):
+        """
+        Applique plusieurs deltas en une seule instruction (executemany)
+
+        Args:
+            deltas: dict {(date, catégorie): (émissions, nombre d'activités)}
+        """
+        if not deltas:
+            return
+
+        stmt = upsert_insert(DailyEmission)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'date', 'category'],
+            set_={
+                'co2_total': DailyEmission.co2_total + stmt.excluded.co2_total,
+                'activity_count': DailyEmission.activity_count + stmt.excluded.activity_count,
+            }
+        )
+        db.session.execute(
+            stmt,
+            [
+                {
+                    'user_id': self.user_id,
+                    'date': date,
+                    'category': category,
+                    'co2_total': emissions,
+                    'activity_count': count,
+                }
+                for (date, category), (emissions, count) in deltas.items()
+            ]
+        )
+
+        activities = sum(count for _, count in deltas.values())
+        emissions = sum(emissions for emissions, _ in deltas.values())
+
+        values = {
+            UserStats.co2_total: UserStats.co2_total + emissions,
+            UserStats.activity_count: UserStats.activity_count + activities,
+            UserStats.data_version: UserStats.data_version + 1,
+        }
+        if current_app.config["PREFIX_INDEX"]:
+            # Après l'écriture des agrégats : le verrou d'écriture est déjà pris
+            PrefixSumIndex(self.user_id).apply_many(deltas)
+            # L'index reste à jour s'il l'était avant cette modification
+            values[UserStats.prefix_version] = case(
+                (UserStats.prefix_version == UserStats.data_version, UserStats.data_version + 1),
+                else_=UserStats.prefix_version
+            )
+
+        # La ligne des totaux est créée à l'inscription (init_totals)
+        UserStats.query.filter_by(user_id=self.user_id).update(values, synchronize_session=False)
+        PlatformStatistics.apply(activities=activities, emissions=emissions)
+
+    def data_version(self):
+        """
+        Retourne la version des données de l'utilisateur
+
+        Returns:
+            int | None: Version, None si l'utilisateur n'a pas de ligne de totaux
+        """
+        return (
+            db.session.query(UserStats.data_version)
+            .filter(UserStats.user_id == self.user_id)
+            .scalar()
+        )
+
+    def totals(self):
+        """
+        Retourne les totaux cumulés de l'utilisateur
+
+        Returns:
+            tuple: (émissions totales en kgCO2, nombre d'activités)
+        """
+        row = db.session.get(UserStats, self.user_id)
+        if row is None:
+            # Pas de ligne (base antérieure non migrée) : lecture seule des agrégats
+            return self._totals_from_rollups()
+        return row.co2_total, row.activity_count
+
+    def _totals_from_rollups(self):
+        """Totaux cumulés calculés à partir des agrégats journaliers"""
+        return (
+            db.session.query(
+                func.coalesce(func.sum(DailyEmission.co2_total), 0),
+                func.coalesce(func.sum(DailyEmission.activity_count), 0)
+            )
+            .filter(DailyEmission.user_id == self.user_id)
+            .one()
+        )
+
+    def init_totals(self):
+        """
+        Crée la ligne des totaux cumulés d'un nouvel utilisateur (sans validation)
+
+        Appelé à l'inscription, dans la transaction qui crée l'utilisateur :
+        les écritures suivantes incrémentent cette ligne et sa version sert
+        d'ETag dès la première page. Sans activité, l'index des sommes
+        cumulées (vide) couvre la version 0 : il est lu dès la première écriture.
+        """
+        db.session.execute(
+            upsert_insert(UserStats)
+            .values(user_id=self.user_id, co2_total=0, activity_count=0, data_version=0, prefix_version=0)
+            .on_conflict_do_nothing(index_elements=['user_id'])
+        )
+
+    @staticmethod
+    def compute_daily_emissions():
+        """
+        Recalcule les agrégats journaliers à partir des activités brutes
+
+        Returns:
+            dict: Agrégats indexés par (user_id, date, catégorie)
+        """
+        rows = (
+            db.session.query(
+                Activity.user_id,
+                Activity.date,
+                Activity.category,
+                func.sum(Activity.co2_emissions),
+                func.count(Activity.id)
+            )
+            .filter(Activity.category.isnot(None))
+            .group_by(Activity.user_id, Activity.date, Activity.category)
+            .all()
+        )
+        return {
+            (user_id, date, category): (co2_total or 0, count)
+            for user_id, date, category, co2_total, count in rows
+        }
+
+    @staticmethod
+    def compute_user_totals():
+        """
+        Recalcule les totaux cumulés de chaque utilisateur à partir des activités brutes
+
+        Returns:
+            dict: Totaux (émissions, nombre d'activités) indexés par user_id
+        """
+        rows = (
+            db.session.query(
+                Activity.user_id,
+                func.sum(Activity.co2_emissions),
+                func.count(Activity.id)
+            )
+            .filter(Activity.category.isnot(None))
+            .group_by(Activity.user_id)
+            .all()
+        )
+        return {
+            user_id: (co2_total or 0, count)
+            for user_id, co2_total, count in rows
+        }
+
+    @classmethod
+    def rebuild(cls, dry_run=False, tolerance=1e-6):
+        """
+        Reconstruit la table des agrégats et la compare aux valeurs en place
+
+        Args:
+            dry_run: Si vrai, se contente de la comparaison
+            tolerance: Écart toléré sur les sommes en kgCO2
+
+        Returns:
+            dict: Nombre d'agrégats attendus et liste des écarts constatés
+        """
+        expected = cls.compute_daily_emissions()
+        live = {
+            (row.user_id, row.date, row.category): (row.co2_total, row.activity_count)
+            for row in DailyEmission.query.all()
+        }
+
+        mismatches = []
+        for key in expected.keys() | live.keys():
+            expected_co2, expected_count = expected.get(key, (0, 0))
+            live_co2, live_count = live.get(key, (0, 0))
+            if expected_count != live_count or abs(expected_co2 - live_co2) > tolerance:
+                mismatches.append({
+                    'key': key,
+                    'expected': (expected_co2, expected_count),
+                    'live': (live_co2, live_count),
+                })
+
+        if not dry_run:
+            # Les pages déjà servies ne sont plus à jour
+            UserStats.query.update(
+                {UserStats.data_version: UserStats.data_version + 1},
+                synchronize_session=False
+            )
+            DailyEmission.query.delete(synchronize_session=False)
+            if expected:
+                db.session.execute(
+                    DailyEmission.__table__.insert(),
+                    [
+                        {
+                            'user_id': user_id,
+                            'date': date,
+                            'category': category,
+                            'co2_total': co2_total,
+                            'activity_count': count,
+                        }
+                        for (user_id, date, category), (co2_total, count) in expected.items()
+                    ]
+                )
+            db.session.commit()
+
+            if current_app.config["PREFIX_INDEX"]:
+                # L'index est dérivé des agrégats journaliers
+                PrefixSumIndex.rebuild()
+
+        return {
+            'rollups': len(expected),
+            'mismatches': sorted(mismatches, key=lambda m: m['key']),
+        }
+
+    @classmethod
+    def rebuild_user_totals(cls, dry_run=False, tolerance=1e-6):
+        """
+        Reconstruit les totaux cumulés des utilisateurs et les compare aux valeurs en place
+
+        Args:
+            dry_run: Si vrai, se contente de la comparaison
+            tolerance: Écart toléré sur les sommes en kgCO2
+
+        Returns:
+            dict: Nombre de totaux attendus et liste des écarts constatés
+        """
+        expected = cls.compute_user_totals()
+        live = {}
+        versions = {}
+        prefix_versions = {}
+        for row in UserStats.query.all():
+            live[row.user_id] = (row.co2_total, row.activity_count)
+            versions[row.user_id] = row.data_version
+            prefix_versions[row.user_id] = row.prefix_version
+
+        mismatches = []
+        for user_id in expected.keys() | live.keys():
+            expected_co2, expected_count = expected.get(user_id, (0, 0))
+            live_co2, live_count = live.get(user_id, (0, 0))
+            if expected_count != live_count or abs(expected_co2 - live_co2) > tolerance:
+                mismatches.append({
+                    'key': user_id,
+                    'expected': (expected_co2, expected_count),
+                    'live': (live_co2, live_count),
+                })
+
+        if not dry_run:
+            from auth.models import User
+
+            # Les versions continuent de croître : une ligne n'est jamais
+            # recréée avec une version déjà servie. Chaque utilisateur a sa
+            # ligne, même sans activité.
+            UserStats.query.delete(synchronize_session=False)
+            user_ids = expected.keys() | live.keys() | {user_id for (user_id,) in db.session.query(User.id)}
+            if user_ids:
+                db.session.execute(
+                    UserStats.__table__.insert(),
+                    [
+                        {
+                            'user_id': user_id,
+                            'co2_total': expected.get(user_id, (0, 0))[0],
+                            'activity_count': expected.get(user_id, (0, 0))[1],
+                            'data_version': versions.get(user_id, 0) + 1,
+                            # L'index des sommes cumulées ne dépend pas de ces totaux
+                            'prefix_version': (
+                                versions[user_id] + 1
+                                if user_id in versions and prefix_versions[user_id] == versions[user_id]
+                                else None
+                            ),
+                        }
+                        for user_id in user_ids
+                    ]
+                )
+            db.session.commit()
+
+        return {
+            'users': len(expected),
+            'mismatches': sorted(mismatches, key=lambda m: m['key']),
+        }
@@ -0,0 +1,398 @@
+# controllers/prefix_index.py
+from array import array
+from datetime import date, timedelta
+import sys
+
+from sqlalchemy import and_, select
+
+from configs.settings import db
+from configs.database import read_session, upsert_insert
+from configs.metrics import timed
+from carbon.models import DailyEmission, EmissionPrefixSums, UserStats
+
+
+class PrefixSumIndex:
+    """
+    Index des sommes cumulées des émissions d'un utilisateur.
+
+    Une ligne emission_prefix_sums par utilisateur et par année contient
+    un tableau d'entiers 64 bits : pour chaque série (une par catégorie,
+    puis le nombre d'activités toutes catégories confondues) et chaque
+    jour de l'année, la somme depuis le 1er janvier. Les émissions sont
+    comptées en microgrammes : la différence de deux sommes est exacte et
+    ne dépend pas de l'ordre des mises à jour.
+
+    Le total d'une plage contenue dans une année se lit en deux accès et
+    une soustraction ; une plage sur plusieurs années ajoute le total des
+    années intermédiaires (dernier élément). Un ajout ou une suppression
+    antidatés ne réécrivent que la fin de l'année concernée.
+
+    L'index n'est lu que s'il couvre la version courante des données de
+    l'utilisateur (user_stats.prefix_version égal à data_version) ; sinon
+    les lectures retombent sur les agrégats journaliers.
+    """
+
+    CATEGORIES = ('transport', 'food', 'energy', 'consumption')
+    # Série du nombre d'activités, après celles des catégories
+    COUNT_SERIES = len(CATEGORIES)
+    SERIES = len(CATEGORIES) + 1
+    DAYS = 366
+    # Émissions stockées en microgrammes (1 kg = 10^9 µg)
+    SCALE = 10 ** 9
+
+    def __init__(self, user_id):
+        """Initialisation avec l'ID utilisateur"""
+        self.user_id = user_id
+
+    @classmethod
+    def empty(cls):
+        """Tableau d'une année sans activité"""
+        return array('q', bytes(8 * cls.SERIES * cls.DAYS))
+
+    @staticmethod
+    def unpack(blob):
+        """Tableau stocké (petit-boutiste) -> array('q')"""
+        sums = array('q')
+        sums.frombytes(blob)
+        if sys.byteorder == 'big':
+            sums.byteswap()
+        return sums
+
+    @staticmethod
+    def pack(sums):
+        """array('q') -> tableau stocké (petit-boutiste)"""
+        if sys.byteorder == 'big':
+            sums = array('q', sums)
+            sums.byteswap()
+        return sums.tobytes()
+
+    @staticmethod
+    def offset(day):
+        """Position du jour dans l'année (0 pour le 1er janvier)"""
+        return day.timetuple().tm_yday - 1
+
+    @classmethod
+    def year_changes(cls, deltas):
+        """
+        Convertit des deltas d'agrégats en variations par année, série et jour
+
+        Args:
+            deltas: dict {(date, catégorie): (émissions, nombre d'activités)}
+
+        Returns:
+            dict: {année: {(série, position du jour): variation entière}}
+        """
+        changes = {}
+        for (day, category), (emissions, count) in deltas.items():
+            year_changes = changes.setdefault(day.year, {})
+            offset = cls.offset(day)
+            if category in cls.CATEGORIES:
+                key = (cls.CATEGORIES.index(category), offset)
+                year_changes[key] = year_changes.get(key, 0) + round(emissions * cls.SCALE)
+            key = (cls.COUNT_SERIES, offset)
+            year_changes[key] = year_changes.get(key, 0) + count
+        return changes
+
+    @classmethod
+    def accumulate(cls, sums, year_changes):
+        """
+        Ajoute des variations journalières aux sommes cumulées d'une année
+
+        Chaque série modifiée est parcourue une seule fois, du premier
+        jour modifié à la fin de l'année, quel que soit le nombre de variations.
+        """
+        by_series = {}
+        for (series, offset), delta in year_changes.items():
+            by_series.setdefault(series, {})[offset] = delta
+
+        for series, day_deltas in by_series.items():
+            base = series * cls.DAYS
+            running = 0
+            for offset in range(min(day_deltas), cls.DAYS):
+                running += day_deltas.get(offset, 0)
+                sums[base + offset] += running
+        return sums
+
+    def apply_many(self, deltas):
+        """
+        Reporte des deltas sur les sommes cumulées
+
+        À appeler dans la transaction qui vient d'écrire les agrégats
+        journaliers : le verrou d'écriture SQLite est déjà pris, aucune
+        autre écriture ne s'intercale entre la lecture et la réécriture.
+
+        Args:
+            deltas: dict {(date, catégorie): (émissions, nombre d'activités)}
+        """
+        changes = self.year_changes(deltas)
+        if not changes:
+            return
+
+        current = dict(
+            db.session.query(EmissionPrefixSums.year, EmissionPrefixSums.sums)
+            .filter(
+                EmissionPrefixSums.user_id == self.user_id,
+                EmissionPrefixSums.year.in_(changes)
+            )
+            .all()
+        )
+
+        rows = []
+        for year, year_changes in changes.items():
+            sums = self.unpack(current[year]) if year in current else self.empty()
+            rows.append({
+                'user_id': self.user_id,
+                'year': year,
+                'sums': self.pack(self.accumulate(sums, year_changes)),
+            })
+
+        stmt = upsert_insert(EmissionPrefixSums)
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=['user_id', 'year'],
+                set_={'sums': stmt.excluded.sums}
+            ),
+            rows
+        )
+
+    def _load(self, first_year=None, last_year=None):
+        """
+        Lit les tableaux des années demandées et la version de l'index, en une requête
+
+        Returns:
+            dict | None: {année: tableau}, None si l'index n'est pas à jour
+        """
+        condition = EmissionPrefixSums.user_id == UserStats.user_id
+        if first_year is not None:
+            condition = and_(condition, EmissionPrefixSums.year.between(first_year, last_year))
+
+        rows = read_session().execute(
+            select(
+                UserStats.data_version,
+                UserStats.prefix_version,
+                EmissionPrefixSums.year,
+                EmissionPrefixSums.sums
+            )
+            .select_from(UserStats)
+            .outerjoin(EmissionPrefixSums, condition)
+            .where(UserStats.user_id == self.user_id)
+        ).all()
+
+        if not rows or rows[0].prefix_version != rows[0].data_version:
+            return None
+        return {row.year: self.unpack(row.sums) for row in rows if row.year is not None}
+
+    def _cumulative(self, sums_by_year, series, day):
+        """Somme d'une série du 1er janvier jusqu'au jour inclus"""
+        sums = sums_by_year.get(day.year)
+        if sums is None:
+            return 0
+        return sums[series * self.DAYS + self.offset(day)]
+
+    def _range(self, sums_by_year, series, start_date, end_date):
+        """Somme d'une série entre deux dates incluses"""
+        total = self._cumulative(sums_by_year, series, end_date)
+        # Années précédant celle de la fin : totaux annuels
+        for year in range(start_date.year, end_date.year):
+            sums = sums_by_year.get(year)
+            if sums is not None:
+                total += sums[(series + 1) * self.DAYS - 1]
+        if self.offset(start_date) > 0:
+            total -= self._cumulative(sums_by_year, series, start_date - timedelta(days=1))
+        return total
+
+    @timed("PrefixSumIndex.range_totals")
+    def range_totals(self, start_date, end_date):
+        """
+        Émissions par catégorie et nombre d'activités entre deux dates incluses
+
+        Returns:
+            tuple | None: (dict des émissions par catégorie, nombre d'activités),
+                None si l'index n'est pas à jour
+        """
+        sums_by_year = self._load(start_date.year, end_date.year)
+        if sums_by_year is None:
+            return None
+
+        by_category = {
+            category: self._range(sums_by_year, series, start_date, end_date) / self.SCALE
+            for series, category in enumerate(self.CATEGORIES)
+        }
+        return by_category, self._range(sums_by_year, self.COUNT_SERIES, start_date, end_date)
+
+    @timed("PrefixSumIndex.daily_totals")
+    def daily_totals(self, start_date, end_date):
+        """
+        Émissions de chaque jour (toutes catégories valides) entre deux dates incluses
+
+        Returns:
+            dict | None: {date: émissions}, None si l'index n'est pas à jour
+        """
+        sums_by_year = self._load(start_date.year, end_date.year)
+        if sums_by_year is None:
+            return None
+
+        categories = [series * self.DAYS for series in range(len(self.CATEGORIES))]
+        totals = {}
+        day = start_date
+        while day <= end_date:
+            # Jours d'une même année : positions consécutives du tableau
+            last = min(end_date, date(day.year, 12, 31))
+            first = self.offset(day)
+            sums = sums_by_year.get(day.year)
+            previous = 0
+            if sums is not None and first > 0:
+                previous = sum(sums[base + first - 1] for base in categories)
+
+            for position in range(first, first + (last - day).days + 1):
+                current = sum(sums[base + position] for base in categories) if sums is not None else 0
+                totals[day] = (current - previous) / self.SCALE
+                previous = current
+                day += timedelta(days=1)
+        return totals
+
+    @timed("PrefixSumIndex.lifetime_totals")
+    def lifetime_totals(self):
+        """
+        Émissions (catégories valides) et nombre d'activités depuis l'inscription
+
+        Returns:
+            tuple | None: (émissions totales, nombre d'activités), None si l'index n'est pas à jour
+        """
+        sums_by_year = self._load()
+        if sums_by_year is None:
+            return None
+
+        emissions = count = 0
+        for sums in sums_by_year.values():
+            emissions += sum(sums[(series + 1) * self.DAYS - 1] for series in range(len(self.CATEGORIES)))
+            count += sums[self.SERIES * self.DAYS - 1]
+        return emissions / self.SCALE, count
+
+    @classmethod
+    def compute(cls):
+        """
+        Recalcule l'index de chaque utilisateur à partir des agrégats journaliers
+
+        Les agrégats sont lus dans l'ordre de la clé primaire : un seul
+        utilisateur est gardé en mémoire à la fois.
+
+        Yields:
+            tuple: (user_id, {année: tableau})
+        """
+        rows = (
+            db.session.query(
+                DailyEmission.user_id,
+                DailyEmission.date,
+                DailyEmission.category,
+                DailyEmission.co2_total,
+                DailyEmission.activity_count
+            )
+            .order_by(DailyEmission.user_id, DailyEmission.date, DailyEmission.category)
+            .yield_per(10000)
+        )
+
+        user_id, deltas = None, {}
+        for row in rows:
+            if row.user_id != user_id:
+                if deltas:
+                    yield user_id, cls._build(deltas)
+                user_id, deltas = row.user_id, {}
+            deltas[(row.date, row.category)] = (row.co2_total or 0, row.activity_count or 0)
+        if deltas:
+            yield user_id, cls._build(deltas)
+
+    @classmethod
+    def _build(cls, deltas):
+        return {
+            year: cls.accumulate(cls.empty(), year_changes)
+            for year, year_changes in cls.year_changes(deltas).items()
+        }
+
+    @classmethod
+    def rebuild(cls, dry_run=False, tolerance=1e-6, batch_size=500):
+        """
+        Reconstruit l'index de tous les utilisateurs et le compare à l'index en place
+
+        Args:
+            dry_run: Si vrai, se contente de la comparaison
+            tolerance: Écart toléré sur les sommes en kgCO2
+            batch_size: Nombre d'utilisateurs écrits par instruction
+
+        Returns:
+            dict: Nombre d'utilisateurs et d'années indexés, écarts constatés,
+                nombre d'utilisateurs dont l'index n'est pas à jour
+        """
+        stale = (
+            UserStats.query
+            .filter((UserStats.prefix_version.is_(None)) | (UserStats.prefix_version != UserStats.data_version))
+            .count()
+        )
+        report = {'users': 0, 'years': 0, 'mismatches': [], 'stale': stale}
+
+        if not dry_run:
+            EmissionPrefixSums.query.delete(synchronize_session=False)
+
+        batch = []
+        for user_id, sums_by_year in cls.compute():
+            report['users'] += 1
+            report['years'] += len(sums_by_year)
+            batch.append((user_id, sums_by_year))
+            if len(batch) >= batch_size:
+                cls._flush(batch, dry_run, tolerance, report)
+                batch = []
+        cls._flush(batch, dry_run, tolerance, report)
+
+        if not dry_run:
+            UserStats.query.update(
+                {UserStats.prefix_version: UserStats.data_version},
+                synchronize_session=False
+            )
+            db.session.commit()
+
+        report['mismatches'].sort(key=lambda m: m['key'])
+        return report
+
+    @classmethod
+    def _flush(cls, batch, dry_run, tolerance, report):
+        """Écrit (ou compare) l'index d'un lot d'utilisateurs"""
+        if not batch:
+            return
+
+        if not dry_run:
+            db.session.execute(
+                EmissionPrefixSums.__table__.insert(),
+                [
+                    {'user_id': user_id, 'year': year, 'sums': cls.pack(sums)}
+                    for user_id, sums_by_year in batch
+                    for year, sums in sums_by_year.items()
+                ]
+            )
+            return
+
+        live = {
+            (row.user_id, row.year): cls.unpack(row.sums)
+            for row in EmissionPrefixSums.query.filter(
+                EmissionPrefixSums.user_id.in_([user_id for user_id, _ in batch])
+            )
+        }
+        # Arrondis : chaque ajout est converti séparément, la reconstruction par jour
+        limit = tolerance * cls.SCALE
+        emission_values = len(cls.CATEGORIES) * cls.DAYS
+        for user_id, sums_by_year in batch:
+            for year in sums_by_year.keys() | {y for u, y in live if u == user_id}:
+                expected = sums_by_year.get(year) or cls.empty()
+                found = live.get((user_id, year)) or cls.empty()
+                gap = max(abs(a - b) for a, b in zip(expected[:emission_values], found[:emission_values]))
+                if gap > limit or expected[emission_values:] != found[emission_values:]:
+                    report['mismatches'].append({
+                        'key': (user_id, year),
+                        'expected': cls._year_totals(expected),
+                        'live': cls._year_totals(found),
+                    })
+
+    @classmethod
+    def _year_totals(cls, sums):
+        """Total annuel (émissions, nombre d'activités) d'un tableau"""
+        emissions = sum(sums[(series + 1) * cls.DAYS - 1] for series in range(len(cls.CATEGORIES)))
+        return emissions / cls.SCALE, sums[cls.SERIES * cls.DAYS - 1]
@@ -0,0 +1,147 @@
+# controllers/query_plans.py
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import re
+
+from sqlalchemy import event
+
+from configs.database import get_engines
+from configs.settings import db
+
+
+class QueryPlanAudit:
+    """
+    Vérifie les plans d'exécution des requêtes fréquentes.
+
+    Chaque chemin critique (tableau de bord, historique, calculs,
+    recommandations, statistiques) est exécuté pour un utilisateur ; les
+    requêtes SELECT émises sont capturées puis passées à EXPLAIN QUERY
+    PLAN. Une requête qui parcourt entièrement une table au lieu
+    d'utiliser un index est signalée.
+    """
+
+    # Ligne de plan SQLite décrivant un parcours complet de table
+    FULL_SCAN = re.compile(r'^SCAN (\w+)')
+
+    # Tables de quelques lignes, lues entièrement par conception
+    SMALL_TABLES = {'platform_stats'}
+
+    def __init__(self, user_id):
+        """Initialisation avec l'ID de l'utilisateur utilisé pour les requêtes"""
+        self.user_id = user_id
+
+    def hot_paths(self):
+        """
+        Chemins critiques à auditer
+
+        Returns:
+            list: Couples (nom, fonction sans argument)
+        """
+        from carbon.models import EmissionFactor
+        from controllers.calculator import CarbonCalculator
+        from controllers.history import ActivityHistory
+        from controllers.ledger import ActivityLedger
+        from controllers.prefix_index import PrefixSumIndex
+        from controllers.recommendation import RecommendationEngine
+        from controllers.snapshot import DashboardSnapshot
+        from controllers.stats import PlatformStatistics
+
+        today = datetime.now().date()
+        calculator = CarbonCalculator(self.user_id)
+        history = ActivityHistory(self.user_id)
+        cursor = (today, 2 ** 31)
+        filters = {'category': None, 'date_from': None, 'date_to': None, 'q': None}
+        category_filters = dict(filters, category='transport', date_from=today - timedelta(days=30))
+        name_filters = dict(filters, q='voiture')
+
+        return [
+            ('dashboard_panels', lambda: DashboardSnapshot.load(self.user_id, trend_days=90)),
+            ('daily_footprint', lambda: calculator.calculate_daily_footprint(today)),
+            ('trend', lambda: calculator.calculate_trend(days=30)),
+            ('monthly_summary', lambda: calculator.calculate_monthly_summary()),
+            ('range_by_week', lambda: calculator.calculate_range(today - timedelta(days=365), today, 'week')),
+            ('recommendations', lambda: RecommendationEngine(self.user_id).get_personalized_recommendations()),
+            ('user_totals', lambda: ActivityLedger(self.user_id).totals()),
+            ('data_version', lambda: ActivityLedger(self.user_id).data_version()),
+            ('prefix_index', lambda: PrefixSumIndex(self.user_id).range_totals(today - timedelta(days=365), today)),
+            ('platform_stats', lambda: PlatformStatistics.invalidate() or PlatformStatistics.get()),
+            ('history_page', lambda: history.page(filters)),
+            ('history_page_cursor', lambda: history.page(category_filters, cursor=cursor)),
+            ('history_summary', lambda: history.summary(category_filters)),
+            ('history_summary_name', lambda: history.summary(name_filters)),
+            ('history_export', lambda: list(history.iter_rows(filters))),
+            ('factors_by_category', lambda: EmissionFactor.get_by_category('transport')),
+        ]
+
+    def _prepare(self):
+        """Initialise les compteurs et le catalogue, lus entièrement une seule fois"""
+        from carbon.registry import get_factor_registry
+        from controllers.ledger import ActivityLedger
+        from controllers.stats import PlatformStatistics
+
+        get_factor_registry()
+        PlatformStatistics.get()
+        ActivityLedger(self.user_id).totals()
+
+    @contextmanager
+    def _capture(self):
+        """Capture les requêtes SELECT émises sur les moteurs (écriture et lecture)"""
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+                statements.append((statement, parameters))
+
+        engines = get_engines()
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            for engine in engines:
+                event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    def explain(self, statement, parameters=()):
+        """
+        Retourne le plan d'exécution d'une requête
+
+        Returns:
+            list: Lignes de détail du plan SQLite
+        """
+        connection = db.session.connection()
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in rows]
+
+    def full_scans(self, plan):
+        """Liste les parcours complets de tables d'un plan"""
+        scans = []
+        for detail in plan:
+            match = self.FULL_SCAN.match(detail)
+            if match and match.group(1) not in self.SMALL_TABLES:
+                scans.append(detail)
+        return scans
+
+    def run(self):
+        """
+        Exécute l'audit
+
+        Returns:
+            list: Un rapport par requête (chemin, requête, plan, parcours complets)
+        """
+        report = []
+        self._prepare()
+
+        for name, path in self.hot_paths():
+            with self._capture() as statements:
+                path()
+
+            for statement, parameters in statements:
+                plan = self.explain(statement, parameters)
+                report.append({
+                    'path': name,
+                    'statement': statement,
+                    'plan': plan,
+                    'full_scans': self.full_scans(plan),
+                })
+
+        return report
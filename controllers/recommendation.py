@@ -1,15 +1,24 @@
 # controllers/recommendation.py
 from datetime import datetime, timedelta
-from carbon.models import Activity, EmissionFactor
+
+from sqlalchemy import func
+
+from configs.metrics import timed
+from configs.database import read_session
+from carbon.models import DailyEmission
 
 
 class RecommendationEngine:
     """Moteur de recommandations pour réduire l'empreinte carbone"""
     
+    # Période analysée (en jours)
+    LOOKBACK_DAYS = 30
+    
     def __init__(self, user_id):
         """Initialisation avec l'ID utilisateur"""
         self.user_id = user_id
         
+    @timed("RecommendationEngine.get_personalized_recommendations")
     def get_personalized_recommendations(self):
         """
         Génère des recommandations personnalisées basées sur l'historique de l'utilisateur
@@ -20,72 +29,84 @@ class RecommendationEngine:
         try:
             # Récupérer les activités récentes (30 derniers jours)
             today = datetime.now().date()
-            start_date = today - timedelta(days=30)
-            
-            recent_activities = Activity.query.filter(
-                Activity.user_id == self.user_id,
-                Activity.date >= start_date
-            ).all()
-            
-            # Si pas assez de données, retourner des recommandations génériques
-            if len(recent_activities) < 5:
-                return self._get_generic_recommendations()
-            
-            # Analyser les données pour identifier les domaines d'amélioration
-            emissions_by_category = {
-                'transport': 0,
-                'food': 0,
-                'energy': 0,
-                'consumption': 0
-            }
+            start_date = today - timedelta(days=self.LOOKBACK_DAYS)
             
-            # Calculer les émissions par catégorie
-            for activity in recent_activities:
-                # Vérifier si emission_factor_id existe et est valide
-                if activity.emission_factor_id is None:
-                    continue
-                    
-                # Récupérer le facteur d'émission
-                emission_factor = EmissionFactor.query.get(activity.emission_factor_id)
-                
-                # Vérifier si le facteur d'émission existe
-                if emission_factor is None:
-                    continue
-                
-                # Vérifier si la catégorie est valide
-                if emission_factor.category not in emissions_by_category:
-                    continue
-                
-                # Calculer les émissions
-                try:
-                    emissions = activity.quantity * emission_factor.co2_factor
-                    emissions_by_category[emission_factor.category] += emissions
-
-                except Exception as e:
-                    continue
-            
-            # Identifier la catégorie avec le plus d'émissions
-            if all(value == 0 for value in emissions_by_category.values()):
-                # Si toutes les catégories sont à 0, retourner des recommandations génériques
-                return self._get_generic_recommendations()
-                
-            max_category = max(emissions_by_category.items(), key=lambda x: x[1])[0]
+            # Lire les agrégats journaliers de la période par catégorie
+            rows = (
+                read_session().query(
+                    DailyEmission.category,
+                    func.sum(DailyEmission.co2_total),
+                    func.sum(DailyEmission.activity_count)
+                )
+                .filter(
+                    DailyEmission.user_id == self.user_id,
+                    DailyEmission.date >= start_date
+                )
+                .group_by(DailyEmission.category)
+                .all()
+            )
             
-            # Générer des recommandations spécifiques pour cette catégorie
-            category_recommendations = self._get_category_recommendations(max_category)
+            # Répartir les émissions par catégorie
+            emissions_by_category = {}
+            activity_count = 0
             
-            # Ajouter quelques recommandations génériques
-            generic_recommendations = self._get_generic_recommendations()[:2]
+            for category, emissions, count in rows:
+                activity_count += count or 0
+                emissions_by_category[category] = emissions or 0
             
-            # Combiner les recommandations
-            all_recommendations = category_recommendations + generic_recommendations
-            
-            return all_recommendations
+            return self.recommend_from_totals(emissions_by_category, activity_count)
         
         except Exception as e:
             # En cas d'erreur, retourner des recommandations génériques
             return self._get_generic_recommendations()
     
+    @timed("RecommendationEngine.recommend_from_totals")
+    def recommend_from_totals(self, emissions_by_category, activity_count):
+        """
+        Génère les recommandations à partir d'émissions déjà agrégées
+        
+        Args:
+            emissions_by_category: Émissions des 30 derniers jours par catégorie
+            activity_count: Nombre d'activités sur la période
+            
+        Returns:
+            list: Liste de recommandations
+        """
+        # Si pas assez de données, retourner des recommandations génériques
+        if activity_count < 5:
+            return self._get_generic_recommendations()
+        
+        # Analyser les données pour identifier les domaines d'amélioration
+        totals = {
+            'transport': 0,
+            'food': 0,
+            'energy': 0,
+            'consumption': 0
+        }
+        
+        for category, emissions in emissions_by_category.items():
+            # Vérifier si la catégorie est valide
+            if category not in totals or emissions is None:
+                continue
+            
+            totals[category] += emissions
+        
+        # Identifier la catégorie avec le plus d'émissions
+        if all(value == 0 for value in totals.values()):
+            # Si toutes les catégories sont à 0, retourner des recommandations génériques
+            return self._get_generic_recommendations()
+            
+        max_category = max(totals.items(), key=lambda x: x[1])[0]
+        
+        # Générer des recommandations spécifiques pour cette catégorie
+        category_recommendations = self._get_category_recommendations(max_category)
+        
+        # Ajouter quelques recommandations génériques
+        generic_recommendations = self._get_generic_recommendations()[:2]
+        
+        # Combiner les recommandations
+        return category_recommendations + generic_recommendations
+    
     def _get_category_recommendations(self, category):
         """
         Génère des recommandations spécifiques à une catégorie
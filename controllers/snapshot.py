@@ -0,0 +1,119 @@
+# controllers/snapshot.py
+from datetime import datetime, timedelta
+import calendar
+
+from configs.metrics import timed
+from configs.database import read_session
+from carbon.models import DailyEmission
+from controllers.recommendation import RecommendationEngine
+
+
+class DashboardSnapshot:
+    """
+    Instantané des données du tableau de bord d'un utilisateur.
+
+    Les agrégats journaliers de la fenêtre utile (30 derniers jours des
+    recommandations, mois en cours et fenêtre de tendance) sont lus en une
+    seule requête ; chaque panneau est ensuite dérivé en mémoire, au
+    format des méthodes de CarbonCalculator et de RecommendationEngine.
+    """
+
+    CATEGORIES = ('transport', 'food', 'energy', 'consumption')
+
+    def __init__(self, user_id, today=None, trend_days=7):
+        """Initialisation avec l'ID utilisateur (instantané vide tant que load n'est pas appelé)"""
+        self.user_id = user_id
+        self.today = today or datetime.now().date()
+        self.trend_days = max(trend_days, 1)
+
+        self.month_start = self.today.replace(day=1)
+        self.month_end = self.today.replace(
+            day=calendar.monthrange(self.today.year, self.today.month)[1]
+        )
+        self.window_start = min(
+            self.today - timedelta(days=RecommendationEngine.LOOKBACK_DAYS),
+            self.today - timedelta(days=self.trend_days - 1),
+            self.month_start,
+        )
+
+        # (date, catégorie) -> (émissions, nombre d'activités)
+        self.rows = {}
+
+    @classmethod
+    @timed("DashboardSnapshot.load")
+    def load(cls, user_id, today=None, trend_days=7):
+        """Construit l'instantané à partir de la base de données (une requête)"""
+        snapshot = cls(user_id, today=today, trend_days=trend_days)
+        rows = (
+            read_session().query(
+                DailyEmission.date,
+                DailyEmission.category,
+                DailyEmission.co2_total,
+                DailyEmission.activity_count
+            )
+            .filter(
+                DailyEmission.user_id == user_id,
+                DailyEmission.date >= snapshot.window_start
+            )
+            .all()
+        )
+        for day, category, co2_total, count in rows:
+            snapshot.rows[(day, category)] = (co2_total or 0, count or 0)
+        return snapshot
+
+    def _by_category(self, start_date, end_date=None):
+        """Somme des émissions par catégorie valide et nombre d'activités entre deux dates incluses"""
+        by_category = {category: 0 for category in self.CATEGORIES}
+        count = 0
+
+        for (day, category), (emissions, activity_count) in sorted(self.rows.items()):
+            if day < start_date or (end_date is not None and day > end_date):
+                continue
+            count += activity_count
+            if category in by_category:
+                by_category[category] += emissions
+
+        return by_category, count
+
+    def daily_footprint(self):
+        """Empreinte du jour, au format de CarbonCalculator.calculate_daily_footprint"""
+        by_category, _ = self._by_category(self.today, self.today)
+        return {
+            'total': sum(by_category.values()),
+            'by_category': {cat: round(val, 2) for cat, val in by_category.items()}
+        }
+
+    def trend(self):
+        """Tendance quotidienne, au format de CarbonCalculator.calculate_trend"""
+        totals = {}
+        for (day, category), (emissions, _) in self.rows.items():
+            if category in self.CATEGORIES:
+                totals[day] = totals.get(day, 0) + emissions
+
+        start_date = self.today - timedelta(days=self.trend_days - 1)
+        return [
+            {
+                'date': day.strftime('%Y-%m-%d'),
+                'display_date': day.strftime('%d/%m'),
+                'emissions': round(totals.get(day, 0), 2)
+            }
+            for day in (start_date + timedelta(days=offset) for offset in range(self.trend_days))
+        ]
+
+    def monthly_summary(self):
+        """Résumé du mois en cours, au format de CarbonCalculator.calculate_monthly_summary"""
+        by_category, _ = self._by_category(self.month_start, self.month_end)
+        total_emissions = sum(by_category.values())
+        days_in_month = (self.month_end - self.month_start).days + 1
+
+        return {
+            'total': round(total_emissions, 2),
+            'daily_average': round(total_emissions / days_in_month, 2),
+            'by_category': {cat: round(val, 2) for cat, val in by_category.items()}
+        }
+
+    def recommendations(self):
+        """Recommandations calculées sur les 30 derniers jours de l'instantané"""
+        start_date = self.today - timedelta(days=RecommendationEngine.LOOKBACK_DAYS)
+        by_category, count = self._by_category(start_date)
+        return RecommendationEngine(self.user_id).recommend_from_totals(by_category, count)
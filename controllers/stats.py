@@ -0,0 +1,138 @@
+# controllers/stats.py
+from collections import namedtuple
+from threading import Lock
+import time
+
+from flask import current_app
+from sqlalchemy import func
+
+from configs.metrics import record_cache
+from configs.settings import db
+from carbon.models import Activity, PlatformStats
+
+
+PlatformSnapshot = namedtuple(
+    "PlatformSnapshot",
+    ["total_users", "total_activities", "total_emissions"],
+)
+
+
+class PlatformStatistics:
+    """
+    Statistiques globales de la plateforme.
+
+    Les compteurs sont stockés dans la table platform_stats et mis à jour
+    par les chemins d'écriture (inscription, ajout et suppression
+    d'activités). Les lectures passent par un cache en mémoire dont la
+    durée de vie est fixée par PLATFORM_STATS_TTL (en secondes).
+    """
+    ROW_ID = 1
+    DEFAULT_TTL = 60
+
+    _cache = None
+    _lock = Lock()
+
+    @classmethod
+    def get(cls):
+        """
+        Retourne les statistiques globales, depuis le cache si possible
+
+        Returns:
+            PlatformSnapshot: Nombre d'utilisateurs, d'activités et émissions totales
+        """
+        cached = cls._cache
+        now = time.monotonic()
+        if cached is not None and cached[1] > now:
+            record_cache("platform_stats", True)
+            return cached[0]
+
+        with cls._lock:
+            cached = cls._cache
+            if cached is not None and cached[1] > now:
+                record_cache("platform_stats", True)
+                return cached[0]
+
+            record_cache("platform_stats", False)
+
+            row = db.session.get(PlatformStats, cls.ROW_ID)
+            if row is None:
+                # Ligne absente (base non initialisée) : lecture seule des tables brutes
+                snapshot = cls.compute()
+            else:
+                snapshot = PlatformSnapshot(
+                    row.user_count,
+                    row.activity_count,
+                    row.co2_total,
+                )
+            ttl = current_app.config.get("PLATFORM_STATS_TTL", cls.DEFAULT_TTL)
+            cls._cache = (snapshot, now + ttl)
+            return snapshot
+
+    @classmethod
+    def invalidate(cls):
+        """Vide le cache du processus"""
+        cls._cache = None
+
+    @classmethod
+    def apply(cls, users=0, activities=0, emissions=0):
+        """
+        Applique un delta aux compteurs dans la transaction courante
+
+        La ligne des compteurs est créée par init_db et par les migrations ;
+        si elle est absente, rien n'est écrit.
+        """
+        PlatformStats.query.filter_by(id=cls.ROW_ID).update(
+            {
+                PlatformStats.user_count: PlatformStats.user_count + users,
+                PlatformStats.activity_count: PlatformStats.activity_count + activities,
+                PlatformStats.co2_total: PlatformStats.co2_total + emissions,
+            },
+            synchronize_session=False
+        )
+
+    @staticmethod
+    def compute():
+        """
+        Calcule les compteurs à partir des tables brutes, sans rien écrire
+
+        Returns:
+            PlatformSnapshot: Nombre d'utilisateurs, d'activités et émissions totales
+        """
+        from auth.models import User
+
+        user_count = db.session.query(func.count(User.id)).scalar()
+        activity_count, co2_total = (
+            db.session.query(func.count(Activity.id), func.sum(Activity.co2_emissions))
+            .filter(Activity.category.isnot(None))
+            .one()
+        )
+        return PlatformSnapshot(user_count or 0, activity_count or 0, co2_total or 0)
+
+    @classmethod
+    def init(cls):
+        """Crée la ligne des compteurs si elle n'existe pas (initialisation de la base)"""
+        if db.session.get(PlatformStats, cls.ROW_ID) is None:
+            cls.rebuild()
+
+    @classmethod
+    def rebuild(cls):
+        """
+        Recalcule les compteurs à partir des tables brutes et les enregistre
+
+        Returns:
+            PlatformStats: Ligne des compteurs à jour
+        """
+        snapshot = cls.compute()
+
+        row = db.session.get(PlatformStats, cls.ROW_ID)
+        if row is None:
+            row = PlatformStats(id=cls.ROW_ID)
+            db.session.add(row)
+
+        row.user_count = snapshot.total_users
+        row.activity_count = snapshot.total_activities
+        row.co2_total = snapshot.total_emissions
+        db.session.commit()
+
+        cls.invalidate()
+        return row
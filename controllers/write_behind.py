@@ -0,0 +1,171 @@
+# controllers/write_behind.py
+from collections import namedtuple
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import datetime, timezone
+import os
+import queue
+from threading import Lock, Thread
+import time
+
+from flask import current_app
+
+from configs.settings import db
+from carbon.models import Activity
+from controllers.ledger import ActivityLedger
+
+
+PendingActivity = namedtuple(
+    "PendingActivity",
+    ["user_id", "emission_factor", "quantity", "date", "future"],
+)
+
+
+class ActivityWriteQueue:
+    """
+    Écriture différée et groupée des ajouts d'activités.
+
+    Les requêtes déposent leurs activités dans une file en mémoire ; un
+    unique thread écrivain les regroupe (au plus WRITE_BEHIND_BATCH_SIZE
+    lignes, ou ce qui est arrivé en WRITE_BEHIND_FLUSH_MS millisecondes)
+    et les insère avec la mise à jour des agrégats journaliers, des
+    totaux des utilisateurs et des statistiques globales en une seule
+    transaction : un seul fsync pour tout le groupe. Chaque requête
+    attend la validation de son groupe avant de répondre.
+
+    Une activité dont l'attente dépasse WRITE_BEHIND_TIMEOUT est annulée
+    avant que l'échec soit signalé : elle ne sera pas écrite plus tard, et
+    un nouvel essai de l'utilisateur ne crée pas de doublon. Si le thread
+    écrivain est arrêté, l'activité est écrite directement par la requête.
+    """
+
+    EXTENSION_KEY = "ecotrace_write_behind"
+
+    _lock = Lock()
+
+    def __init__(self, app):
+        """Initialisation avec l'application dont la configuration fixe la taille des groupes"""
+        self.app = app
+        self.batch_size = max(app.config["WRITE_BEHIND_BATCH_SIZE"], 1)
+        self.flush_delay = app.config["WRITE_BEHIND_FLUSH_MS"] / 1000
+        self.timeout = app.config["WRITE_BEHIND_TIMEOUT"]
+        self.pid = os.getpid()
+        self._queue = queue.SimpleQueue()
+        self._thread = Thread(target=self._run, name="ecotrace-write-behind", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def get(cls):
+        """
+        File de l'application courante, créée au premier ajout
+
+        Après un fork (workers gunicorn), chaque processus démarre sa
+        propre file et son propre thread écrivain.
+        """
+        app = current_app._get_current_object()
+        writer = app.extensions.get(cls.EXTENSION_KEY)
+        if writer is None or writer.pid != os.getpid():
+            with cls._lock:
+                writer = app.extensions.get(cls.EXTENSION_KEY)
+                if writer is None or writer.pid != os.getpid():
+                    writer = app.extensions[cls.EXTENSION_KEY] = cls(app)
+        return writer
+
+    def add(self, user_id, emission_factor, quantity, date):
+        """
+        Enregistre une activité et attend que son groupe soit validé
+
+        Args:
+            user_id: ID de l'utilisateur
+            emission_factor: Facteur d'émission (entrée du catalogue)
+            quantity: Quantité saisie
+            date: Date de l'activité
+
+        Raises:
+            Exception: Erreur de l'insertion, ou concurrent.futures.TimeoutError
+                si le groupe n'est pas validé à temps (l'activité n'est alors pas écrite)
+        """
+        future = Future()
+        pending = PendingActivity(user_id, emission_factor, quantity, date, future)
+
+        if not self._thread.is_alive():
+            # Thread écrivain arrêté : écriture synchrone, sans attendre le délai
+            future.set_running_or_notify_cancel()
+            self._flush([pending])
+            future.result()
+            return
+
+        self._queue.put(pending)
+        try:
+            future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # (exception distincte de TimeoutError avant Python 3.11)
+            # Pas encore prise en charge par l'écrivain : annulée, jamais écrite
+            if future.cancel():
+                raise
+            # Écriture déjà commencée : attendre son issue
+            future.result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_delay
+
+            # Regrouper ce qui arrive pendant le délai, sans dépasser la taille maximale
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Les activités annulées par leur requête (délai dépassé) sont écartées
+            batch = [pending for pending in batch if pending.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            with self.app.app_context():
+                self._flush(batch)
+
+    def _flush(self, batch):
+        """Insère un groupe d'activités et met à jour les agrégats, en une transaction"""
+        created_at = datetime.now(timezone.utc)
+        rows = []
+        deltas = {}
+
+        try:
+            for pending in batch:
+                emission_factor = pending.emission_factor
+                co2_emissions = pending.quantity * emission_factor.co2_factor
+                rows.append({
+                    'user_id': pending.user_id,
+                    'emission_factor_id': emission_factor.id,
+                    'quantity': pending.quantity,
+                    'date': pending.date,
+                    'created_at': created_at,
+                    'co2_emissions': co2_emissions,
+                    'category': emission_factor.category,
+                })
+
+                user_deltas = deltas.setdefault(pending.user_id, {})
+                key = (pending.date, emission_factor.category)
+                emissions, count = user_deltas.get(key, (0, 0))
+                user_deltas[key] = (emissions + co2_emissions, count + 1)
+
+            db.session.execute(Activity.__table__.insert(), rows)
+            for user_id, user_deltas in deltas.items():
+                ActivityLedger(user_id).apply_many(user_deltas)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if len(batch) > 1:
+                # Isoler la ligne fautive : les autres sont validées une à une
+                for pending in batch:
+                    self._flush([pending])
+            else:
+                batch[0].future.set_exception(e)
+            return
+
+        for pending in batch:
+            pending.future.set_result(True)
@@ -0,0 +1,25 @@
+"""
+Configuration gunicorn : application chargée une fois dans le processus
+maître (preload) puis partagée par les workers à la création (fork).
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("ECOTRACE_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("ECOTRACE_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+
+def post_fork(server, worker):
+    """
+    Les connexions ouvertes par le processus maître ne doivent pas être
+    partagées : chaque worker repart d'un pool vide.
+    """
+    from configs.database import get_engines
+    from wsgi import app
+
+    with app.app_context():
+        for engine in get_engines():
+            engine.dispose(close=False)
@@ -1,4 +1,6 @@
-from configs.settings import app
+from configs.settings import create_app
+
+app = create_app()
 
 if __name__ == "__main__":
-    app.run(debug=False)
\ No newline at end of file
+    app.run(debug=False)
@@ -0,0 +1,122 @@
+from contextlib import contextmanager
+import contextvars
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from configs.settings import create_app, db
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Application sur une base SQLite temporaire, initialisée (tables et facteurs)"""
+    from carbon.registry import invalidate_factor_registry
+    from configs.bootstrap import init_db
+    from controllers.stats import PlatformStatistics
+
+    app = create_app({
+        "TESTING": True,
+        "SECRET_KEY": "test",
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'ecotrace.sqlite3'}",
+        "WTF_CSRF_ENABLED": False,
+        "MINIFY": False,
+        "ASSETS_BUILD_DIR": str(tmp_path / "build"),
+    })
+    with app.app_context():
+        invalidate_factor_registry()
+        init_db()
+        PlatformStatistics.invalidate()
+        yield app
+        db.session.remove()
+    PlatformStatistics.invalidate()
+
+
+@pytest.fixture
+def user(app):
+    """Utilisateur inscrit par le formulaire d'inscription, sans activité"""
+    from auth.models import User
+
+    app.test_client().post("/auth/register/", data={
+        "name": "Test",
+        "email": "test@ecotrace.fr",
+        "password": "secret123",
+        "confirm_password": "secret123",
+    })
+    return User.query.filter_by(email="test@ecotrace.fr").one()
+
+
+@pytest.fixture
+def factor(app):
+    """Facteur d'émission du catalogue (Voiture essence)"""
+    from carbon.registry import get_factor_registry
+
+    return get_factor_registry().get_by_category("transport")[0]
+
+
+@pytest.fixture
+def client(app, user):
+    """Client de test connecté avec l'utilisateur de test"""
+    client = app.test_client()
+    client.post("/auth/login/", data={"email": user.email, "password": "secret123"})
+    return client
+
+
+def add_activity(user_id, factor, quantity, day=None):
+    """Ajoute une activité comme AddActivityView, agrégats compris"""
+    from carbon.models import Activity
+    from controllers.ledger import ActivityLedger
+
+    activity = Activity(
+        user_id=user_id,
+        emission_factor_id=factor.id,
+        quantity=quantity,
+        date=day or date.today()
+    )
+    db.session.add(activity)
+    ActivityLedger(user_id).record(activity, factor)
+    db.session.commit()
+    return activity
+
+
+@contextmanager
+def count_statements():
+    """
+    Compte les instructions SQL émises sur les moteurs de l'application
+
+    Yields:
+        list: Instructions exécutées, remplie au fil du bloc
+    """
+    from configs.database import get_engines
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = get_engines()
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def counted_get(client, url, **kwargs):
+    """
+    Requête GET et instructions SQL émises, comme sur un serveur
+
+    Le fixture app garde un contexte d'application pour tout le test : les
+    requêtes du client le réutiliseraient, avec sa session (table
+    d'identité) et g (utilisateur mis en cache par Flask-Login). La
+    requête est exécutée dans un contexte vide : Flask pousse un nouveau
+    contexte d'application, comme pour chaque requête en production.
+
+    Returns:
+        tuple: (réponse, instructions exécutées)
+    """
+    with count_statements() as statements:
+        response = contextvars.Context().run(client.get, url, **kwargs)
+    return response, statements
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+import random
+
+import pytest
+
+from configs.settings import db
+from auth.models import User
+from carbon.models import EmissionFactor
+from carbon.registry import get_factor_registry
+from controllers.batch_calculator import BatchCarbonCalculator
+from controllers.calculator import CarbonCalculator
+from controllers.ledger import ActivityLedger
+
+from tests.conftest import add_activity
+
+pytest.importorskip("numpy")
+
+# Plage à cheval sur deux années : semaines ISO et mois tronqués aux bornes
+START = date(2024, 12, 18)
+END = date(2025, 3, 11)
+
+
+def register(name):
+    """Utilisateur avec sa ligne de totaux, comme à l'inscription"""
+    user = User(name=name, email=f"{name.lower()}@ecotrace.fr", password="secret123")
+    db.session.add(user)
+    db.session.flush()
+    ActivityLedger(user.id).init_totals()
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def seeded_users(app):
+    """Deux utilisateurs actifs (activités aléatoires, facteur modifié en cours de route) et un inactif"""
+    rng = random.Random(20250311)
+    factors = [
+        factor
+        for category in CarbonCalculator.CATEGORIES
+        for factor in get_factor_registry().get_by_category(category)[:2]
+    ]
+    active = [register("Alice"), register("Bruno")]
+    idle = register("Chloe")
+
+    def add_random(count):
+        for _ in range(count):
+            # Quelques activités hors plage, pour vérifier les bornes
+            day = START + timedelta(days=rng.randint(-10, (END - START).days + 10))
+            add_activity(rng.choice(active).id, rng.choice(factors), round(rng.uniform(0.1, 50), 3), day)
+
+    add_random(60)
+    # Modification d'un facteur : les activités déjà saisies gardent leurs émissions
+    edited = db.session.get(EmissionFactor, factors[0].id)
+    edited.co2_factor *= 3
+    db.session.commit()
+    for _ in range(10):
+        day = START + timedelta(days=rng.randint(0, (END - START).days))
+        add_activity(rng.choice(active).id, edited, round(rng.uniform(0.1, 50), 3), day)
+    add_random(30)
+
+    return active + [idle]
+
+
+@pytest.mark.parametrize("granularity", CarbonCalculator.GRANULARITIES)
+def test_user_range_matches_calculate_range(seeded_users, granularity):
+    batch = BatchCarbonCalculator(START, END, granularity, chunk_size=16).run()
+
+    for user in seeded_users:
+        assert batch.user_range(user.id) == CarbonCalculator(user.id).calculate_range(START, END, granularity)
+
+    assert all(batch.user_range(user.id)['total'] > 0 for user in seeded_users[:-1])
+    idle = batch.user_range(seeded_users[-1].id)
+    assert idle['total'] == 0
+    assert len(idle['periods']) == len(list(CarbonCalculator.iter_periods(START, END, granularity)))
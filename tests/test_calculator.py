@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+from configs.settings import db
+from controllers.calculator import CarbonCalculator
+from controllers.ledger import ActivityLedger
+from carbon.models import Activity
+from tests.conftest import add_activity, count_statements
+
+
+def test_daily_footprint_is_one_statement(user, factor):
+    today = date.today()
+    for quantity in (10, 20, 30):
+        add_activity(user.id, factor, quantity, today)
+    add_activity(user.id, factor, 5, today - timedelta(days=1))
+
+    calculator = CarbonCalculator(user.id)
+    with count_statements() as statements:
+        footprint = calculator.calculate_daily_footprint(today)
+
+    assert len(statements) == 1
+    assert footprint["total"] == 60 * factor.co2_factor
+    assert footprint["by_category"]["transport"] == round(60 * factor.co2_factor, 2)
+    assert footprint["by_category"]["food"] == 0
+
+
+def test_daily_footprint_without_activity(user):
+    calculator = CarbonCalculator(user.id)
+    with count_statements() as statements:
+        footprint = calculator.calculate_daily_footprint(date.today())
+
+    assert len(statements) == 1
+    assert footprint == {
+        "total": 0,
+        "by_category": {"transport": 0, "food": 0, "energy": 0, "consumption": 0},
+    }
+
+
+def test_record_writes_one_statement_per_aggregate(user, factor):
+    activity = Activity(user_id=user.id, emission_factor_id=factor.id, quantity=12, date=date.today())
+    ledger = ActivityLedger(user.id)
+    with count_statements() as statements:
+        # Comme AddActivityView : l'activité est insérée avec ses émissions
+        db.session.add(activity)
+        ledger.record(activity, factor)
+        db.session.flush()
+
+    # activities, daily_emissions (upsert), user_stats, platform_stats : pas de lecture préalable
+    assert len(statements) == 4
+    assert statements[0].startswith("INSERT INTO activities")
+    assert all(not statement.lstrip().upper().startswith("SELECT") for statement in statements)
+    db.session.commit()
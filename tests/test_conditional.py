@@ -0,0 +1,29 @@
+from carbon.models import UserStats
+from configs.settings import db
+
+from tests.conftest import add_activity
+
+
+def test_registration_creates_user_totals(user):
+    stats = db.session.get(UserStats, user.id)
+
+    assert stats is not None
+    assert (stats.co2_total, stats.activity_count) == (0, 0)
+
+
+def test_new_user_dashboard_is_revalidated(client):
+    first = client.get("/auth/api/footprint/daily/")
+    assert first.status_code == 200
+    assert first.headers.get("ETag")
+
+    second = client.get("/auth/api/footprint/daily/", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+
+
+def test_activity_changes_etag(client, user, factor):
+    first = client.get("/auth/api/footprint/daily/")
+    add_activity(user.id, factor, 10)
+
+    second = client.get("/auth/api/footprint/daily/", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
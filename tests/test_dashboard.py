@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+
+import pytest
+
+from tests.conftest import add_activity, counted_get
+
+
+DASHBOARD_URLS = [
+    "/auth/dashboard/",
+    "/auth/api/footprint/panels/",
+    "/auth/api/footprint/daily/",
+    "/auth/api/footprint/trend/",
+    "/auth/api/footprint/monthly/",
+    "/auth/api/footprint/range/",
+    "/auth/api/footprint/recommendations/",
+]
+
+
+def dashboard_statements(client):
+    """Instructions SQL émises par le tableau de bord et ses pages JSON"""
+    # Première page après la connexion : message flash, sans ETag
+    client.get("/")
+
+    counts = {}
+    for url in DASHBOARD_URLS:
+        response, statements = counted_get(client, url)
+        assert response.status_code == 200, url
+        assert all(statement.lstrip().upper().startswith("SELECT") for statement in statements), url
+        counts[url] = len(statements)
+    return counts
+
+
+@pytest.mark.parametrize("activities", [0, 60])
+def test_dashboard_statement_count(client, user, factor, activities):
+    for index in range(activities):
+        add_activity(user.id, factor, 1 + index, date.today() - timedelta(days=index % 45))
+
+    counts = dashboard_statements(client)
+
+    # Utilisateur (load_user), versions des données et du catalogue (ETag),
+    # puis une lecture des agrégats, quel que soit le nombre d'activités
+    assert counts.pop("/auth/dashboard/") == 3
+    assert all(count == 4 for count in counts.values()), counts
+
+
+def test_dashboard_loads_all_panels_from_one_snapshot(client, user, factor):
+    for index in range(60):
+        add_activity(user.id, factor, 1 + index, date.today() - timedelta(days=index % 45))
+    client.get("/")
+
+    # Ce que charge le navigateur : la page puis ses panneaux
+    page, statements = counted_get(client, "/auth/dashboard/?days=30")
+    assert page.status_code == 200
+    panels, panel_statements = counted_get(client, "/auth/api/footprint/panels/?days=30")
+    assert panels.status_code == 200
+    statements += panel_statements
+    # Page : utilisateur et versions (ETag) ; panneaux : les mêmes et un instantané
+    assert len(statements) == 7, statements
+    assert sum("daily_emissions" in statement for statement in statements) == 1
+
+    # Mêmes valeurs que les pages JSON de chaque panneau
+    panels = panels.get_json()
+    assert panels["daily"] == client.get("/auth/api/footprint/daily/").get_json()
+    assert panels["trend"] == client.get("/auth/api/footprint/trend/?days=30").get_json()
+    assert panels["monthly"] == client.get("/auth/api/footprint/monthly/").get_json()
+    assert panels["recommendations"] == client.get("/auth/api/footprint/recommendations/").get_json()["recommendations"]
+
+
+def test_dashboard_revalidation_reads_only_the_versions(client, user, factor):
+    add_activity(user.id, factor, 10)
+    client.get("/")
+
+    for url in DASHBOARD_URLS:
+        etag = client.get(url).headers["ETag"]
+        response, statements = counted_get(client, url, headers={"If-None-Match": etag})
+        assert response.status_code == 304, url
+        # Utilisateur (load_user) et versions des données et du catalogue
+        assert len(statements) == 3, url
+
+
+def test_first_dashboard_request_writes_nothing(client):
+    response, statements = counted_get(client, "/auth/dashboard/")
+
+    assert response.status_code == 200
+    assert all(statement.lstrip().upper().startswith("SELECT") for statement in statements), statements
@@ -0,0 +1,106 @@
+from datetime import date, datetime, timedelta, timezone
+import multiprocessing
+import sys
+
+import pytest
+
+from configs.settings import db
+from carbon.models import Activity
+
+
+def insert_activities(user_id, factor, count):
+    """Insère des activités en masse (les agrégats ne servent pas à l'export)"""
+    created_at = datetime.now(timezone.utc)
+    first_day = date.today() - timedelta(days=999)
+    db.session.execute(
+        Activity.__table__.insert(),
+        [
+            {
+                "user_id": user_id,
+                "emission_factor_id": factor.id,
+                "quantity": 1 + index % 50,
+                "date": first_day + timedelta(days=index % 1000),
+                "created_at": created_at,
+                "co2_emissions": (1 + index % 50) * factor.co2_factor,
+                "category": factor.category,
+            }
+            for index in range(count)
+        ]
+    )
+    db.session.commit()
+
+
+def current_rss():
+    """
+    Mémoire résidente anonyme du processus en octets (Linux : /proc/self/status)
+
+    Les pages du fichier SQLite projetées en mémoire (PRAGMA mmap_size)
+    sont exclues : elles appartiennent au cache du système de fichiers.
+    """
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError("RssAnon absent de /proc/self/status")
+
+
+def export_rss_growth(database_uri, email, export_format, results):
+    """
+    Processus mesurant la mémoire résidente (RSS) pendant un export
+
+    Lancé dans un processus neuf, dont la mémoire ne doit rien aux tests
+    précédents. La mémoire résidente est relevée à chaque morceau reçu ;
+    le processus publie la hausse maximale pendant la lecture, en octets.
+    """
+    from configs.settings import create_app
+
+    app = create_app({
+        "TESTING": True,
+        "SECRET_KEY": "test",
+        "SQLALCHEMY_DATABASE_URI": database_uri,
+        "WTF_CSRF_ENABLED": False,
+        "MINIFY": False,
+    })
+    client = app.test_client()
+    client.post("/auth/login/", data={"email": email, "password": "secret123"})
+    client.get("/")
+
+    before = peak = current_rss()
+    response = client.get(f"/history/export/?format={export_format}", buffered=False)
+    lines = 0
+    for chunk in response.response:
+        lines += chunk.count(b"\n") if isinstance(chunk, bytes) else chunk.count("\n")
+        peak = max(peak, current_rss())
+    response.close()
+    results.put((lines, peak - before))
+
+
+def measure_rss(app, user, export_format):
+    """Lignes reçues et hausse de la mémoire résidente d'un export lu dans un processus neuf"""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(
+        target=export_rss_growth,
+        args=(app.config["SQLALCHEMY_DATABASE_URI"], user.email, export_format, results)
+    )
+    process.start()
+    lines, growth = results.get(timeout=120)
+    process.join()
+    assert process.exitcode == 0
+    return lines, growth
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="/proc/self/status (Linux)")
+@pytest.mark.parametrize("export_format", ["csv", "ndjson"])
+def test_export_rss_does_not_grow_with_history(app, user, factor, export_format):
+    insert_activities(user.id, factor, 10000)
+    small_lines, small_growth = measure_rss(app, user, export_format)
+
+    insert_activities(user.id, factor, 40000)
+    large_lines, large_growth = measure_rss(app, user, export_format)
+
+    # Un historique 5 fois plus long (environ 4 Mio d'export de plus) : la
+    # mémoire résidente, pilote SQLite et Werkzeug compris, ne s'accroît
+    # pas avec lui (un export entièrement en mémoire ajouterait 20 Mio)
+    assert large_lines - small_lines == 40000
+    assert large_growth < small_growth + 2 * 1024 * 1024
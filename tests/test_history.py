@@ -0,0 +1,184 @@
+from datetime import date, timedelta
+
+import pytest
+
+from controllers.history import ActivityHistory
+
+from tests.conftest import add_activity, count_statements
+
+
+FILTERS = {"category": None, "date_from": None, "date_to": None, "q": None}
+
+
+@pytest.fixture
+def long_history(user, factor):
+    """Une activité tous les 4 jours pendant 400 jours"""
+    last_day = date.today()
+    for index in range(100):
+        add_activity(user.id, factor, 1 + index, last_day - timedelta(days=4 * index))
+    return last_day
+
+
+@pytest.mark.parametrize("q", [None, "essence"])
+def test_summary_totals_cover_the_whole_history(user, factor, long_history, q):
+    summary = ActivityHistory(user.id).summary(dict(FILTERS, q=q))
+
+    assert summary["count"] == 100
+    assert summary["total"] == round(sum(1 + index for index in range(100)) * factor.co2_factor, 2)
+    assert summary["by_category"] == {"transport": summary["total"]}
+    assert summary["first_date"] == (long_history - timedelta(days=396)).isoformat()
+    assert summary["last_date"] == long_history.isoformat()
+
+
+@pytest.mark.parametrize("q", [None, "essence"])
+def test_summary_series_is_limited_to_the_chart_window(user, long_history, q):
+    history = ActivityHistory(user.id)
+    with count_statements() as statements:
+        summary = history.summary(dict(FILTERS, q=q))
+
+    # Totaux par catégorie, puis série journalière de la fenêtre
+    reads = [statement for statement in statements if "factor_catalog_version" not in statement]
+    assert len(reads) == 2
+    window_start = long_history - timedelta(days=ActivityHistory.CHART_DAYS - 1)
+    assert [day["date"] for day in summary["by_day"]] == [
+        (long_history - timedelta(days=4 * index)).isoformat()
+        for index in reversed(range(100))
+        if long_history - timedelta(days=4 * index) >= window_start
+    ]
+
+
+def test_summary_window_ends_at_the_filtered_range(user, long_history):
+    date_to = long_history - timedelta(days=200)
+    summary = ActivityHistory(user.id).summary(dict(FILTERS, date_to=date_to))
+
+    assert summary["last_date"] == date_to.isoformat()
+    assert summary["by_day"][-1]["date"] == date_to.isoformat()
+    assert summary["by_day"][0]["date"] >= (date_to - timedelta(days=ActivityHistory.CHART_DAYS - 1)).isoformat()
+
+
+def test_summary_without_match(user, long_history):
+    summary = ActivityHistory(user.id).summary(dict(FILTERS, q="introuvable"))
+
+    assert summary == {
+        "count": 0,
+        "total": 0,
+        "first_date": None,
+        "last_date": None,
+        "by_day": [],
+        "by_category": {},
+    }
+
+
+@pytest.fixture
+def tied_history(user):
+    """Activités de deux catégories, plusieurs par jour : (date, id) départage les égalités"""
+    from carbon.registry import get_factor_registry
+
+    registry = get_factor_registry()
+    transport = registry.get_by_category("transport")[0]
+    food = registry.get_by_category("food")[0]
+    last_day = date.today()
+    activities = [
+        add_activity(user.id, food if index % 3 == 0 else transport, 1 + index, last_day - timedelta(days=index // 4))
+        for index in range(40)
+    ]
+    # Ajouts antidatés : des ID plus grands sur des jours déjà remplis
+    activities += [add_activity(user.id, food, 50, last_day - timedelta(days=days)) for days in (0, 3, 3, 9)]
+    return [
+        (activity.date, activity.id, activity.emission_factor_id)
+        for activity in sorted(activities, key=lambda a: (a.date, a.id), reverse=True)
+    ]
+
+
+def walk(fetch):
+    """Parcourt toutes les pages ; fetch(curseur) -> (ID de la page, curseur suivant)"""
+    ids, cursor, pages = [], None, 0
+    while True:
+        page_ids, cursor = fetch(cursor)
+        ids += page_ids
+        pages += 1
+        if cursor is None:
+            return ids, pages
+
+
+def test_page_cursor_has_no_duplicates_or_gaps(user, tied_history):
+    history = ActivityHistory(user.id)
+
+    def fetch(cursor):
+        activities, next_cursor = history.page(
+            FILTERS,
+            cursor=ActivityHistory.decode_cursor(cursor) if cursor else None,
+            limit=7
+        )
+        return [activity["id"] for activity in activities], next_cursor
+
+    ids, pages = walk(fetch)
+
+    assert ids == [activity_id for _, activity_id, _ in tied_history]
+    assert pages == -(-len(tied_history) // 7)
+
+
+def test_page_cursor_ignores_rows_added_before_it(user, factor, tied_history):
+    history = ActivityHistory(user.id)
+    first, cursor = history.page(FILTERS, limit=10)
+
+    # Une activité du jour ajoutée entre deux pages ne décale pas la suite
+    add_activity(user.id, factor, 1, date.today())
+    rest, _ = history.page(FILTERS, cursor=ActivityHistory.decode_cursor(cursor), limit=100)
+
+    ids = [activity["id"] for activity in first + rest]
+    assert ids == [activity_id for _, activity_id, _ in tied_history]
+
+
+def test_history_data_pages_with_filters(client, tied_history):
+    from carbon.registry import get_factor_registry
+
+    food_ids = {factor.id for factor in get_factor_registry().get_by_category("food")}
+    date_from = date.today() - timedelta(days=8)
+    expected = [
+        activity_id
+        for activity_date, activity_id, factor_id in tied_history
+        if factor_id in food_ids and activity_date >= date_from
+    ]
+    query = f"category=food&date_from={date_from.isoformat()}&limit=2"
+
+    def fetch(cursor):
+        url = f"/history/data/?{query}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(url)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert all(activity["category"] == "food" for activity in data["activities"])
+        return [activity["id"] for activity in data["activities"]], data["next_cursor"]
+
+    ids, pages = walk(fetch)
+
+    assert len(expected) > 4
+    assert ids == expected
+    assert pages == -(-len(expected) // 2)
+
+
+# Tailles réduites (PAGE_SIZE 10, MAX_PAGE_SIZE 20) : l'historique compte 44 activités
+@pytest.mark.parametrize("limit, size", [
+    ("1", 1),
+    ("-5", 1),
+    ("0", 10),
+    ("abc", 10),
+    ("15", 15),
+    ("1000", 20),
+])
+def test_history_data_clamps_limit(client, tied_history, monkeypatch, limit, size):
+    monkeypatch.setattr(ActivityHistory, "PAGE_SIZE", 10)
+    monkeypatch.setattr(ActivityHistory, "MAX_PAGE_SIZE", 20)
+
+    data = client.get(f"/history/data/?limit={limit}").get_json()
+
+    assert len(data["activities"]) == size
+    assert data["next_cursor"] is not None
+
+
+@pytest.mark.parametrize("cursor", ["abc", "2025-01-01", "2025-01-01_x", "2025-13-01_5", "_12"])
+def test_history_data_rejects_malformed_cursor(client, tied_history, cursor):
+    response = client.get(f"/history/data/?cursor={cursor}")
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Curseur invalide."}
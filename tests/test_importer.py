@@ -0,0 +1,70 @@
+import json
+
+import pytest
+from sqlalchemy import text
+
+from configs.settings import db
+from carbon.models import Activity
+from carbon.registry import get_factor_registry
+from carbon.validators import ActivityValidator
+from controllers.importer import ActivityImporter
+from controllers.ledger import ActivityLedger
+
+
+def ndjson(*quantities, factor_id):
+    return [json.dumps({"factor_id": factor_id, "quantity": quantity, "date": "2025-03-01"}) for quantity in quantities]
+
+
+@pytest.mark.parametrize("quantity", ["nan", "inf", "-inf", "1e400"])
+def test_validator_rejects_non_finite_quantities(app, factor, quantity):
+    errors, validated_data = ActivityValidator(get_factor_registry()).validate({
+        "category": factor.category,
+        "activity_id": factor.id,
+        "quantity": quantity,
+    })
+
+    assert errors
+    assert "quantity" not in validated_data
+
+
+def test_validator_rejects_overflowing_emissions(app):
+    factor = max(get_factor_registry().by_id.values(), key=lambda entry: entry.co2_factor)
+    errors, validated_data = ActivityValidator(get_factor_registry()).validate({
+        "category": factor.category,
+        "activity_id": factor.id,
+        "quantity": "1e308",
+    })
+
+    assert errors == ["La quantité est trop grande."]
+
+
+def test_import_rejects_non_finite_quantities(user, factor):
+    report = ActivityImporter(user.id).run(ndjson("nan", "Infinity", "1e400", "2", factor_id=factor.id), "ndjson")
+
+    assert (report["imported"], report["rejected"]) == (1, 3)
+    assert [error["line"] for error in report["errors"]] == [1, 2, 3]
+
+
+def test_failed_batch_is_retried_row_by_row(client, user, factor):
+    # Échec de la base sur une ligne précise
+    db.session.execute(text(
+        "CREATE TRIGGER reject_13 BEFORE INSERT ON activities WHEN NEW.quantity = 13 "
+        "BEGIN SELECT RAISE(ABORT, 'refusé'); END"
+    ))
+    db.session.commit()
+
+    response = client.post(
+        "/activities/import/?format=ndjson",
+        data="\n".join(ndjson(10, 11, 12, 13, 14, factor_id=factor.id)),
+        content_type="application/x-ndjson",
+    )
+
+    assert response.status_code == 200
+    report = response.get_json()
+    assert (report["imported"], report["rejected"]) == (4, 1)
+    assert report["errors"][0]["line"] == 4
+
+    db.session.expire_all()
+    assert Activity.query.filter_by(user_id=user.id).count() == 4
+    assert ActivityLedger(user.id).totals()[1] == 4
+    assert ActivityLedger.rebuild(dry_run=True)["mismatches"] == []
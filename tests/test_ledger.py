@@ -0,0 +1,81 @@
+import pytest
+
+from configs.settings import db
+from carbon.models import Activity, DailyEmission, EmissionFactor
+from carbon.registry import get_factor_registry
+from controllers.ledger import ActivityLedger
+
+from tests.conftest import add_activity
+
+
+def delete(client, activity_id):
+    return client.post(f"/activity/delete/{activity_id}/", headers={"Referer": "/history/"})
+
+
+def assert_empty_rollups(user_id):
+    db.session.expire_all()
+    assert DailyEmission.query.filter_by(user_id=user_id).count() == 0
+    co2_total, activity_count = ActivityLedger(user_id).totals()
+    assert activity_count == 0
+    assert abs(co2_total) < 1e-9
+
+
+def test_record_stores_emissions(user, factor):
+    activity = add_activity(user.id, factor, 10)
+
+    assert activity.co2_emissions == 10 * factor.co2_factor
+    assert activity.category == factor.category
+
+
+def test_delete_after_factor_edit(client, user, factor):
+    activity = add_activity(user.id, factor, 10)
+
+    db.session.get(EmissionFactor, factor.id).co2_factor = factor.co2_factor * 3
+    db.session.commit()
+    assert get_factor_registry().get(factor.id).co2_factor == factor.co2_factor * 3
+
+    delete(client, activity.id)
+
+    assert db.session.get(Activity, activity.id) is None
+    assert_empty_rollups(user.id)
+    assert ActivityLedger.rebuild(dry_run=True)["mismatches"] == []
+
+
+def test_delete_after_factor_removal(client, user):
+    factor = EmissionFactor(
+        category="transport", subcategory="test", activity_name="Retiré",
+        unit="km", co2_factor=0.5, source="test"
+    )
+    db.session.add(factor)
+    db.session.commit()
+    activity = add_activity(user.id, get_factor_registry().get(factor.id), 4)
+
+    # Retrait du catalogue, l'activité garde son emission_factor_id
+    EmissionFactor.query.filter_by(id=factor.id).delete()
+    db.session.commit()
+    assert get_factor_registry().get(factor.id) is None
+
+    delete(client, activity.id)
+
+    assert db.session.get(Activity, activity.id) is None
+    assert_empty_rollups(user.id)
+
+
+def test_upsert_follows_the_engine_dialect(app):
+    from sqlalchemy import create_mock_engine
+    from sqlalchemy.orm import Session
+
+    from carbon.models import UserStats
+    from configs.database import upsert_insert
+
+    assert type(upsert_insert(UserStats)).__module__ == "sqlalchemy.dialects.sqlite.dml"
+
+    # Moteurs factices : le dialecte suffit, sans pilote ni serveur
+    postgresql = create_mock_engine("postgresql://", lambda *args, **kwargs: None)
+    stmt = upsert_insert(UserStats, Session(postgresql)).values(user_id=1)
+    sql = str(stmt.on_conflict_do_nothing(index_elements=["user_id"]).compile(dialect=postgresql.dialect))
+    assert sql.endswith("ON CONFLICT (user_id) DO NOTHING")
+
+    mysql = create_mock_engine("mysql://", lambda *args, **kwargs: None)
+    with pytest.raises(NotImplementedError):
+        upsert_insert(UserStats, Session(mysql))
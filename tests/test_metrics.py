@@ -0,0 +1,57 @@
+import gc
+from threading import Thread
+
+from configs import metrics
+from configs.metrics import MetricsRegistry, record_cache, timed
+
+
+def test_dead_thread_shard_is_merged():
+    registry = MetricsRegistry()
+    registry.inc("ecotrace_db_queries_total", (("endpoint", "main"),))
+
+    threads = [
+        Thread(target=registry.inc, args=("ecotrace_db_queries_total", (("endpoint", "worker"),), 2))
+        for _ in range(50)
+    ]
+    for thread in threads:
+        thread.start()
+        thread.join()
+    del threads, thread
+    gc.collect()
+
+    # Seul le fragment du thread principal reste, les valeurs sont conservées
+    assert len(registry._shards) == 1
+    assert registry.collect() == {
+        ("ecotrace_db_queries_total", (("endpoint", "main"),)): 1,
+        ("ecotrace_db_queries_total", (("endpoint", "worker"),)): 100,
+    }
+
+
+def test_recording_is_a_no_op_when_metrics_are_off(monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", False)
+    monkeypatch.setattr(metrics, "registry", MetricsRegistry())
+
+    @timed("Test.method")
+    def method(value):
+        return value * 2
+
+    assert method(21) == 42
+    record_cache("factor_registry", True)
+
+    assert metrics.registry.collect() == {}
+
+
+def test_recording_when_metrics_are_on(monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", True)
+    monkeypatch.setattr(metrics, "registry", MetricsRegistry())
+
+    @timed("Test.method")
+    def method(value):
+        return value * 2
+
+    method(21)
+    record_cache("factor_registry", True)
+
+    totals = metrics.registry.collect()
+    assert totals[("ecotrace_cache_requests_total", (("cache", "factor_registry"), ("result", "hit")))] == 1
+    assert totals[("ecotrace_method_duration_seconds", (("method", "Test.method"),))][-1] == 1
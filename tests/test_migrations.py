@@ -0,0 +1,117 @@
+from datetime import date
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import stamp, upgrade
+import pytest
+from sqlalchemy import inspect, text
+
+from configs.bootstrap import init_db
+from configs.settings import create_app, db, init_migrate
+
+BASELINE = "dd3d0ae2ce7b"
+
+
+@pytest.fixture
+def empty_app(tmp_path):
+    """Application sur une base vide, sans initialisation automatique"""
+    app = create_app({
+        "TESTING": True,
+        "SECRET_KEY": "test",
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'legacy.sqlite3'}",
+        "AUTO_INIT_DB": False,
+        "MINIFY": False,
+        "ASSETS_BUILD_DIR": str(tmp_path / "build"),
+    })
+    init_migrate(app)
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+def test_baseline_is_the_original_schema(empty_app):
+    upgrade(revision=BASELINE)
+
+    tables = set(inspect(db.engine).get_table_names()) - {"alembic_version"}
+    assert tables == {"users", "emission_factors", "activities"}
+
+
+def create_pre_series_database():
+    """Base au schéma initial, avec des données et sans historique de migrations"""
+    upgrade(revision=BASELINE)
+    with db.engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO users (id, name, email, password) VALUES "
+            "(1, 'A', 'a@ecotrace.fr', 'x'), (2, 'B', 'b@ecotrace.fr', 'x')"
+        ))
+        connection.execute(text(
+            "INSERT INTO emission_factors (id, category, subcategory, activity_name, unit, co2_factor) "
+            "VALUES (1, 'transport', 'voiture', 'Voiture', 'km', 0.2)"
+        ))
+        connection.execute(text(
+            "INSERT INTO activities (user_id, emission_factor_id, quantity, date) VALUES "
+            "(1, 1, 10, :day), (1, 1, 15, :day)"
+        ), {"day": date(2025, 3, 1)})
+        connection.execute(text("DROP TABLE alembic_version"))
+
+
+def assert_migrated_with_backfill():
+    with db.engine.connect() as connection:
+        assert connection.execute(text(
+            "SELECT user_id, date, category, co2_total, activity_count FROM daily_emissions"
+        )).all() == [(1, "2025-03-01", "transport", pytest.approx(5.0), 2)]
+        assert connection.execute(text(
+            "SELECT user_id, co2_total, activity_count FROM user_stats ORDER BY user_id"
+        )).all() == [(1, pytest.approx(5.0), 2), (2, 0, 0)]
+        assert connection.execute(text(
+            "SELECT user_count, activity_count, co2_total FROM platform_stats"
+        )).all() == [(2, 2, pytest.approx(5.0))]
+        assert connection.execute(text(
+            "SELECT co2_emissions, category FROM activities ORDER BY id"
+        )).all() == [(pytest.approx(2.0), "transport"), (pytest.approx(3.0), "transport")]
+
+        # Le schéma obtenu est celui des modèles
+        assert compare_metadata(MigrationContext.configure(connection), db.metadata) == []
+
+
+def test_upgrade_from_pre_series_database(empty_app):
+    create_pre_series_database()
+
+    stamp(revision=BASELINE)
+    upgrade()
+
+    assert_migrated_with_backfill()
+
+
+def test_first_request_migrates_pre_series_database(empty_app, tmp_path):
+    create_pre_series_database()
+    db.session.remove()
+
+    # Configuration par défaut (AUTO_INIT_DB) sur la même base
+    app = create_app({
+        "TESTING": True,
+        "SECRET_KEY": "test",
+        "SQLALCHEMY_DATABASE_URI": empty_app.config["SQLALCHEMY_DATABASE_URI"],
+        "MINIFY": False,
+        "ASSETS_BUILD_DIR": str(tmp_path / "build"),
+    })
+    assert app.config["AUTO_INIT_DB"]
+    assert app.test_client().get("/").status_code == 200
+
+    with app.app_context():
+        assert_migrated_with_backfill()
+        db.session.remove()
+
+
+def test_init_db_refuses_unknown_schema_without_history(empty_app):
+    create_pre_series_database()
+    with db.engine.begin() as connection:
+        connection.execute(text("CREATE TABLE daily_emissions (user_id INTEGER)"))
+
+    with pytest.raises(RuntimeError, match="flask db upgrade"):
+        init_db()
+
+    # Rien n'a été créé
+    assert set(inspect(db.engine).get_table_names()) == {
+        "users", "emission_factors", "activities", "daily_emissions"
+    }
@@ -0,0 +1,179 @@
+from datetime import date, timedelta
+
+import pytest
+
+from configs.settings import db
+from carbon.models import UserStats
+from controllers.calculator import CarbonCalculator
+from controllers.ledger import ActivityLedger
+from controllers.prefix_index import PrefixSumIndex
+
+from tests.conftest import add_activity, count_statements
+
+
+@pytest.fixture
+def prefix_index(app):
+    """Active l'index des sommes cumulées (lu à chaque appel, pas à la création de l'application)"""
+    app.config["PREFIX_INDEX"] = True
+    return app
+
+
+def delete(client, activity_id):
+    return client.post(f"/activity/delete/{activity_id}/", headers={"Referer": "/history/"})
+
+
+def test_new_user_index_is_read(prefix_index, client, user, factor):
+    stats = db.session.get(UserStats, user.id)
+    assert (stats.data_version, stats.prefix_version) == (0, 0)
+
+    today = date.today()
+    activities = [
+        add_activity(user.id, factor, quantity, today - timedelta(days=days_ago))
+        for quantity, days_ago in ((10, 400), (5, 40), (2, 3), (7, 0))
+    ]
+    delete(client, activities[1].id)
+
+    db.session.expire_all()
+    stats = db.session.get(UserStats, user.id)
+    assert stats.data_version == 5
+    assert stats.prefix_version == stats.data_version
+
+    lifetime = PrefixSumIndex(user.id).lifetime_totals()
+    assert lifetime is not None
+    assert lifetime[1] == 3
+    assert lifetime[0] == pytest.approx(19 * factor.co2_factor)
+
+    # La tendance est lue dans l'index, pas dans les agrégats journaliers
+    with count_statements() as statements:
+        CarbonCalculator(user.id).calculate_trend(30)
+    assert not any("daily_emissions" in statement for statement in statements)
+
+
+@pytest.fixture
+def backdated_history(prefix_index, client, user):
+    """
+    Activités de plusieurs catégories sur deux années, ajoutées dans le désordre
+
+    Chaque ajout antidaté réécrit la fin d'une année déjà indexée ; deux
+    activités sont ensuite supprimées par la vue.
+    """
+    from carbon.registry import get_factor_registry
+
+    registry = get_factor_registry()
+    factors = [registry.get_by_category(category)[0] for category in PrefixSumIndex.CATEGORIES]
+    today = date.today()
+    activities = [
+        add_activity(user.id, factors[index % len(factors)], quantity, today - timedelta(days=days_ago))
+        for index, (quantity, days_ago) in enumerate(
+            ((3, 0), (8, 370), (4.5, 35), (1.25, 2), (6, 365), (2, 35), (9, 120), (0.5, 0))
+        )
+    ]
+    delete(client, activities[2].id)
+    delete(client, activities[4].id)
+    db.session.expire_all()
+    return activities
+
+
+def months(activities):
+    return sorted({(activity.date.year, activity.date.month) for activity in activities})
+
+
+def read_both(app, read):
+    """Résultat d'une lecture avec l'index puis avec les agrégats journaliers"""
+    app.config["PREFIX_INDEX"] = True
+    indexed = read()
+    app.config["PREFIX_INDEX"] = False
+    scanned = read()
+    app.config["PREFIX_INDEX"] = True
+    return indexed, scanned
+
+
+def test_index_matches_scan(prefix_index, user, backdated_history):
+    calculator = CarbonCalculator(user.id)
+
+    indexed, scanned = read_both(prefix_index, lambda: calculator.calculate_trend(400))
+    assert indexed == scanned
+    assert any(day['emissions'] for day in indexed)
+
+    for year, month in months(backdated_history):
+        indexed, scanned = read_both(
+            prefix_index, lambda: calculator.calculate_monthly_summary(month, year)
+        )
+        assert indexed == scanned
+
+    emissions, count = PrefixSumIndex(user.id).lifetime_totals()
+    co2_total, activity_count = ActivityLedger(user.id)._totals_from_rollups()
+    assert count == activity_count == 6
+    assert emissions == pytest.approx(co2_total)
+
+
+def test_incremental_updates_match_rebuild(user, backdated_history):
+    report = PrefixSumIndex.rebuild(dry_run=True)
+
+    assert report['mismatches'] == []
+    assert report['stale'] == 0
+    assert report['users'] == 1
+    kept = [activity for index, activity in enumerate(backdated_history) if index not in (2, 4)]
+    assert report['years'] == len({activity.date.year for activity in kept})
+
+
+def test_accumulate_rewrites_year_suffix():
+    sums = PrefixSumIndex.accumulate(PrefixSumIndex.empty(), {(0, 10): 5, (0, 20): -2, (4, 20): 1})
+    days = PrefixSumIndex.DAYS
+
+    assert sums[9] == 0
+    assert sums[10:20] == PrefixSumIndex.accumulate(PrefixSumIndex.empty(), {(0, 10): 5})[10:20]
+    assert set(sums[20:days]) == {3}
+    assert sums[4 * days + 19] == 0
+    assert set(sums[4 * days + 20:5 * days]) == {1}
+
+
+def test_stale_index_falls_back_to_rollups(prefix_index, user, factor, backdated_history):
+    calculator = CarbonCalculator(user.id)
+
+    # Écriture sans l'index : il ne couvre plus la version courante
+    prefix_index.config["PREFIX_INDEX"] = False
+    add_activity(user.id, factor, 11, date.today() - timedelta(days=1))
+    prefix_index.config["PREFIX_INDEX"] = True
+    db.session.expire_all()
+
+    stats = db.session.get(UserStats, user.id)
+    assert stats.prefix_version != stats.data_version
+    assert PrefixSumIndex(user.id).lifetime_totals() is None
+    assert PrefixSumIndex.rebuild(dry_run=True)['stale'] == 1
+
+    indexed, scanned = read_both(prefix_index, lambda: calculator.calculate_trend(7))
+    assert indexed == scanned
+    assert indexed[-2]['emissions'] == round(11 * factor.co2_factor, 2)
+
+    # La reconstruction remet l'index à jour
+    PrefixSumIndex.rebuild()
+    db.session.expire_all()
+    assert PrefixSumIndex(user.id).lifetime_totals()[1] == 7
+    assert calculator.calculate_trend(7) == scanned
+
+
+def test_rebuild_check_only(prefix_index, user, backdated_history):
+    from carbon.models import EmissionPrefixSums
+
+    runner = prefix_index.test_cli_runner()
+    result = runner.invoke(args=["ecotrace", "rebuild-prefix-index", "--check-only"])
+    assert result.exit_code == 0
+    assert "0 écart(s) constaté(s), 0 index à reconstruire" in result.output
+
+    # Index altéré : signalé, mais pas réécrit
+    row = EmissionPrefixSums.query.filter_by(user_id=user.id, year=date.today().year).one()
+    row.sums = PrefixSumIndex.pack(PrefixSumIndex.empty())
+    db.session.commit()
+
+    result = runner.invoke(args=["ecotrace", "rebuild-prefix-index", "--check-only"])
+    assert result.exit_code == 1
+    assert f"Écart utilisateur {user.id} année {date.today().year}" in result.output
+
+    db.session.expire_all()
+    row = db.session.get(EmissionPrefixSums, (user.id, date.today().year))
+    assert PrefixSumIndex.unpack(row.sums) == PrefixSumIndex.empty()
+
+    result = runner.invoke(args=["ecotrace", "rebuild-prefix-index"])
+    assert result.exit_code == 0
+    assert PrefixSumIndex.rebuild(dry_run=True)['mismatches'] == []
@@ -0,0 +1,15 @@
+from datetime import date, timedelta
+
+from controllers.query_plans import QueryPlanAudit
+from tests.conftest import add_activity
+
+
+def test_hot_queries_use_an_index(app, user, factor):
+    for offset in range(40):
+        add_activity(user.id, factor, offset + 1, date.today() - timedelta(days=offset))
+
+    report = QueryPlanAudit(user.id).run()
+
+    assert report
+    failures = {item["path"]: item["full_scans"] for item in report if item["full_scans"]}
+    assert failures == {}
@@ -0,0 +1,147 @@
+from datetime import date, timedelta
+
+import pytest
+
+from carbon.registry import get_factor_registry
+from controllers.calculator import CarbonCalculator
+
+from tests.conftest import add_activity
+
+START = date(2024, 12, 28)
+END = date(2025, 1, 8)
+
+
+@pytest.fixture
+def year_end(user):
+    """Activités autour du passage à 2025, dont deux hors de la plage START..END"""
+    registry = get_factor_registry()
+    transport = registry.get_by_category("transport")[0]
+    food = registry.get_by_category("food")[0]
+    for factor, quantity, day in (
+        (transport, 10, date(2024, 12, 27)),
+        (transport, 4, date(2024, 12, 28)),
+        (food, 2, date(2024, 12, 31)),
+        (transport, 1, date(2024, 12, 31)),
+        (food, 3, date(2025, 1, 8)),
+        (food, 5, date(2025, 1, 9)),
+    ):
+        add_activity(user.id, factor, quantity, day)
+    return {
+        "transport": transport.co2_factor,
+        "food": food.co2_factor,
+    }
+
+
+def period_bounds(result):
+    return [(period["label"], period["start"], period["end"]) for period in result["periods"]]
+
+
+def test_day_granularity_fills_empty_days(user, year_end):
+    result = CarbonCalculator(user.id).calculate_range(START, END, "day")
+
+    assert len(result["periods"]) == (END - START).days + 1
+    assert result["periods"][0]["label"] == "2024-12-28"
+    assert result["periods"][-1]["label"] == "2025-01-08"
+    totals = {period["label"]: period["total"] for period in result["periods"]}
+    assert totals["2024-12-28"] == round(4 * year_end["transport"], 2)
+    assert totals["2024-12-31"] == round(2 * year_end["food"] + year_end["transport"], 2)
+    assert totals["2025-01-08"] == round(3 * year_end["food"], 2)
+    assert [totals[label] for label in ("2024-12-29", "2024-12-30", "2025-01-01", "2025-01-07")] == [0] * 4
+    assert all(len(values) == len(result["periods"]) for values in result["series"].values())
+    assert result["by_category"]["food"] == round(5 * year_end["food"], 2)
+    assert result["by_category"]["transport"] == round(5 * year_end["transport"], 2)
+    assert result["by_category"]["energy"] == 0
+
+
+def test_iso_weeks_across_year_boundary(user, year_end):
+    result = CarbonCalculator(user.id).calculate_range(START, END, "week")
+
+    assert period_bounds(result) == [
+        ("2024-W52", "2024-12-28", "2024-12-29"),
+        ("2025-W01", "2024-12-30", "2025-01-05"),
+        ("2025-W02", "2025-01-06", "2025-01-08"),
+    ]
+    assert result["series"]["transport"] == [round(4 * year_end["transport"], 2), round(year_end["transport"], 2), 0]
+    assert result["series"]["food"] == [0, round(2 * year_end["food"], 2), round(3 * year_end["food"], 2)]
+
+    # Année ISO à 53 semaines
+    weeks = list(CarbonCalculator.iter_periods(date(2020, 12, 31), date(2021, 1, 4), "week"))
+    assert [label for _, label, _, _ in weeks] == ["2020-W53", "2021-W01"]
+
+
+def test_month_and_year_periods_are_clipped(user, year_end):
+    calculator = CarbonCalculator(user.id)
+
+    months = calculator.calculate_range(START, date(2025, 3, 2), "month")
+    assert period_bounds(months) == [
+        ("2024-12", "2024-12-28", "2024-12-31"),
+        ("2025-01", "2025-01-01", "2025-01-31"),
+        ("2025-02", "2025-02-01", "2025-02-28"),
+        ("2025-03", "2025-03-01", "2025-03-02"),
+    ]
+    assert [period["total"] for period in months["periods"]][2:] == [0, 0]
+    # Le 27 décembre, hors plage, n'est pas compté dans décembre
+    assert months["periods"][0]["total"] == round(5 * year_end["transport"] + 2 * year_end["food"], 2)
+
+    years = calculator.calculate_range(START, END, "year")
+    assert period_bounds(years) == [
+        ("2024", "2024-12-28", "2024-12-31"),
+        ("2025", "2025-01-01", "2025-01-08"),
+    ]
+    assert years["total"] == pytest.approx(sum(period["total"] for period in years["periods"]), abs=0.01)
+
+
+def test_single_day_range(user, year_end):
+    result = CarbonCalculator(user.id).calculate_range(END, END, "month")
+
+    assert period_bounds(result) == [("2025-01", "2025-01-08", "2025-01-08")]
+    assert result["total"] == round(3 * year_end["food"], 2)
+
+
+def test_invalid_arguments(user):
+    calculator = CarbonCalculator(user.id)
+
+    with pytest.raises(ValueError):
+        calculator.calculate_range(START, END, "quarter")
+    with pytest.raises(ValueError):
+        calculator.calculate_range(END, START, "day")
+
+
+def test_range_endpoint(client, year_end):
+    response = client.get(f"/auth/api/footprint/range/?start={START}&end={END}&granularity=week")
+    assert response.status_code == 200
+    assert [period["label"] for period in response.get_json()["periods"]] == ["2024-W52", "2025-W01", "2025-W02"]
+
+    # Par défaut : par mois, du 1er janvier de l'année précédente à aujourd'hui
+    response = client.get("/auth/api/footprint/range/")
+    assert response.status_code == 200
+    assert response.get_json()["granularity"] == "month"
+    assert response.get_json()["start"] == date(date.today().year - 1, 1, 1).isoformat()
+
+
+@pytest.mark.parametrize("query", [
+    "start=2025-13-01",
+    "end=demain",
+    "granularity=quarter",
+    f"start={END}&end={START}",
+])
+def test_range_endpoint_rejects_bad_arguments(client, query):
+    response = client.get(f"/auth/api/footprint/range/?{query}")
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_range_endpoint_caps_span(client):
+    from auth.views import RangeApiView
+
+    start = date(2015, 1, 1)
+    longest = start + timedelta(days=RangeApiView.MAX_DAYS - 1)
+
+    response = client.get(f"/auth/api/footprint/range/?start={start}&end={longest}&granularity=year")
+    assert response.status_code == 200
+    assert response.get_json()["end"] == longest.isoformat()
+
+    too_long = longest + timedelta(days=1)
+    response = client.get(f"/auth/api/footprint/range/?start={start}&end={too_long}&granularity=year")
+    assert response.status_code == 400
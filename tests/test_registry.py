@@ -0,0 +1,42 @@
+from sqlalchemy import text
+
+from configs.settings import db
+from carbon.models import EmissionFactor
+from carbon.registry import factor_catalog_version, get_factor_registry
+
+
+def test_factor_edit_bumps_the_stored_version(app, factor):
+    before = factor_catalog_version()
+
+    db.session.get(EmissionFactor, factor.id).co2_factor = 1.5
+    db.session.commit()
+
+    assert factor_catalog_version() == before + 1
+    assert get_factor_registry().get(factor.id).co2_factor == 1.5
+
+
+def test_rolled_back_edit_keeps_the_version(app, factor):
+    before = factor_catalog_version()
+
+    db.session.get(EmissionFactor, factor.id).co2_factor = 1.5
+    db.session.flush()
+    db.session.rollback()
+
+    assert factor_catalog_version() == before
+    assert get_factor_registry().get(factor.id).co2_factor == factor.co2_factor
+
+
+def test_change_from_another_process_is_seen_by_the_next_request(client, factor):
+    first = client.get("/auth/api/footprint/daily/")
+    client.get("/add_activity/")
+    assert get_factor_registry().get(factor.id).co2_factor == factor.co2_factor
+
+    # Modification par un autre processus : aucun événement dans celui-ci
+    with db.engine.begin() as connection:
+        connection.execute(text("UPDATE emission_factors SET co2_factor = 9 WHERE id = :id"), {"id": factor.id})
+        connection.execute(text("UPDATE factor_catalog_version SET version = version + 1"))
+
+    second = client.get("/auth/api/footprint/daily/", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 200
+    assert get_factor_registry().get(factor.id).co2_factor == 9
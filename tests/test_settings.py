@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import stat
+import threading
+
+import pytest
+
+from configs.settings import load_secret_key
+
+
+def test_secret_key_is_created_once(tmp_path):
+    secret_key = load_secret_key(tmp_path)
+
+    assert len(secret_key) == 64
+    assert load_secret_key(tmp_path) == secret_key
+    assert os.listdir(tmp_path) == ["secret_key"]
+    assert stat.S_IMODE(os.stat(tmp_path / "secret_key").st_mode) == 0o600
+
+
+def test_concurrent_creation_yields_one_key(tmp_path):
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        keys = set(executor.map(lambda _: load_secret_key(tmp_path), range(64)))
+
+    assert len(keys) == 1
+    assert os.listdir(tmp_path) == ["secret_key"]
+
+
+def test_empty_file_is_read_again(tmp_path):
+    # Fichier créé puis écrit en deux temps par une version antérieure
+    path = tmp_path / "secret_key"
+    path.write_text("")
+    writer = threading.Timer(0.05, path.write_text, args=("a" * 64,))
+    writer.start()
+
+    assert load_secret_key(tmp_path) == "a" * 64
+    writer.join()
+
+
+def test_empty_file_left_behind_is_reported(tmp_path):
+    (tmp_path / "secret_key").write_text("")
+
+    with pytest.raises(RuntimeError):
+        load_secret_key(tmp_path)
@@ -0,0 +1,54 @@
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import date
+import time
+from threading import Thread
+
+import pytest
+
+from configs.settings import db
+from carbon.models import Activity
+from controllers.ledger import ActivityLedger
+from controllers.write_behind import ActivityWriteQueue
+
+
+def make_queue(app, flush_ms=5, timeout=5):
+    app.config.update(WRITE_BEHIND_FLUSH_MS=flush_ms, WRITE_BEHIND_TIMEOUT=timeout)
+    return ActivityWriteQueue(app)
+
+
+def activity_count(user_id):
+    db.session.expire_all()
+    return Activity.query.filter_by(user_id=user_id).count()
+
+
+def test_add_commits_before_returning(app, user, factor):
+    make_queue(app).add(user.id, factor, 10, date.today())
+
+    assert activity_count(user.id) == 1
+    assert ActivityLedger(user.id).totals()[1] == 1
+
+
+def test_timed_out_activity_is_never_written(app, user, factor):
+    # L'écrivain attend 500 ms d'autres activités, la requête 100 ms
+    writer = make_queue(app, flush_ms=500, timeout=0.1)
+
+    with pytest.raises(FutureTimeoutError):
+        writer.add(user.id, factor, 10, date.today())
+
+    time.sleep(0.8)
+    assert activity_count(user.id) == 0
+    assert ActivityLedger(user.id).totals()[1] == 0
+
+
+def test_dead_writer_falls_back_to_synchronous_write(app, user, factor):
+    writer = make_queue(app)
+    writer._thread = Thread(target=lambda: None)
+    writer._thread.start()
+    writer._thread.join()
+
+    started = time.monotonic()
+    writer.add(user.id, factor, 10, date.today())
+
+    assert time.monotonic() - started < writer.timeout
+    assert activity_count(user.id) == 1
+    assert ActivityLedger(user.id).totals()[1] == 1
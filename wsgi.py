@@ -0,0 +1,8 @@
+"""
+Point d'entrée WSGI pour la production.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from configs.settings import create_app
+
+app = create_app()